@@ -0,0 +1,108 @@
+import threading
+import numpy as np
+from typing import Dict, Hashable, Iterable, Optional
+from columnar import ColumnarDataset
+
+
+class GroupedSums:
+    """Running count and sum of one value per group key"""
+
+    def __init__(self):
+        self.counts: Dict[Hashable, int] = {}
+        self.sums: Dict[Hashable, float] = {}
+
+    def add(self, keys: Iterable[Hashable], counts: np.ndarray, sums: np.ndarray):
+        for key, count, total in zip(keys, counts, sums):
+            if count:
+                self.counts[key] = self.counts.get(key, 0) + int(count)
+                self.sums[key] = self.sums.get(key, 0.0) + float(total)
+
+    def means(self) -> Dict[Hashable, float]:
+        return {key: self.sums[key] / count for key, count in self.counts.items()}
+
+
+class FisheriesAggregates:
+    """Per-species, per-month and per-species-month abundance rollups.
+
+    Rollups are updated from each appended batch in one vectorized pass, so
+    reading them costs O(groups) regardless of how many records were ingested.
+    A full rebuild only happens when the dataset is replaced wholesale.
+    """
+
+    def __init__(self, value: str = 'abundance'):
+        self.value = value
+        self._lock = threading.Lock()
+        self._source: Optional[ColumnarDataset] = None
+        self._reset()
+
+    def _reset(self):
+        self.total_records = 0
+        self.by_species = GroupedSums()
+        self.by_month = GroupedSums()
+        self.by_species_month = GroupedSums()
+
+    def covers(self, dataset: ColumnarDataset) -> bool:
+        """Whether the rollups already describe this snapshot"""
+        return dataset is self._source
+
+    def sync(self, dataset: ColumnarDataset) -> 'FisheriesAggregates':
+        """Make the rollups describe dataset, rebuilding only if it is a new snapshot"""
+        with self._lock:
+            if dataset is not self._source:
+                self._reset()
+                self._add(dataset)
+                self._source = dataset
+        return self
+
+    def append(self, batch: ColumnarDataset, result: ColumnarDataset):
+        """Fold an appended batch into the rollups; result is the dataset after the append"""
+        with self._lock:
+            self._add(batch)
+            self._source = result
+
+    def _add(self, batch: ColumnarDataset):
+        if not len(batch):
+            return
+        species = batch.categories('species')
+        species_codes = batch.codes('species')
+        values = batch.column(self.value).astype(float)
+        months, month_codes = np.unique(batch.column('date').astype('datetime64[M]'),
+                                        return_inverse=True)
+        month_labels = np.datetime_as_string(months, unit='M').tolist()  # YYYY-MM
+
+        self.total_records += len(batch)
+        self.by_species.add(species,
+                            np.bincount(species_codes, minlength=len(species)),
+                            np.bincount(species_codes, weights=values, minlength=len(species)))
+        self.by_month.add(month_labels, np.bincount(month_codes),
+                          np.bincount(month_codes, weights=values))
+
+        # Combined (species, month) key as one flat code
+        size = len(species) * len(months)
+        combined = species_codes.astype(np.int64) * len(months) + month_codes
+        keys = [(name, month) for name in species for month in month_labels]
+        self.by_species_month.add(keys, np.bincount(combined, minlength=size),
+                                  np.bincount(combined, weights=values, minlength=size))
+
+    def species_counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.by_species.counts)
+
+    def average_abundance(self) -> Dict[str, float]:
+        with self._lock:
+            return self.by_species.means()
+
+    def distinct_species(self) -> int:
+        with self._lock:
+            return len(self.by_species.counts)
+
+    def monthly_abundance(self, species: Optional[str] = None) -> Dict[str, float]:
+        """Mean abundance per YYYY-MM, for one species or all of them"""
+        with self._lock:
+            if species is None:
+                return dict(sorted(self.by_month.means().items()))
+            counts = self.by_species_month.counts
+            sums = self.by_species_month.sums
+            return {month: sums[(name, month)] / count
+                    for (name, month), count in sorted(counts.items(), key=lambda item: item[0][1])
+                    if name == species}
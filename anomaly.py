@@ -0,0 +1,225 @@
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+import metrics
+
+# Parameters of each live sensor reading that are checked
+SENSOR_PARAMETERS = ('temperature', 'salinity', 'ph')
+
+# MAD of a normal distribution is 0.6745 standard deviations
+_MAD_SCALE = 0.6745
+
+ANOMALIES = metrics.REGISTRY.counter('sensor_anomalies_total', 'Anomalous sensor readings by parameter and check',
+                                     ('parameter', 'check'))
+
+
+def wall_clock() -> float:
+    """Now in epoch seconds of local wall-clock time, the scale observe() reads naive timestamps on"""
+    return float(np.datetime64(datetime.now(), 's').astype(float))
+
+
+class AnomalyDetector:
+    """Streaming per-sensor, per-parameter anomaly detector with O(1) state.
+
+    For every (sensor, parameter) it keeps an EWMA mean and variance, a
+    running median estimate with an EWMA of absolute deviations (for a
+    robust z-score), the last value and time, and an EWMA of the absolute
+    rate of change. A reading is flagged when, after warmup, any score
+    exceeds its threshold. Batches of ticks are scored and folded into the
+    state with array operations, so no history is kept or re-scanned.
+    """
+
+    def __init__(self, parameters: Sequence[str] = SENSOR_PARAMETERS, alpha: float = 0.05,
+                 z_threshold: float = 4.0, robust_threshold: float = 5.0, rate_threshold: float = 6.0,
+                 warmup: int = 20, max_alerts: int = 1000, capacity: int = 64,
+                 clock: Callable[[], float] = wall_clock, count_horizon: float = 86400.0):
+        self.parameters = tuple(parameters)
+        self.clock = clock
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.robust_threshold = robust_threshold
+        self.rate_threshold = rate_threshold
+        self.warmup = max(warmup, 2)  # scores need at least two readings of history
+        self._lock = threading.Lock()
+        self._slots: Dict[str, int] = {}
+        self._alerts = deque(maxlen=max_alerts)
+        # Alerts per reading second, kept apart from the capped alert log so counts stay exact
+        self.count_horizon = count_horizon
+        self._alert_seconds: Dict[int, int] = {}
+        self._next_alert = 1
+        self._readings = 0
+        self._flagged = 0
+        shape = (capacity, len(self.parameters))
+        self._state = {name: np.zeros(shape) for name in ('mean', 'var', 'median', 'mad', 'last', 'rate')}
+        self._count = np.zeros(shape, dtype=np.int64)
+        self._last_time = np.zeros(capacity)
+
+    def _grow(self, capacity: int):
+        def resize(array: np.ndarray) -> np.ndarray:
+            grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[:len(array)] = array
+            return grown
+        self._state = {name: resize(values) for name, values in self._state.items()}
+        self._count = resize(self._count)
+        self._last_time = resize(self._last_time)
+
+    def _slot_for(self, sensor_ids: Sequence[str]) -> np.ndarray:
+        slots = np.empty(len(sensor_ids), dtype=np.int64)
+        for i, sensor_id in enumerate(sensor_ids):
+            slot = self._slots.get(sensor_id)
+            if slot is None:
+                slot = self._slots[sensor_id] = len(self._slots)
+            slots[i] = slot
+        if len(self._slots) > len(self._count):
+            self._grow(max(len(self._slots), 2 * len(self._count)))
+        return slots
+
+    def update(self, sensor_ids: Sequence[str], values: np.ndarray, times: np.ndarray,
+               context: Optional[Sequence[Dict]] = None) -> List[Dict]:
+        """Score a batch of readings (values: rows x parameters, times: epoch seconds) and learn from it.
+
+        Returns the alerts raised. A sensor appearing several times in one
+        batch is processed in arrival order.
+        """
+        values = np.asarray(values, dtype=float).reshape(len(sensor_ids), len(self.parameters))
+        times = np.asarray(times, dtype=float)
+        with self._lock:
+            slots = self._slot_for(sensor_ids)
+            # Repeated sensors go in successive rounds so every round has unique slots
+            order = np.argsort(slots, kind='stable')
+            sorted_slots = slots[order]
+            starts = np.flatnonzero(np.r_[True, sorted_slots[1:] != sorted_slots[:-1]])
+            rank = np.empty(len(slots), dtype=np.int64)
+            rank[order] = np.arange(len(slots)) - np.repeat(starts, np.diff(np.r_[starts, len(slots)]))
+            alerts = []
+            for round_ in range(int(rank.max()) + 1 if len(rank) else 0):
+                rows = np.flatnonzero(rank == round_)
+                alerts.extend(self._step(rows, slots[rows], values[rows], times[rows], context))
+            self._readings += len(slots)
+            return alerts
+
+    def _step(self, rows, slots, x, t, context) -> List[Dict]:
+        s = self._state
+        a = self.alpha
+        mean, var, median, mad = s['mean'][slots], s['var'][slots], s['median'][slots], s['mad'][slots]
+        last, rate = s['last'][slots], s['rate'][slots]
+        count = self._count[slots]
+        first = count == 0
+
+        # Missing parameters leave their state untouched and are never flagged
+        valid = ~np.isnan(x)
+        x = np.where(valid, x, mean)
+        # Floors relative to the signal's magnitude keep flat signals from dividing by ~0
+        floor = 1e-4 * (np.abs(mean) + 1.0)
+
+        # Score against the state before this reading
+        z = np.abs(x - mean) / np.maximum(np.sqrt(var), floor)
+        robust = _MAD_SCALE * np.abs(x - median) / np.maximum(mad, floor)
+        dt = np.maximum(t - self._last_time[slots], 1.0)[:, None]
+        step_rate = np.abs(x - last) / dt
+        rate_score = step_rate / np.maximum(rate, floor)
+        warmed = valid & (count >= self.warmup)
+        checks = {
+            'zscore': warmed & (z > self.z_threshold),
+            'robust_zscore': warmed & (robust > self.robust_threshold),
+            'rate_of_change': warmed & (rate_score > self.rate_threshold),
+        }
+
+        # Fold the reading in: EWMA mean/variance, median by stochastic quantile steps
+        delta = x - mean
+        step = a * np.maximum(mad, floor)
+        new_median = median + step * np.sign(x - median)
+        # Rate needs two readings; it starts from the first observed step
+        new_rate = np.where(count < 2, np.where(first, 0.0, step_rate), (1 - a) * rate + a * step_rate)
+        updates = {
+            'mean': np.where(first, x, mean + a * delta),
+            'var': np.where(first, 0.0, (1 - a) * (var + a * delta * delta)),
+            'median': np.where(first, x, new_median),
+            'mad': np.where(first, 0.0, (1 - a) * mad + a * np.abs(x - new_median)),
+            'rate': new_rate,
+            'last': x,
+        }
+        old = {'mean': mean, 'var': var, 'median': median, 'mad': mad, 'rate': rate, 'last': last}
+        for name, new in updates.items():
+            s[name][slots] = np.where(valid, new, old[name])
+        self._last_time[slots] = t
+        self._count[slots] = count + valid
+
+        flagged = checks['zscore'] | checks['robust_zscore'] | checks['rate_of_change']
+        alerts = []
+        for i, j in zip(*np.nonzero(flagged)):
+            reasons = [name for name, hit in checks.items() if hit[i, j]]
+            parameter = self.parameters[j]
+            for reason in reasons:
+                ANOMALIES.inc(parameter=parameter, check=reason)
+            alert = {
+                'id': self._next_alert,
+                'parameter': parameter,
+                'value': float(x[i, j]),
+                'expected': round(float(mean[i, j]), 4),
+                'zscore': round(float(z[i, j]), 2),
+                'robust_zscore': round(float(robust[i, j]), 2),
+                'rate_score': round(float(rate_score[i, j]), 2),
+                'reasons': reasons,
+                'time': float(t[i]),
+            }
+            if context is not None:
+                alert.update(context[rows[i]])
+            self._next_alert += 1
+            self._flagged += 1
+            self._alerts.append(alert)
+            alerts.append(alert)
+            second = int(t[i])
+            self._alert_seconds[second] = self._alert_seconds.get(second, 0) + 1
+        if len(self._alert_seconds) > self.count_horizon:
+            self._prune_counts(self.clock() - self.count_horizon)
+        return alerts
+
+    def _prune_counts(self, cutoff: float):
+        for second in [second for second in self._alert_seconds if second < cutoff]:
+            del self._alert_seconds[second]
+
+    def observe(self, readings: Sequence[Dict], key: str = 'sensor_id', time_field: str = 'timestamp') -> List[Dict]:
+        """Score sensor reading dicts like those from generate_live_sensor_data"""
+        if not readings:
+            return []
+        sensor_ids = [reading[key] for reading in readings]
+        values = np.array([[reading.get(p, np.nan) for p in self.parameters] for reading in readings], dtype=float)
+        times = np.array([reading[time_field] for reading in readings], dtype='datetime64[s]').astype(float)
+        context = [{key: reading[key], 'location': reading.get('location'), 'timestamp': reading[time_field]}
+                   for reading in readings]
+        return self.update(sensor_ids, values, times, context)
+
+    def alerts(self, since: int = 0, limit: int = 100, sensor_id: Optional[str] = None) -> List[Dict]:
+        """Alerts with id > since, oldest first"""
+        with self._lock:
+            selected = [alert for alert in self._alerts
+                        if alert['id'] > since and (sensor_id is None or alert.get('sensor_id') == sensor_id)]
+        return selected[:limit]
+
+    def recent_count(self, window: float = 3600.0) -> int:
+        """Alerts for readings taken in the last window seconds (at most count_horizon).
+
+        Counted from per-second totals, so alerts already dropped from the
+        max_alerts log are still included.
+        """
+        now = self.clock()
+        cutoff = now - min(window, self.count_horizon)
+        with self._lock:
+            self._prune_counts(now - self.count_horizon)
+            return sum(count for second, count in self._alert_seconds.items() if second >= cutoff)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'sensors': len(self._slots),
+                'parameters': list(self.parameters),
+                'readings': self._readings,
+                'flagged': self._flagged,
+                'retained_alerts': len(self._alerts),
+                'last_alert_id': self._next_alert - 1,
+            }
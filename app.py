@@ -1,17 +1,59 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, url_for, Response, stream_with_context
 import random
 from datetime import datetime, timedelta
 import json
 import pandas as pd
 import numpy as np
-from data_ingestion import RealTimeDataIngestion
+from data_ingestion import RealTimeDataIngestion, run_advanced_analysis
+from jobs import JobQueue
+from sensor_stream import SensorBroadcaster
+from query import QueryError, StaleCursorError, parse_date, run_query
+from sources import IngestionPipeline, sources_from_config
+import metrics
+from http_cache import ResponseCache, conditional_response
+from export import EXPORT_FORMATS, available_formats, stream_export
+from spatial import parse_bbox, parse_point
 import os
 app = Flask(__name__)
 app.config.from_object('config.Config')
 
+# Per-route timing and payload metrics, plus optional slow-request profiling
+profiler = None
+if app.config['PROFILE_SLOW_REQUEST_MS'] is not None:
+    profiler = metrics.SamplingProfiler(threshold=app.config['PROFILE_SLOW_REQUEST_MS'] / 1000,
+                                        interval=app.config['PROFILE_SAMPLE_INTERVAL'],
+                                        output_dir=app.config['PROFILE_OUTPUT_DIR'])
+metrics.install(app, profiler)
+
 # Initialize real-time data ingestion
 data_ingestor = RealTimeDataIngestion()
 
+# Serialized bodies of the polled endpoints, reused until their snapshots change
+response_cache = ResponseCache(max_entries=app.config['RESPONSE_CACHE_SIZE'],
+                               compress_min_bytes=app.config['RESPONSE_COMPRESS_MIN_BYTES'])
+
+# Heavy analysis runs off the request workers in a process pool
+analysis_jobs = JobQueue(max_workers=app.config['ANALYSIS_WORKERS'],
+                         max_results=app.config['ANALYSIS_RESULT_LIMIT'])
+
+# External feeds are appended into the ingestor's caches as they arrive
+ingestion_pipeline = IngestionPipeline(data_ingestor, sources_from_config(app.config['FEED_SOURCES']),
+                                       max_workers=app.config['INGESTION_WORKERS'],
+                                       retries=app.config['INGESTION_RETRIES'],
+                                       backoff=app.config['INGESTION_BACKOFF'],
+                                       timeout=app.config['INGESTION_TIMEOUT'],
+                                       state_path=app.config['INGESTION_STATE_PATH'])
+# With shared snapshots only the producer process appends, including one that takes the
+# role over later; the others pick the results up
+if ingestion_pipeline.sources:
+    data_ingestor.on_producer(lambda: ingestion_pipeline.start(app.config['FEED_POLL_INTERVAL']))
+
+# One producer generates each sensor tick and pushes it to every SSE client
+sensor_broadcaster = SensorBroadcaster(data_ingestor.generate_live_sensor_data,
+                                       interval=app.config['SENSOR_STREAM_INTERVAL'],
+                                       heartbeat=app.config['SENSOR_STREAM_HEARTBEAT'],
+                                       max_queue=app.config['SENSOR_STREAM_QUEUE_SIZE'])
+
 @app.route('/')
 def index():
     return render_template('dashboard.html', stats=get_real_time_stats())
@@ -22,34 +64,39 @@ def dashboard():
 
 @app.route('/oceanography')
 def oceanography():
-    ocean_data = data_ingestor.get_oceanographic_data()
-    locations = list(set([d['location'] for d in ocean_data]))
+    ocean = data_ingestor.get_oceanographic_dataset()
+    locations = ocean.unique('location')
     return render_template('oceanography.html', 
-                         ocean_data=ocean_data[:20],
+                         ocean_data=ocean.head(20),
                          locations=locations)
 
 @app.route('/fisheries')
 def fisheries():
-    fisheries_data = data_ingestor.get_fisheries_data()
-    species_counts, avg_abundance = calculate_fisheries_stats(fisheries_data)
+    fisheries = data_ingestor.get_fisheries_dataset()
+    species_counts, avg_abundance = calculate_fisheries_stats(data_ingestor.get_fisheries_aggregates())
     
     return render_template('fisheries.html',
                          species_counts=species_counts,
                          avg_abundance=avg_abundance,
-                         fisheries_data=fisheries_data[:15],
-                         total_records=len(fisheries_data))
+                         fisheries_data=fisheries.head(15),
+                         total_records=len(fisheries))
 
 @app.route('/molecular')
 def molecular():
-    molecular_data = data_ingestor.get_molecular_data()
-    markers = list(set([d['genetic_marker'] for d in molecular_data]))
-    species = list(set([d['species'] for d in molecular_data]))
+    molecular = data_ingestor.get_molecular_dataset()
+    markers = molecular.unique('genetic_marker')
+    species = molecular.unique('species')
     
+    rows = molecular.head(20)
+    if 'sequence' in molecular.columns:
+        matches = data_ingestor.match_reads([row['sequence'] for row in rows], top=1)
+        for row, match in zip(rows, matches):
+            row['best_match'] = match['matches'][0] if match['matches'] else None
     return render_template('molecular.html',
-                         molecular_data=molecular_data[:20],
+                         molecular_data=rows,
                          markers=markers,
                          species=species,
-                         total_records=len(molecular_data))
+                         total_records=len(molecular))
 
 @app.route('/correlations')
 def correlations():
@@ -59,46 +106,277 @@ def correlations():
                          total_correlations=len(correlations))
 
 # API endpoints for real-time data
+def cached_json(dataset_keys, build):
+    """JSON response for this endpoint and query, serialized once per dataset snapshot.
+
+    Supports conditional GET (ETag/Last-Modified -> 304) and serves the
+    pre-compressed body the client accepts.
+    """
+    versions, last_modified = data_ingestor.snapshot_state(dataset_keys)
+    key = (request.endpoint, tuple(sorted((request.view_args or {}).items())),
+           tuple(sorted(request.args.items(multi=True))))
+    versions = tuple(zip(dataset_keys, versions))
+    entry = response_cache.get_or_build(key, versions, last_modified, lambda: jsonify(build()).get_data())
+    return conditional_response(entry, request, request.endpoint)
+
 @app.route('/api/real-time-stats')
 def api_real_time_stats():
+    # Not response-cached: last_updated and the live sensor figures change on every poll;
+    # the dataset-derived figures come from per-snapshot aggregates and stay cheap
     return jsonify(get_real_time_stats())
 
 @app.route('/api/ocean-data')
 def api_ocean_data():
     location = request.args.get('location', 'all')
-    ocean_data = data_ingestor.get_oceanographic_data()
     
-    if location != 'all':
-        filtered_data = [d for d in ocean_data if d['location'] == location]
-    else:
-        filtered_data = ocean_data
-    return jsonify(filtered_data)
+    def build():
+        if location == 'all':
+            return data_ingestor.get_oceanographic_data()
+        index, _ = data_ingestor.get_index('ocean_data')
+        rows = index.rows_for('location', [location])
+        metrics.rows_scanned(len(rows), 'query', 'ocean_data')
+        return index.dataset.take(rows).to_records()
+    return cached_json(('ocean_data',), build)
+
+# Public dataset names for the query API
+QUERY_DATASETS = {
+    'ocean': 'ocean_data',
+    'fisheries': 'fisheries_data',
+    'molecular': 'molecular_data',
+    'otolith': 'otolith_data',
+}
+
+# Arguments that select stations spatially (see station_selection)
+SPATIAL_ARGS = ('bbox', 'radius_km', 'nearest')
+
+def station_selection(registry):
+    """(station ids, distances or None) picked by bbox=, lat/lon with radius_km= or nearest=, else None"""
+    args = request.args
+    if args.get('bbox'):
+        return registry.in_bbox(*parse_bbox(args['bbox'])), None
+    if not args.get('radius_km') and not args.get('nearest'):
+        return None
+    lat, lon = parse_point(args.get('lat'), args.get('lon'))
+    try:
+        if args.get('radius_km'):
+            return registry.within(lat, lon, float(args['radius_km']))
+        nearest = max(1, min(int(args['nearest']), app.config['QUERY_MAX_PAGE_SIZE']))
+        max_km = float(args['max_km']) if args.get('max_km') else None
+    except ValueError:
+        raise QueryError('radius_km, nearest and max_km must be numbers')
+    return registry.nearest(lat, lon, nearest, max_km)
+
+def query_filters(index, dataset_key):
+    """key -> values for every indexed key given as repeated or comma-separated arguments.
+
+    A spatial selection (see station_selection) narrows the location filter
+    to the stations of dataset_key it picks.
+    """
+    filters = {}
+    for key in index.keys:
+        values = [v for arg in request.args.getlist(key) for v in arg.split(',') if v]
+        if values:
+            filters[key] = values
+    # Only this dataset's stations are candidates, so nearest= never picks one it has no rows for
+    if 'location' in index.keys and any(request.args.get(arg) for arg in SPATIAL_ARGS):
+        registry = data_ingestor.get_station_registry(dataset_key)
+        selection = station_selection(registry)
+        if selection is not None:
+            picked = {registry.names[i] for i in selection[0]}
+            filters['location'] = [name for name in filters.get('location', sorted(picked)) if name in picked]
+    return filters
+
+@app.route('/api/query/<dataset>')
+def api_query(dataset):
+    """Indexed query with location/species/date-range filters and cursor pagination"""
+    if dataset not in QUERY_DATASETS:
+        return jsonify({'error': f"Unknown dataset '{dataset}'"}), 404
+    index, version = data_ingestor.get_index(QUERY_DATASETS[dataset])
+    
+    fields = [f for f in request.args.get('fields', '').split(',') if f]
+    try:
+        limit = int(request.args.get('limit', app.config['QUERY_DEFAULT_PAGE_SIZE']))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    limit = max(1, min(limit, app.config['QUERY_MAX_PAGE_SIZE']))
+    
+    try:
+        page = run_query(index, version, query_filters(index, QUERY_DATASETS[dataset]),
+                         start=request.args.get('start'), end=request.args.get('end'),
+                         fields=fields, limit=limit, cursor=request.args.get('cursor'))
+    except StaleCursorError as e:
+        return jsonify({'error': str(e)}), 410
+    except QueryError as e:
+        return jsonify({'error': str(e)}), 400
+    metrics.rows_scanned(page['total'], 'query', QUERY_DATASETS[dataset])
+    return jsonify(page)
+
+@app.route('/api/export/<dataset>')
+def api_export(dataset):
+    """Stream every row matching the query API filters as CSV, NDJSON or Arrow IPC"""
+    if dataset not in QUERY_DATASETS:
+        return jsonify({'error': f"Unknown dataset '{dataset}'"}), 404
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f"format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+    if fmt not in available_formats():
+        return jsonify({'error': 'Arrow export requires pyarrow on the server'}), 501
+    key = QUERY_DATASETS[dataset]
+    index, version = data_ingestor.get_index(key)
+    
+    # The stream holds this snapshot, so a concurrent refresh cannot mix versions
+    snapshot = index.dataset
+    fields = [f for f in request.args.get('fields', '').split(',') if f]
+    unknown = [name for name in fields if name not in snapshot.columns]
+    if unknown:
+        return jsonify({'error': f"Unknown fields: {', '.join(unknown)}"}), 400
+    try:
+        rows = index.select(query_filters(index, key), parse_date(request.args.get('start')),
+                            parse_date(request.args.get('end')))
+    except QueryError as e:
+        return jsonify({'error': str(e)}), 400
+    metrics.rows_scanned(len(rows), 'export', key)
+    if fields:
+        snapshot = snapshot.select(fields)
+    
+    mimetype, extension = EXPORT_FORMATS[fmt]
+    body = stream_export(snapshot, rows, fmt, chunk_rows=app.config['EXPORT_CHUNK_ROWS'], name=key)
+    return Response(stream_with_context(body), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename="{dataset}-v{version}.{extension}"',
+        'X-Total-Rows': str(len(rows)),
+    })
+
+@app.route('/api/stations')
+def api_stations():
+    """Stations with coordinates, optionally within bbox=, within radius_km of lat/lon or the nearest= k"""
+    registry = data_ingestor.get_station_registry()
+    try:
+        selection = station_selection(registry)
+        limit = max(1, min(int(request.args.get('limit', app.config['QUERY_MAX_PAGE_SIZE'])),
+                           app.config['QUERY_MAX_PAGE_SIZE']))
+    except QueryError as e:
+        return jsonify({'error': str(e)}), 400
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    ids, distances = selection if selection is not None else (np.arange(len(registry)), None)
+    stations = registry.describe(ids[:limit], None if distances is None else distances[:limit])
+    present = data_ingestor.locations_by_dataset()
+    for station in stations:
+        station['datasets'] = [name for name, key in QUERY_DATASETS.items() if station['name'] in present[key]]
+    return jsonify({'total': len(ids), 'count': len(stations), 'grid_degrees': registry.cell_degrees,
+                    'stations': stations})
+
+# Datasets with chart series (see SERIES_DATASETS)
+SERIES_DATASETS = {
+    'ocean': 'ocean_data',
+    'fisheries': 'fisheries_data',
+}
+
+@app.route('/api/series/<dataset>')
+def api_series(dataset):
+    """Downsampled chart series (LTTB or min/max) over a date range, one per location/species"""
+    if dataset not in SERIES_DATASETS:
+        return jsonify({'error': f"Unknown dataset '{dataset}'"}), 404
+    key = SERIES_DATASETS[dataset]
+    try:
+        points = int(request.args.get('points', app.config['SERIES_DEFAULT_POINTS']))
+    except ValueError:
+        return jsonify({'error': 'points must be an integer'}), 400
+    points = max(3, min(points, app.config['SERIES_MAX_POINTS']))
+    rollups = data_ingestor.get_series_rollups(key)
+    groups = [v for arg in request.args.getlist(rollups.group) for v in arg.split(',') if v]
+    
+    def build():
+        return rollups.query(request.args.get('field', rollups.fields[0]), groups,
+                             start=parse_date(request.args.get('start')), end=parse_date(request.args.get('end')),
+                             points=points, method=request.args.get('method', 'lttb'),
+                             resolution=request.args.get('resolution', 'auto'))
+    try:
+        return cached_json((key,), build)
+    except QueryError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/barcode-search', methods=['POST'])
+def api_barcode_search():
+    """Top-k species matches for a batch of reads, or of stored samples by sample_ids"""
+    body = request.get_json(silent=True) or {}
+    reads, sample_ids = body.get('reads'), body.get('sample_ids')
+    batch = reads if reads is not None else sample_ids
+    if not isinstance(batch, list) or not all(isinstance(item, str) for item in batch):
+        return jsonify({'error': 'Provide reads or sample_ids as a list of strings'}), 400
+    if len(batch) > app.config['BARCODE_MAX_READS']:
+        return jsonify({'error': f"At most {app.config['BARCODE_MAX_READS']} reads per request"}), 400
+    try:
+        top = max(1, min(int(body.get('top', 5)), 20))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'top must be an integer'}), 400
+    marker = body.get('marker')
+    try:
+        if reads is not None:
+            results = data_ingestor.match_reads(reads, top=top, marker=marker)
+        else:
+            results = data_ingestor.match_samples(sample_ids, top=top, marker=marker)
+    except KeyError as e:
+        return jsonify({'error': e.args[0]}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'k': data_ingestor.get_barcode_index().k, 'results': results})
 
 @app.route('/api/fisheries-stats')
 def api_fisheries_stats():
     species = request.args.get('species', 'all')
-    fisheries_data = data_ingestor.get_fisheries_data()
     
-    if species != 'all':
-        filtered_data = [d for d in fisheries_data if d['species'] == species]
-    else:
-        filtered_data = fisheries_data
+    def build():
+        aggregates = data_ingestor.get_fisheries_aggregates()
+        return calculate_monthly_abundance(aggregates, None if species == 'all' else species)
+    return cached_json(('fisheries_data',), build)
+
+@app.route('/api/forecast')
+def api_forecast():
+    """Daily abundance forecasts with 95% prediction intervals per species/location"""
+    try:
+        horizon = int(request.args.get('horizon', app.config['FORECAST_HORIZON']))
+    except ValueError:
+        return jsonify({'error': 'horizon must be an integer'}), 400
+    horizon = max(1, min(horizon, app.config['FORECAST_MAX_HORIZON']))
+    filters = {key: [v for arg in request.args.getlist(key) for v in arg.split(',') if v]
+               for key in ('species', 'location')}
     
-    monthly_avg = calculate_monthly_abundance(filtered_data)
-    return jsonify(monthly_avg)
+    def build():
+        forecaster = data_ingestor.get_forecaster()
+        forecasts = forecaster.forecast(horizon, filters)
+        return {
+            'horizon': horizon,
+            'model': f'harmonic regression ({forecaster.harmonics} annual harmonics + trend)',
+            'fitted_at': forecaster.fitted_at.isoformat() if forecaster.fitted_at else None,
+            'forecasts': forecasts,
+        }
+    return cached_json(('fisheries_data',), build)
 
-@app.route('/api/run-advanced-analysis')
+@app.route('/api/run-advanced-analysis', methods=['POST'])
 def api_run_advanced_analysis():
-    """Advanced AI correlation analysis with real-time data"""
-    import time
-    time.sleep(1)  # Simulate processing
+    """Queue advanced AI correlation analysis and return a pollable job"""
+    # Identical requests against the same data snapshot share one job
+    key = ('advanced_analysis', data_ingestor.version('ocean_data'), data_ingestor.version('fisheries_data'))
     
-    # Get current data for analysis
-    ocean_data = data_ingestor.get_oceanographic_data()
-    fisheries_data = data_ingestor.get_fisheries_data()
+    def inputs():
+        # Runs on the job queue's preparation thread, not the request thread
+        records = len(data_ingestor.get_oceanographic_dataset()) + len(data_ingestor.get_fisheries_dataset())
+        return (records, data_ingestor.anomaly_detector.recent_count(),
+                data_ingestor.get_forecaster().mean_r2())
+    job = analysis_jobs.submit(key, run_advanced_analysis, prepare=inputs)
     
-    analysis_result = data_ingestor.run_advanced_analysis(ocean_data, fisheries_data)
-    return jsonify(analysis_result)
+    response = job.to_dict()
+    response['status_url'] = url_for('api_job_status', job_id=job.job_id)
+    return jsonify(response), 202
+
+@app.route('/api/jobs/<job_id>')
+def api_job_status(job_id):
+    """Status, and result once completed, of a queued analysis job"""
+    job = analysis_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job', 'job_id': job_id}), 404
+    return jsonify(job.to_dict())
 
 @app.route('/api/live-sensor-data')
 def api_live_sensor_data():
@@ -106,50 +384,69 @@ def api_live_sensor_data():
     live_data = data_ingestor.generate_live_sensor_data()
     return jsonify(live_data)
 
+@app.route('/api/alerts')
+def api_alerts():
+    """Anomalies flagged on live sensor readings, oldest first; poll with since=<last id>"""
+    try:
+        since = int(request.args.get('since', 0))
+        limit = max(1, min(int(request.args.get('limit', 100)), app.config['ANOMALY_ALERT_LIMIT']))
+    except ValueError:
+        return jsonify({'error': 'since and limit must be integers'}), 400
+    detector = data_ingestor.anomaly_detector
+    alerts = detector.alerts(since=since, limit=limit, sensor_id=request.args.get('sensor_id'))
+    return jsonify({
+        'alerts': alerts,
+        'last_id': alerts[-1]['id'] if alerts else since,
+        'stats': detector.stats(),
+    })
+
+@app.route('/api/sensor-stream')
+def api_sensor_stream():
+    """Server-Sent Events stream of live sensor deltas"""
+    return Response(stream_with_context(sensor_broadcaster.stream()),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/correlation-matrix')
+def api_correlation_matrix():
+    """Full Pearson/Spearman/p-value and lagged correlation matrices"""
+    return jsonify(data_ingestor.get_correlation_result().to_dict())
+
+@app.route('/api/cache-stats')
+def api_cache_stats():
+    """Dataset cache hit/miss/refresh counters"""
+    return jsonify(dict(data_ingestor.get_cache_stats(), responses=response_cache.stats()))
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Request, stage and cache metrics in Prometheus text format"""
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
 def get_real_time_stats():
-    ocean_data = data_ingestor.get_oceanographic_data()
-    fisheries_data = data_ingestor.get_fisheries_data()
-    molecular_data = data_ingestor.get_molecular_data()
-    correlations = data_ingestor.generate_ai_correlations()
+    ocean = data_ingestor.get_oceanographic_dataset()
+    molecular = data_ingestor.get_molecular_dataset()
+    aggregates = data_ingestor.get_fisheries_aggregates()
+    correlations = data_ingestor.get_correlation_result()
     
     return {
-        'total_species': len(set([d['species'] for d in fisheries_data])),
-        'ocean_samples': len(ocean_data),
-        'genetic_records': len(molecular_data),
+        'total_species': aggregates.distinct_species(),
+        'ocean_samples': len(ocean),
+        'genetic_records': len(molecular),
         'research_stations': 18,
-        'strong_correlations': len([c for c in correlations if abs(c['correlation']) > 0.7]),
+        'strong_correlations': correlations.count_strong(0.7),
         'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
         'active_sensors': random.randint(45, 55),
         'data_quality': f"{random.uniform(98.5, 99.9):.1f}%"
     }
 
-def calculate_fisheries_stats(fisheries_data):
-    species_counts = {}
-    species_abundance = {}
-    
-    for record in fisheries_data:
-        species = record['species']
-        if species not in species_counts:
-            species_counts[species] = 0
-            species_abundance[species] = []
-        species_counts[species] += 1
-        species_abundance[species].append(record['abundance'])
-    
-    avg_abundance = {species: sum(abundances)/len(abundances) 
-                    for species, abundances in species_abundance.items()}
+def calculate_fisheries_stats(aggregates):
+    species_counts = aggregates.species_counts()
+    avg_abundance = aggregates.average_abundance()
     
     return species_counts, avg_abundance
 
-def calculate_monthly_abundance(data):
-    monthly_data = {}
-    for record in data:
-        month = record['date'][:7]  # YYYY-MM
-        if month not in monthly_data:
-            monthly_data[month] = []
-        monthly_data[month].append(record['abundance'])
-    
-    return {month: sum(abundances)/len(abundances) 
-           for month, abundances in monthly_data.items()}
+def calculate_monthly_abundance(aggregates, species=None):
+    return aggregates.monthly_abundance(species)
 
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
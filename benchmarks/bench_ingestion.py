@@ -0,0 +1,121 @@
+"""Microbenchmarks for the dataset, aggregation and correlation paths.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_ingestion --sizes 1000 100000 1000000
+    python -m benchmarks.bench_ingestion --compare benchmarks/results/<earlier>.json
+
+Each case is timed "cold" (a new snapshot, as after a refresh or append)
+and "warm" (the snapshot already served once). Results are written as JSON
+under benchmarks/results/ so runs can be diffed across commits.
+"""
+import argparse
+import time
+from typing import Callable, Dict, List, Optional
+
+from app import calculate_fisheries_stats, calculate_monthly_abundance
+from benchmarks.common import compare, summarize, write_results
+from columnar import ColumnarDataset
+from data.synthetic import SPECIES_PATTERNS, SyntheticGenerator
+from data_ingestion import RealTimeDataIngestion
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+
+def time_case(run: Callable[[], object], setup: Optional[Callable[[], None]] = None,
+              repeat: int = 5, warmup: int = 1) -> List[float]:
+    """Seconds per call of run(), calling setup() untimed before each call"""
+    samples = []
+    for i in range(warmup + repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        if i >= warmup:
+            samples.append(elapsed)
+    return samples
+
+
+def _fresh(dataset: ColumnarDataset) -> ColumnarDataset:
+    """Same columns in a new snapshot object, so per-snapshot caches start empty"""
+    return dataset.select(dataset.columns)
+
+
+def build_datasets(rows: int, seed: int = 42) -> Dict[str, ColumnarDataset]:
+    """Ocean, fisheries and molecular datasets of about rows rows each"""
+    generator = SyntheticGenerator(seed=seed)
+    # Fisheries keeps its 90-day window and grows records per day, like a busier fleet
+    records_per_day = max(1, -(-rows // (len(SPECIES_PATTERNS) * 90)))
+    return {
+        'ocean_data': generator.ocean(days=max(1, rows // 3)),
+        'fisheries_data': generator.fisheries(days=90, records_per_day=records_per_day),
+        'molecular_data': generator.molecular(samples=rows),
+    }
+
+
+def bench_size(rows: int, repeat: int) -> Dict[str, Dict]:
+    datasets = build_datasets(rows)
+    ingestor = RealTimeDataIngestion()
+
+    def install(*keys):
+        for key in keys:
+            ingestor.data_cache.put(key, _fresh(datasets[key]))
+
+    def install_all():
+        install(*datasets)
+
+    install_all()
+    accessors = {
+        'get_oceanographic_data': ('ocean_data', ingestor.get_oceanographic_data),
+        'get_fisheries_data': ('fisheries_data', ingestor.get_fisheries_data),
+        'get_molecular_data': ('molecular_data', ingestor.get_molecular_data),
+    }
+    cases = {}
+    for name, (key, method) in accessors.items():
+        cases[f"{name}[cold]"] = (method, lambda key=key: install(key))
+        cases[f"{name}[warm]"] = (method, None)
+
+    def fisheries_stats():
+        return calculate_fisheries_stats(ingestor.get_fisheries_aggregates())
+
+    def monthly_abundance():
+        return calculate_monthly_abundance(ingestor.get_fisheries_aggregates())
+
+    cases['calculate_fisheries_stats[cold]'] = (fisheries_stats, lambda: install('fisheries_data'))
+    cases['calculate_fisheries_stats[warm]'] = (fisheries_stats, None)
+    cases['calculate_monthly_abundance[cold]'] = (monthly_abundance, lambda: install('fisheries_data'))
+    cases['calculate_monthly_abundance[warm]'] = (monthly_abundance, None)
+    cases['generate_ai_correlations[cold]'] = (ingestor.generate_ai_correlations,
+                                               lambda: install('ocean_data', 'fisheries_data'))
+    cases['generate_ai_correlations[warm]'] = (ingestor.generate_ai_correlations, None)
+
+    results = {}
+    for name, (run, setup) in cases.items():
+        summary = summarize(time_case(run, setup, repeat=repeat))
+        summary['rows'] = {key: len(dataset) for key, dataset in datasets.items()}
+        results[f"{name} n={rows}"] = summary
+        print(f"{name:<40} n={rows:<10} p50 {summary['p50_ms']:>10.3f} ms  max {summary['max_ms']:>10.3f} ms")
+        install_all()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Microbenchmarks for the ingestion and analysis paths')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='rows per dataset')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='results file (default: benchmarks/results/ingestion-<time>.json)')
+    parser.add_argument('--compare', help='earlier results file to diff against')
+    args = parser.parse_args()
+
+    results = {}
+    for rows in args.sizes:
+        results.update(bench_size(rows, args.repeat))
+    path = write_results('ingestion', results, args.output)
+    print(f"Wrote {path}")
+    if args.compare:
+        print('\n'.join(compare(args.compare, results)))
+
+
+if __name__ == '__main__':
+    main()
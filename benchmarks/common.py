@@ -0,0 +1,72 @@
+import json
+import os
+import platform
+import statistics
+import subprocess
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def percentile(samples: List[float], q: float) -> float:
+    return float(np.percentile(samples, q)) if samples else float('nan')
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Timing summary in milliseconds"""
+    ms = [s * 1000 for s in samples]
+    return {
+        'runs': len(ms),
+        'min_ms': round(min(ms), 3),
+        'mean_ms': round(statistics.fmean(ms), 3),
+        'p50_ms': round(percentile(ms, 50), 3),
+        'p95_ms': round(percentile(ms, 95), 3),
+        'p99_ms': round(percentile(ms, 99), 3),
+        'max_ms': round(max(ms), 3),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(suite: str, results: Dict, output: Optional[str] = None) -> str:
+    """Save results with run metadata as JSON; returns the file path"""
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{suite}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    payload = {
+        'suite': suite,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'results': results,
+    }
+    with open(output, 'w') as f:
+        json.dump(payload, f, indent=2)
+    return output
+
+
+def compare(baseline_path: str, results: Dict, metric: str = 'p50_ms', threshold: float = 1.10) -> List[str]:
+    """Lines describing cases that got slower than threshold x baseline"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)['results']
+    lines = []
+    for case, summary in results.items():
+        before = baseline.get(case, {}).get(metric)
+        after = summary.get(metric)
+        if not before or after is None:
+            continue
+        ratio = after / before
+        marker = 'REGRESSION' if ratio > threshold else ('improved' if ratio < 1 / threshold else 'same')
+        lines.append(f"{case:<60} {before:>10.3f} -> {after:>10.3f} {metric}  x{ratio:.2f}  {marker}")
+    return lines
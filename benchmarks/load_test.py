@@ -0,0 +1,176 @@
+"""Concurrent HTTP load harness for every Flask route.
+
+Run from the repository root:
+
+    python -m benchmarks.load_test --requests 200 --concurrency 8
+    python -m benchmarks.load_test --base-url http://127.0.0.1:5000 --only /api/ocean-data
+
+By default requests go through the Flask test client in-process, one client
+per worker thread; with --base-url they go over HTTP to a running server
+(e.g. gunicorn) through pooled sessions. Reports p50/p95/p99 latency and
+throughput per endpoint and saves them as JSON under benchmarks/results/.
+"""
+import argparse
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.common import compare, summarize, write_results
+
+# Routes that never complete a response (SSE) or serve files
+SKIP_ROUTES = {'/api/sensor-stream', '/static/<path:filename>'}
+
+# Concrete requests for routes with URL variables or interesting query strings
+ROUTE_SAMPLES = {
+    '/api/ocean-data': ['/api/ocean-data', '/api/ocean-data?location=Arabian Sea'],
+    '/api/fisheries-stats': ['/api/fisheries-stats', '/api/fisheries-stats?species=Pomfret'],
+    '/api/query/<dataset>': ['/api/query/ocean?location=Arabian Sea&limit=100',
+                             '/api/query/fisheries?species=Oil Sardine,Pomfret&limit=500',
+                             '/api/query/molecular?genetic_marker=COI&fields=sample_id,species'],
+    '/api/series/<dataset>': ['/api/series/ocean?field=temperature',
+                              '/api/series/fisheries?field=abundance&species=Pomfret&method=minmax'],
+    '/api/export/<dataset>': ['/api/export/fisheries?format=csv&species=Pomfret',
+                              '/api/export/ocean?format=ndjson&location=Arabian Sea'],
+}
+
+
+def _barcode_search_body() -> Dict:
+    """A batch of reads cut from the reference barcodes"""
+    from data.synthetic import reference_barcodes
+    return {'reads': [ref['sequence'][50:250] for ref in reference_barcodes()[:16]], 'top': 3}
+
+
+# JSON bodies for POST routes that need one
+ROUTE_BODIES = {
+    '/api/barcode-search': _barcode_search_body,
+}
+
+
+def collect_requests(app, job_path: Optional[str]) -> List[Tuple[str, str, Any]]:
+    """(method, path, JSON body or None) for every routable endpoint of the app"""
+    targets = []
+    for rule in sorted(app.url_map.iter_rules(), key=lambda r: r.rule):
+        if rule.rule in SKIP_ROUTES:
+            continue
+        if rule.rule == '/api/jobs/<job_id>':
+            if job_path:
+                targets.append(('GET', job_path, None))
+            continue
+        paths = ROUTE_SAMPLES.get(rule.rule, [rule.rule])
+        for method in sorted(rule.methods & {'GET', 'POST'}):
+            body = ROUTE_BODIES[rule.rule]() if method == 'POST' and rule.rule in ROUTE_BODIES else None
+            targets.extend((method, path, body) for path in paths)
+    return targets
+
+
+def _test_client_factory(app) -> Callable[[], Callable[..., int]]:
+    def factory():
+        client = app.test_client()
+
+        def send(method: str, path: str, body: Any = None) -> int:
+            response = client.open(path, method=method, json=body)
+            response.get_data()
+            return response.status_code
+        return send
+    return factory
+
+
+def _http_factory(base_url: str, timeout: float) -> Callable[[], Callable[..., int]]:
+    import requests
+
+    def factory():
+        session = requests.Session()
+
+        def send(method: str, path: str, body: Any = None) -> int:
+            return session.request(method, base_url.rstrip('/') + path, json=body, timeout=timeout).status_code
+        return send
+    return factory
+
+
+def load_endpoint(client_factory, method: str, path: str, total: int, concurrency: int,
+                  body: Any = None) -> Dict:
+    """Fire total requests at one endpoint from concurrency threads"""
+    ticket = itertools.count()
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    lock = threading.Lock()
+
+    def worker():
+        send = client_factory()
+        local, codes = [], {}
+        while next(ticket) < total:
+            start = time.perf_counter()
+            try:
+                status = send(method, path, body)
+            except Exception:
+                status = 0
+            local.append(time.perf_counter() - start)
+            codes[status] = codes.get(status, 0) + 1
+        with lock:
+            latencies.extend(local)
+            for status, count in codes.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    wall = time.perf_counter() - started
+
+    summary = summarize(latencies)
+    summary['throughput_rps'] = round(len(latencies) / wall, 1) if wall else None
+    summary['errors'] = sum(count for status, count in statuses.items() if status == 0 or status >= 400)
+    summary['status_codes'] = {str(status): count for status, count in sorted(statuses.items())}
+    summary['concurrency'] = concurrency
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent load test of the Flask routes')
+    parser.add_argument('--requests', type=int, default=200, help='requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--base-url', help='load a running server instead of the in-process test client')
+    parser.add_argument('--timeout', type=float, default=30.0, help='HTTP timeout with --base-url')
+    parser.add_argument('--only', nargs='+', help='only paths starting with these prefixes')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/load-<time>.json)')
+    parser.add_argument('--compare', help='earlier results file to diff against')
+    args = parser.parse_args()
+
+    from app import analysis_jobs, app
+
+    client_factory = (_http_factory(args.base_url, args.timeout) if args.base_url
+                      else _test_client_factory(app))
+    # Queue one analysis job up front so its status route has something to report
+    if args.base_url:
+        import requests
+        response = requests.post(args.base_url.rstrip('/') + '/api/run-advanced-analysis', timeout=args.timeout)
+        job_path = response.json().get('status_url')
+    else:
+        response = app.test_client().post('/api/run-advanced-analysis')
+        job_path = response.get_json().get('status_url')
+    client_factory()('GET', '/api/real-time-stats')  # warm the dataset caches before timing
+
+    results = {}
+    try:
+        for method, path, body in collect_requests(app, job_path):
+            if args.only and not any(path.startswith(prefix) for prefix in args.only):
+                continue
+            summary = load_endpoint(client_factory, method, path, args.requests, args.concurrency, body)
+            results[f"{method} {path}"] = summary
+            print(f"{method:<5}{path:<70} p50 {summary['p50_ms']:>9.2f}  p95 {summary['p95_ms']:>9.2f}"
+                  f"  p99 {summary['p99_ms']:>9.2f} ms  {summary['throughput_rps']:>8.1f} req/s"
+                  f"  errors {summary['errors']}")
+    finally:
+        if not args.base_url:
+            analysis_jobs.shutdown()
+
+    path = write_results('load', results, args.output)
+    print(f"Wrote {path}")
+    if args.compare:
+        print('\n'.join(compare(args.compare, results)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+
+class ColumnarDataset:
+    """Immutable in-memory column store for one data domain.
+
+    Numeric fields are typed NumPy arrays, low-cardinality string fields are
+    categorical-coded and date fields are datetime64[D]. A list-of-dict view
+    is materialized lazily for templates and JSON responses.
+    """
+
+    def __init__(self, columns: Dict[str, Any], categorical: Iterable[str] = (),
+                 dates: Iterable[str] = ()):
+        self._order: List[str] = list(columns)
+        self._columns: Dict[str, Any] = {}
+        self.categorical = set(categorical)
+        self.dates = set(dates)
+        length = None
+        for name, values in columns.items():
+            if name in self.categorical:
+                values = values if isinstance(values, pd.Categorical) else pd.Categorical(values)
+            elif name in self.dates:
+                values = np.asarray(values, dtype='datetime64[D]')
+            else:
+                values = np.asarray(values)
+            if length is None:
+                length = len(values)
+            elif len(values) != length:
+                raise ValueError(f"Column '{name}' has {len(values)} rows, expected {length}")
+            self._columns[name] = values
+        self._length = length or 0
+        self._records: Optional[List[Dict]] = None
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict], categorical: Iterable[str] = (),
+                     dates: Iterable[str] = ()) -> 'ColumnarDataset':
+        """Build a dataset from a list of dicts sharing the same keys"""
+        if not records:
+            return cls({})
+        names = list(records[0])
+        columns = {name: [record[name] for record in records] for name in names}
+        return cls(columns, categorical=categorical, dates=dates)
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._order)
+
+    def column(self, name: str) -> np.ndarray:
+        """Raw column values (decoded for categorical columns)"""
+        values = self._columns[name]
+        if name in self.categorical:
+            return np.asarray(values)
+        return values
+
+    def codes(self, name: str) -> np.ndarray:
+        """Integer category codes of a categorical column"""
+        return self._columns[name].codes
+
+    def categories(self, name: str) -> List[str]:
+        return list(self._columns[name].categories)
+
+    def unique(self, name: str) -> List:
+        """Distinct values present in a column"""
+        if name in self.categorical:
+            present = np.bincount(self.codes(name), minlength=len(self.categories(name))) > 0
+            return [c for c, keep in zip(self.categories(name), present) if keep]
+        return pd.unique(self._columns[name]).tolist()
+
+    def select(self, names: Sequence[str]) -> 'ColumnarDataset':
+        """New dataset with only the named columns, in the given order"""
+        columns = {name: self._columns[name] for name in names}
+        return ColumnarDataset(columns, categorical=self.categorical & set(names),
+                               dates=self.dates & set(names))
+
+    def take(self, indices) -> 'ColumnarDataset':
+        """New dataset with the selected rows (categories are preserved)"""
+        indices = np.asarray(indices)
+        columns = {name: self._columns[name][indices] for name in self._order}
+        return ColumnarDataset(columns, categorical=self.categorical, dates=self.dates)
+
+    def concat(self, other: 'ColumnarDataset') -> 'ColumnarDataset':
+        """New dataset with other's rows appended (categories are unioned)"""
+        if not len(self):
+            return other
+        if not len(other):
+            return self
+        columns = {}
+        for name in self._order:
+            if name in self.categorical:
+                columns[name] = union_categoricals([self._columns[name], other._columns[name]])
+            else:
+                columns[name] = np.concatenate([self._columns[name], other._columns[name]])
+        return ColumnarDataset(columns, categorical=self.categorical, dates=self.dates)
+
+    def head(self, n: int) -> List[Dict]:
+        return self.take(np.arange(min(n, self._length))).to_records()
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({name: self._columns[name] for name in self._order})
+
+    def _python_column(self, name: str) -> List:
+        values = self._columns[name]
+        if name in self.dates:
+            return np.datetime_as_string(values, unit='D').tolist()
+        if name in self.categorical:
+            return np.asarray(values.categories, dtype=object)[values.codes].tolist()
+        return values.tolist()
+
+    def to_records(self) -> List[Dict]:
+        """List-of-dict view with JSON-native values, built once per dataset"""
+        if self._records is None:
+            names = self._order
+            rows = zip(*[self._python_column(name) for name in names])
+            self._records = [dict(zip(names, row)) for row in rows]
+        return self._records
@@ -7,4 +7,78 @@ class Config:
     # Real-time data settings
     DATA_REFRESH_INTERVAL = 300  # 5 minutes
     SENSOR_UPDATE_FREQUENCY = 60  # 1 minute
-    MAX_CACHE_SIZE = 1000
\ No newline at end of file
+    MAX_CACHE_SIZE = 1000
+    # Per-dataset cache TTLs in seconds
+    DATASET_TTLS = {
+        'ocean_data': DATA_REFRESH_INTERVAL,
+        'fisheries_data': DATA_REFRESH_INTERVAL * 2,
+        'molecular_data': DATA_REFRESH_INTERVAL * 4,
+    }
+    # Lags (days) for ocean-to-catch cross-correlation
+    CORRELATION_LAGS = (0, 1, 3, 7)
+    # Farthest ocean station (km) a catch location without a configured region is joined to
+    CORRELATION_MAX_STATION_KM = 1500
+    # Cell size (degrees) of the station registry's spatial grid
+    STATION_GRID_DEGREES = 1.0
+    # Background analysis jobs
+    ANALYSIS_WORKERS = 2
+    ANALYSIS_RESULT_LIMIT = 100
+    # Live sensor push stream (seconds / messages per client)
+    SENSOR_STREAM_INTERVAL = 5
+    SENSOR_STREAM_HEARTBEAT = 15
+    SENSOR_STREAM_QUEUE_SIZE = 32
+    # Streaming anomaly detection on live sensor readings
+    ANOMALY_ALPHA = 0.05
+    ANOMALY_Z_THRESHOLD = 4.0
+    ANOMALY_ROBUST_Z_THRESHOLD = 5.0
+    ANOMALY_RATE_THRESHOLD = 6.0
+    ANOMALY_WARMUP = 20
+    ANOMALY_ALERT_LIMIT = 1000
+    # Query API page sizes
+    QUERY_DEFAULT_PAGE_SIZE = 100
+    QUERY_MAX_PAGE_SIZE = 1000
+    # Rows serialized per chunk by the streaming export endpoints
+    EXPORT_CHUNK_ROWS = 50000
+    # Chart series downsampling (points per series)
+    SERIES_DEFAULT_POINTS = 500
+    SERIES_MAX_POINTS = 5000
+    # eDNA barcode matching: k-mer length and reads per search request
+    BARCODE_KMER_SIZE = 15
+    BARCODE_MAX_READS = 10000
+    # Abundance forecasts: default/max horizon in days and ridge penalty of the seasonal fits
+    FORECAST_HORIZON = 30
+    FORECAST_MAX_HORIZON = 365
+    FORECAST_RIDGE = 10.0
+    # Persistent memory-mapped store (disabled when unset)
+    DATA_STORE_PATH = os.environ.get('DATA_STORE_PATH')
+    # Pending parts per dataset that trigger an automatic compaction of the store
+    STORE_COMPACT_PARTS = 64
+    # Live sensor readings are persisted once this many rows or seconds have accumulated
+    SENSOR_STORE_FLUSH_ROWS = 500
+    SENSOR_STORE_FLUSH_SECONDS = 300
+    # Shared-memory snapshot namespace for multi-worker deployments (disabled when unset);
+    # readers wait up to SHARED_SNAPSHOT_WAIT seconds for a first publish, the producer
+    # checks its datasets for expiry every SHARED_SNAPSHOT_POLL seconds
+    SHARED_SNAPSHOTS = os.environ.get('SHARED_SNAPSHOTS')
+    SHARED_SNAPSHOT_WAIT = 30
+    SHARED_SNAPSHOT_POLL = 5
+    # External feeds, e.g. {'type': 'json', 'name': 'buoys', 'url': ..., 'dataset': 'ocean_data',
+    # 'watermark_field': 'date', 'watermark_type': 'datetime'|'numeric'|'string'};
+    # pulled every FEED_POLL_INTERVAL seconds when configured
+    FEED_SOURCES = []
+    FEED_POLL_INTERVAL = 300
+    INGESTION_WORKERS = 4
+    INGESTION_RETRIES = 3
+    INGESTION_BACKOFF = 0.5
+    INGESTION_TIMEOUT = 10
+    INGESTION_STATE_PATH = os.environ.get('INGESTION_STATE_PATH')
+    # Newest appended rows kept per dataset the store does not persist, re-merged into rebuilds
+    FEED_RETAINED_ROWS = 100000
+    # Serialized API response cache (entries) and smallest body worth pre-compressing (bytes)
+    RESPONSE_CACHE_SIZE = 256
+    RESPONSE_COMPRESS_MIN_BYTES = 512
+    # Sampling profiler for requests slower than PROFILE_SLOW_REQUEST_MS (disabled when unset);
+    # folded stacks are written to PROFILE_OUTPUT_DIR
+    PROFILE_SLOW_REQUEST_MS = float(os.environ['PROFILE_SLOW_REQUEST_MS']) if os.environ.get('PROFILE_SLOW_REQUEST_MS') else None
+    PROFILE_SAMPLE_INTERVAL = 0.005
+    PROFILE_OUTPUT_DIR = os.environ.get('PROFILE_OUTPUT_DIR', 'profiles')
@@ -0,0 +1,248 @@
+import math
+import threading
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from columnar import ColumnarDataset
+from spatial import StationRegistry
+
+# Ocean parameters correlated against catch abundance, with display labels
+OCEAN_PARAMETERS = {
+    'temperature': 'Temperature',
+    'salinity': 'Salinity',
+    'ph': 'pH Level',
+    'dissolved_oxygen': 'Dissolved Oxygen',
+    'chlorophyll': 'Chlorophyll',
+    'turbidity': 'Turbidity',
+    'wave_height': 'Wave Height',
+    'current_speed': 'Current Speed',
+}
+
+# Coastal fishing grounds mapped to the ocean basin whose sensors cover them; other
+# catch locations are joined to their nearest ocean station
+FISHING_GROUND_REGIONS = {
+    'Kerala Coast': 'Arabian Sea',
+    'Goa Coast': 'Arabian Sea',
+    'Tamil Nadu Coast': 'Bay of Bengal',
+}
+
+DEFAULT_LAGS = (0, 1, 3, 7)
+
+
+def _standardize(values: np.ndarray) -> np.ndarray:
+    """Center each column and scale it to unit norm (NaN for constant columns)"""
+    centered = values - values.mean(axis=0)
+    norms = np.sqrt((centered * centered).sum(axis=0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return centered / np.where(norms == 0, np.nan, norms)
+
+
+def pearson_matrix(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Pearson r between every column of x and every column of y in one matrix product"""
+    return np.clip(_standardize(x).T @ _standardize(y), -1.0, 1.0)
+
+
+def spearman_matrix(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Spearman rho: Pearson r on average ranks of each column"""
+    x_ranks = pd.DataFrame(x).rank(axis=0).to_numpy()
+    y_ranks = pd.DataFrame(y).rank(axis=0).to_numpy()
+    return pearson_matrix(x_ranks, y_ranks)
+
+
+try:
+    from scipy.special import erfc as _erfc
+except ImportError:  # optional: fall back to a rational approximation
+    _erfc = None
+
+# Chebyshev coefficients of erfc for x >= 0 (Numerical Recipes erfcc, fractional error < 1.2e-7)
+_ERFC_COEFFICIENTS = (-1.26551223, 1.00002368, 0.37409196, 0.09678418, -0.18628806,
+                      0.27886807, -1.13520398, 1.48851587, -0.82215223, 0.17087277)
+
+
+def erfc_nonnegative(x: np.ndarray) -> np.ndarray:
+    """Complementary error function of x >= 0 as a float64 array"""
+    x = np.asarray(x, dtype=float)
+    if _erfc is not None:
+        return _erfc(x)
+    t = 1.0 / (1.0 + 0.5 * x)
+    poly = np.zeros_like(x)
+    for coefficient in reversed(_ERFC_COEFFICIENTS[1:]):
+        poly = t * (coefficient + poly)
+    return t * np.exp(-x * x + _ERFC_COEFFICIENTS[0] + poly)
+
+
+def correlation_pvalues(r: np.ndarray, n: int) -> np.ndarray:
+    """Two-sided p-values for correlation coefficients (Fisher z approximation)"""
+    if n <= 3:
+        return np.full(r.shape, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.abs(np.arctanh(np.clip(r, -0.999999, 0.999999))) * math.sqrt(n - 3)
+    p = erfc_nonnegative(np.nan_to_num(z, nan=0.0) / math.sqrt(2))
+    p[np.isnan(r)] = np.nan
+    return p
+
+
+class CorrelationResult:
+    """Correlation matrices between ocean parameters and per-species abundance"""
+
+    def __init__(self, parameters: List[str], targets: List[str], pearson: np.ndarray,
+                 spearman: np.ndarray, p_values: np.ndarray, sample_size: int,
+                 lagged: Dict[int, np.ndarray], region_join: Optional[Dict[str, Dict]] = None):
+        self.parameters = parameters
+        self.targets = targets
+        self.pearson = pearson
+        self.spearman = spearman
+        self.p_values = p_values
+        self.sample_size = sample_size
+        self.lagged = lagged
+        self.region_join = region_join or {}
+        self.computed_at = datetime.now()
+
+    def best_lags(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Lag (days) with the largest |r| per pair, and the r at that lag"""
+        if not self.lagged:
+            return np.zeros(self.pearson.shape, dtype=int), self.pearson
+        lags = np.array(sorted(self.lagged))
+        stack = np.stack([self.lagged[lag] for lag in lags])
+        best = np.nanargmax(np.nan_to_num(np.abs(stack), nan=-1.0), axis=0)
+        return lags[best], np.take_along_axis(stack, best[None], axis=0)[0]
+
+    def count_strong(self, threshold: float = 0.7) -> int:
+        """Number of parameter/target pairs with |Pearson r| above threshold"""
+        return int((np.nan_to_num(np.abs(self.pearson)) > threshold).sum())
+
+    def top_pairs(self, limit: int) -> List[Dict]:
+        """Strongest parameter/target pairs by |Pearson r|"""
+        strength = np.nan_to_num(np.abs(self.pearson), nan=-1.0).ravel()
+        order = np.argsort(-strength, kind='stable')[:limit]
+        best_lag, best_r = self.best_lags()
+        pairs = []
+        for flat in order:
+            i, j = np.unravel_index(flat, self.pearson.shape)
+            if np.isnan(self.pearson[i, j]):
+                continue
+            pairs.append({
+                'parameter': self.parameters[i],
+                'target': self.targets[j],
+                'pearson': float(self.pearson[i, j]),
+                'spearman': float(self.spearman[i, j]),
+                'p_value': float(self.p_values[i, j]),
+                'best_lag_days': int(best_lag[i, j]),
+                'best_lag_correlation': float(best_r[i, j]),
+            })
+        return pairs
+
+    def to_dict(self) -> Dict:
+        def _matrix(values):
+            return [[None if np.isnan(v) else round(float(v), 4) for v in row] for row in values]
+        return {
+            'parameters': self.parameters,
+            'targets': self.targets,
+            'sample_size': self.sample_size,
+            'pearson': _matrix(self.pearson),
+            'spearman': _matrix(self.spearman),
+            'p_values': _matrix(self.p_values),
+            'lagged': {str(lag): _matrix(matrix) for lag, matrix in sorted(self.lagged.items())},
+            'region_join': self.region_join,
+        }
+
+
+class CorrelationEngine:
+    """Joins ocean and fisheries data on date and region and correlates them in batch.
+
+    Each catch location is compared against the ocean location configured in
+    region_map, or else the nearest ocean station within max_station_km.
+
+    Results are cached per (ocean, fisheries) snapshot, so repeated requests
+    against unchanged data reuse the same matrices.
+    """
+
+    def __init__(self, lags: Iterable[int] = DEFAULT_LAGS,
+                 region_map: Optional[Dict[str, str]] = None,
+                 parameters: Optional[Dict[str, str]] = None,
+                 max_station_km: Optional[float] = None):
+        self.lags = tuple(sorted(set(lags)))
+        self.region_map = dict(region_map or FISHING_GROUND_REGIONS)
+        self.parameters = dict(parameters or OCEAN_PARAMETERS)
+        self.max_station_km = max_station_km
+        self._lock = threading.Lock()
+        self._cached_inputs: Optional[Tuple[ColumnarDataset, ColumnarDataset]] = None
+        self._cached_result: Optional[CorrelationResult] = None
+
+    def compute(self, ocean: ColumnarDataset, fisheries: ColumnarDataset) -> CorrelationResult:
+        """Correlation result for this snapshot pair, computed at most once"""
+        with self._lock:
+            cached = self._cached_inputs
+            if cached is not None and cached[0] is ocean and cached[1] is fisheries:
+                return self._cached_result
+            result = self._compute(ocean, fisheries)
+            self._cached_inputs = (ocean, fisheries)
+            self._cached_result = result
+            return result
+
+    def _ocean_by_region_day(self, ocean: ColumnarDataset) -> pd.DataFrame:
+        columns = [name for name in self.parameters if name in ocean.columns]
+        frame = pd.DataFrame({name: ocean.column(name).astype(float) for name in columns})
+        frame['region'] = ocean.column('location')
+        frame['date'] = ocean.column('date')
+        return frame.groupby(['region', 'date']).mean()
+
+    def region_join(self, ocean: ColumnarDataset, fisheries: ColumnarDataset) -> Dict[str, Dict]:
+        """Ocean location each catch location is correlated against, and how it was chosen"""
+        locations = fisheries.categories('location')
+        nearest = StationRegistry.from_names(ocean.categories('location')).nearest_join(locations, self.max_station_km)
+        joined = {}
+        for name in locations:
+            if name in self.region_map:
+                joined[name] = {'region': self.region_map[name], 'method': 'configured'}
+            elif name in nearest:
+                region, distance = nearest[name]
+                joined[name] = {'region': region, 'method': 'nearest_station', 'distance_km': round(distance, 1)}
+        return joined
+
+    def _abundance_by_region_day(self, fisheries: ColumnarDataset, regions: Dict[str, str]) -> pd.DataFrame:
+        frame = pd.DataFrame({
+            'region': pd.Series(fisheries.column('location')).map(regions),
+            'date': fisheries.column('date'),
+            'species': fisheries.column('species'),
+            'abundance': fisheries.column('abundance').astype(float),
+        }).dropna(subset=['region'])
+        pivot = frame.pivot_table(index=['region', 'date'], columns='species',
+                                  values='abundance', aggfunc='sum', fill_value=0.0)
+        pivot = pivot.reindex(columns=fisheries.categories('species'), fill_value=0.0)
+        pivot['All Species'] = pivot.sum(axis=1)
+        return pivot
+
+    def _compute(self, ocean: ColumnarDataset, fisheries: ColumnarDataset) -> CorrelationResult:
+        join = self.region_join(ocean, fisheries)
+        ocean_frame = self._ocean_by_region_day(ocean)
+        catch_frame = self._abundance_by_region_day(fisheries, {name: entry['region'] for name, entry in join.items()})
+        parameters = [self.parameters[name] for name in ocean_frame.columns]
+        targets = [f"{species} Abundance" for species in catch_frame.columns]
+
+        joined = ocean_frame.join(catch_frame, how='inner')
+        x = joined[ocean_frame.columns].to_numpy()
+        y = joined[catch_frame.columns].to_numpy()
+        n = len(joined)
+        if n < 3:
+            empty = np.full((len(parameters), len(targets)), np.nan)
+            return CorrelationResult(parameters, targets, empty, empty, empty, n, {}, join)
+
+        pearson = pearson_matrix(x, y)
+        spearman = spearman_matrix(x, y)
+        p_values = correlation_pvalues(pearson, n)
+
+        # Lagged cross-correlation: ocean conditions on day t vs catches on day t + lag
+        regions = ocean_frame.index.get_level_values('region')
+        dates = ocean_frame.index.get_level_values('date')
+        lagged = {}
+        for lag in self.lags:
+            shifted_index = pd.MultiIndex.from_arrays([regions, dates + pd.Timedelta(days=lag)])
+            future = catch_frame.reindex(shifted_index).to_numpy()
+            valid = ~np.isnan(future).any(axis=1)
+            if valid.sum() < 3:
+                continue
+            lagged[lag] = pearson_matrix(ocean_frame.to_numpy()[valid], future[valid])
+
+        return CorrelationResult(parameters, targets, pearson, spearman, p_values, n, lagged, join)
@@ -1,6 +1,5 @@
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
 
 def generate_oceanographic_data():
     """Generate dummy oceanographic data"""
@@ -18,59 +17,58 @@ def generate_oceanographic_data():
     
     return pd.DataFrame(data)
 
-def generate_fisheries_data():
+def generate_fisheries_data(n=1000):
     """Generate dummy fisheries data"""
     species = ['Tuna', 'Mackerel', 'Sardine', 'Pomfret', 'Shark', 'Crab', 'Lobster']
     locations = ['Kerala Coast', 'Tamil Nadu Coast', 'Goa Coast', 'Gujarat Coast']
     
-    data = []
-    for _ in range(1000):
-        data.append({
-            'species': np.random.choice(species),
-            'abundance': np.random.randint(10, 500),
-            'length_cm': np.random.uniform(10, 150),
-            'weight_kg': np.random.uniform(0.5, 50),
-            'location': np.random.choice(locations),
-            'date': datetime(2023, np.random.randint(1, 13), np.random.randint(1, 28)),
-            'depth_m': np.random.randint(10, 200)
-        })
+    data = {
+        'species': np.random.choice(species, n),
+        'abundance': np.random.randint(10, 500, n),
+        'length_cm': np.random.uniform(10, 150, n),
+        'weight_kg': np.random.uniform(0.5, 50, n),
+        'location': np.random.choice(locations, n),
+        'date': _random_dates_2023(n),
+        'depth_m': np.random.randint(10, 200, n)
+    }
     
     return pd.DataFrame(data)
 
-def generate_molecular_data():
+def generate_molecular_data(n=500):
     """Generate dummy molecular biology data"""
     species = ['Thunnus albacares', 'Rastrelliger kanagurta', 'Sardinella longiceps', 
                'Pampus argenteus', 'Carcharhinus limbatus', 'Portunus pelagicus']
     
-    data = []
-    for _ in range(500):
-        data.append({
-            'species': np.random.choice(species),
-            'genetic_marker': np.random.choice(['COI', '16S rRNA', '12S rRNA', 'cytb']),
-            'sequence_length': np.random.randint(500, 1500),
-            'barcode_status': np.random.choice(['Valid', 'Pending', 'Verified']),
-            'location': f"Station_{np.random.randint(1, 20)}",
-            'collection_date': datetime(2023, np.random.randint(1, 13), np.random.randint(1, 28)),
-            'edna_concentration': np.random.uniform(0.1, 5.0)
-        })
+    data = {
+        'species': np.random.choice(species, n),
+        'genetic_marker': np.random.choice(['COI', '16S rRNA', '12S rRNA', 'cytb'], n),
+        'sequence_length': np.random.randint(500, 1500, n),
+        'barcode_status': np.random.choice(['Valid', 'Pending', 'Verified'], n),
+        'location': np.char.add('Station_', np.random.randint(1, 20, n).astype(str)),
+        'collection_date': _random_dates_2023(n),
+        'edna_concentration': np.random.uniform(0.1, 5.0, n)
+    }
     
     return pd.DataFrame(data)
 
-def generate_otolith_data():
+def generate_otolith_data(n=200):
     """Generate dummy otolith morphology data"""
     species = ['Tuna', 'Mackerel', 'Sardine', 'Pomfret']
     
-    data = []
-    for _ in range(200):
-        species_choice = np.random.choice(species)
-        data.append({
-            'species': species_choice,
-            'otolith_length_mm': np.random.uniform(2, 15),
-            'otolith_width_mm': np.random.uniform(1, 8),
-            'shape_factor': np.random.uniform(1.2, 2.5),
-            'age_years': np.random.randint(1, 10),
-            'location': np.random.choice(['Arabian Sea', 'Bay of Bengal']),
-            'image_id': f"OT_{np.random.randint(1000, 9999)}"
-        })
+    data = {
+        'species': np.random.choice(species, n),
+        'otolith_length_mm': np.random.uniform(2, 15, n),
+        'otolith_width_mm': np.random.uniform(1, 8, n),
+        'shape_factor': np.random.uniform(1.2, 2.5, n),
+        'age_years': np.random.randint(1, 10, n),
+        'location': np.random.choice(['Arabian Sea', 'Bay of Bengal'], n),
+        'image_id': np.char.add('OT_', np.random.randint(1000, 9999, n).astype(str))
+    }
     
-    return pd.DataFrame(data)
\ No newline at end of file
+    return pd.DataFrame(data)
+
+def _random_dates_2023(n):
+    """Random 2023 dates with day-of-month 1-27, as datetime64"""
+    months = np.random.randint(1, 13, n)
+    days = np.random.randint(1, 28, n)
+    return pd.to_datetime({'year': np.full(n, 2023), 'month': months, 'day': days})
@@ -0,0 +1,310 @@
+import argparse
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from columnar import ColumnarDataset
+
+OCEAN_LOCATIONS = ['Arabian Sea', 'Bay of Bengal', 'Indian Ocean']
+COASTAL_LOCATIONS = ['Kerala Coast', 'Tamil Nadu Coast', 'Goa Coast']
+
+# Representative (lat, lon) of each named location: basin sensor arrays and coastal landing grounds
+LOCATION_COORDINATES = {
+    'Arabian Sea': (15.0, 66.0),
+    'Bay of Bengal': (15.0, 88.0),
+    'Indian Ocean': (-5.0, 78.0),
+    'Kerala Coast': (9.9, 76.0),
+    'Tamil Nadu Coast': (11.0, 80.3),
+    'Goa Coast': (15.4, 73.7),
+}
+# Station_<n> sampling sites are scattered over the Indian EEZ, fixed independent of the generator seed
+STATION_SEED = 20240102
+STATION_BOUNDS = {'lat': (6.0, 22.0), 'lon': (68.0, 90.0)}
+MAX_STATION_NUMBER = 1_000_000
+
+# Species-specific seasonal abundance patterns
+SPECIES_PATTERNS = {
+    'Yellowfin Tuna': {'base_abundance': 150, 'season_peak': 180, 'month_offset': 2},
+    'Indian Mackerel': {'base_abundance': 200, 'season_peak': 280, 'month_offset': 0},
+    'Oil Sardine': {'base_abundance': 180, 'season_peak': 250, 'month_offset': 1},
+    'Pomfret': {'base_abundance': 80, 'season_peak': 120, 'month_offset': 3},
+    'Tiger Shark': {'base_abundance': 40, 'season_peak': 60, 'month_offset': 6},
+    'Blue Crab': {'base_abundance': 120, 'season_peak': 180, 'month_offset': 4},
+    'Spiny Lobster': {'base_abundance': 90, 'season_peak': 140, 'month_offset': 5}
+}
+
+SCIENTIFIC_NAMES = {
+    'Yellowfin Tuna': 'Thunnus albacares',
+    'Indian Mackerel': 'Rastrelliger kanagurta',
+    'Oil Sardine': 'Sardinella longiceps',
+    'Pomfret': 'Pampus argenteus',
+    'Tiger Shark': 'Galeocerdo cuvier',
+    'Blue Crab': 'Portunus pelagicus',
+    'Spiny Lobster': 'Panulirus homarus'
+}
+
+# Typical length (cm) and weight (kg) per species
+SPECIES_LENGTHS = {
+    'Yellowfin Tuna': 150, 'Indian Mackerel': 35, 'Oil Sardine': 20,
+    'Pomfret': 45, 'Tiger Shark': 400, 'Blue Crab': 18, 'Spiny Lobster': 30
+}
+SPECIES_WEIGHTS = {
+    'Yellowfin Tuna': 60, 'Indian Mackerel': 0.5, 'Oil Sardine': 0.2,
+    'Pomfret': 1.5, 'Tiger Shark': 500, 'Blue Crab': 0.4, 'Spiny Lobster': 1.2
+}
+
+GENETIC_MARKERS = ['COI', '16S rRNA', '12S rRNA', 'cytb', '18S rRNA']
+# Typical barcode region length (bp) per marker
+MARKER_LENGTHS = {'COI': 658, '16S rRNA': 560, '12S rRNA': 400, 'cytb': 1140, '18S rRNA': 1800}
+# Reference barcodes are fixed, independent of the generator seed
+REFERENCE_SEED = 20240101
+BARCODE_STATUSES = ['Valid', 'Pending', 'Verified', 'Under Review']
+
+_STREAMS = {'ocean': 0, 'fisheries': 1, 'molecular': 2}
+_BASES = np.frombuffer(b'ACGT', dtype=np.uint8)
+
+
+def _reference_codes() -> List[np.ndarray]:
+    rng = np.random.default_rng(REFERENCE_SEED)
+    return [rng.integers(0, 4, MARKER_LENGTHS[marker], dtype=np.uint8)
+            for _ in SPECIES_PATTERNS for marker in GENETIC_MARKERS]
+
+
+def reference_barcodes() -> List[Dict]:
+    """One reference barcode per (species, genetic marker), species-major order"""
+    codes = _reference_codes()
+    pairs = [(species, marker) for species in SPECIES_PATTERNS for marker in GENETIC_MARKERS]
+    return [{'species': species, 'marker': marker, 'scientific_name': SCIENTIFIC_NAMES[species],
+             'sequence': _BASES[values].tobytes().decode()}
+            for (species, marker), values in zip(pairs, codes)]
+
+
+def station_coordinates(names: Sequence[str]):
+    """(lat, lon) arrays for location names; NaN where a name has no known position.
+
+    Station_<n> positions come from one fixed stream indexed by n, so a
+    station keeps its position whichever other stations exist.
+    """
+    lat = np.full(len(names), np.nan)
+    lon = np.full(len(names), np.nan)
+    numbers = np.zeros(len(names), dtype=np.int64)
+    for i, name in enumerate(names):
+        if name in LOCATION_COORDINATES:
+            lat[i], lon[i] = LOCATION_COORDINATES[name]
+        elif name.startswith('Station_') and name[len('Station_'):].isdigit():
+            number = int(name[len('Station_'):])
+            if 0 < number <= MAX_STATION_NUMBER:
+                numbers[i] = number
+    stations = numbers > 0
+    if stations.any():
+        draws = np.random.default_rng(STATION_SEED).random((int(numbers.max()), 2))[numbers[stations] - 1]
+        (lat_lo, lat_hi), (lon_lo, lon_hi) = STATION_BOUNDS['lat'], STATION_BOUNDS['lon']
+        lat[stations] = np.round(lat_lo + draws[:, 0] * (lat_hi - lat_lo), 4)
+        lon[stations] = np.round(lon_lo + draws[:, 1] * (lon_hi - lon_lo), 4)
+    return lat, lon
+
+
+def _categorical(codes: np.ndarray, categories: Sequence[str]) -> pd.Categorical:
+    dtype = np.int16 if len(categories) <= np.iinfo(np.int16).max else np.int32
+    return pd.Categorical.from_codes(codes.astype(dtype), categories=list(categories))
+
+
+class SyntheticGenerator:
+    """NumPy-vectorized generator for ocean, fisheries and molecular datasets.
+
+    Produces the same distributions as the original per-record generators
+    (sin-based seasonal temperature, SPECIES_PATTERNS abundance) a whole
+    column at a time. With a seed, every chunk is drawn from its own
+    deterministic stream, so output is reproducible for the same arguments.
+    """
+
+    def __init__(self, seed: Optional[int] = None, end_date: Optional[datetime] = None):
+        self.seed = seed
+        self.end_date = np.datetime64(end_date or datetime.now(), 'D')
+
+    def _rng(self, kind: str, chunk: int) -> np.random.Generator:
+        if self.seed is None:
+            return np.random.default_rng()
+        return np.random.default_rng([self.seed, _STREAMS[kind], chunk])
+
+    def ocean(self, days: int = 30, locations: Sequence[str] = OCEAN_LOCATIONS,
+              first_day: int = 0, chunk: int = 0) -> ColumnarDataset:
+        """One row per (day, location), newest day first, for days_back in [first_day, first_day + days)"""
+        rng = self._rng('ocean', chunk)
+        n_locations = len(locations)
+        days_back = np.repeat(np.arange(first_day, first_day + days), n_locations)
+        n = len(days_back)
+        dates = self.end_date - days_back.astype('timedelta64[D]')
+        day_of_year = (dates - dates.astype('datetime64[Y]')).astype(int) + 1
+        temp_variation = np.sin(day_of_year * 2 * np.pi / 365) * 2
+
+        return ColumnarDataset({
+            'date': dates,
+            'location': _categorical(np.tile(np.arange(n_locations), days), locations),
+            'temperature': np.round(28.5 + temp_variation + rng.uniform(-1, 1, n), 1),
+            'salinity': np.round(35.0 + rng.uniform(-0.5, 0.5, n), 1),
+            'ph': np.round(8.1 + rng.uniform(-0.1, 0.1, n), 2),
+            'dissolved_oxygen': np.round(6.2 + rng.uniform(-0.5, 0.5, n), 1),
+            'chlorophyll': np.round(1.2 + rng.uniform(-0.3, 0.3, n), 2),
+            'turbidity': np.round(3.5 + rng.uniform(-1, 1, n), 1),
+            'wave_height': np.round(1.5 + rng.uniform(-0.5, 0.5, n), 1),
+            'current_speed': np.round(0.8 + rng.uniform(-0.3, 0.3, n), 1),
+        }, categorical=['location'], dates=['date'])
+
+    def fisheries(self, days: int = 90, records_per_day: int = 1,
+                  locations: Sequence[str] = COASTAL_LOCATIONS,
+                  first_day: int = 0, chunk: int = 0) -> ColumnarDataset:
+        """records_per_day catch records per species per day, newest day first"""
+        rng = self._rng('fisheries', chunk)
+        species = list(SPECIES_PATTERNS)
+        per_day = len(species) * records_per_day
+        days_back = np.repeat(np.arange(first_day, first_day + days), per_day)
+        n = len(days_back)
+        species_codes = np.tile(np.repeat(np.arange(len(species)), records_per_day), days)
+        dates = self.end_date - days_back.astype('timedelta64[D]')
+        months = dates.astype('datetime64[M]').astype(int) % 12 + 1
+
+        base = np.array([SPECIES_PATTERNS[s]['base_abundance'] for s in species], dtype=float)[species_codes]
+        peak = np.array([SPECIES_PATTERNS[s]['season_peak'] for s in species], dtype=float)[species_codes]
+        offset = np.array([SPECIES_PATTERNS[s]['month_offset'] for s in species])[species_codes]
+        seasonal_factor = 1 - np.abs(months - offset) / 6.0
+        abundance = np.trunc(base + (peak - base) * seasonal_factor * rng.uniform(0.8, 1.2, n)).astype(np.int64)
+        abundance = np.maximum(10, abundance + rng.integers(-20, 21, n))
+
+        lengths = np.array([SPECIES_LENGTHS[s] for s in species], dtype=float)[species_codes]
+        weights = np.array([SPECIES_WEIGHTS[s] for s in species], dtype=float)[species_codes]
+        return ColumnarDataset({
+            'species': _categorical(species_codes, species),
+            'scientific_name': _categorical(species_codes, [SCIENTIFIC_NAMES[s] for s in species]),
+            'abundance': abundance,
+            'length_cm': np.round(lengths * rng.uniform(0.8, 1.2, n), 1),
+            'weight_kg': np.round(weights * rng.uniform(0.7, 1.3, n), 1),
+            'location': _categorical(rng.integers(0, len(locations), n), locations),
+            'date': dates,
+            'depth_m': rng.integers(10, 201, n),
+            'water_temp': np.round(28.5 + rng.uniform(-2, 2, n), 1),
+        }, categorical=['species', 'scientific_name', 'location'], dates=['date'])
+
+    def molecular(self, samples: int = 200, stations: int = 25, chunk: int = 0,
+                  sequences: bool = True, error_rate: float = 0.02) -> ColumnarDataset:
+        """eDNA sample records collected over the last year.
+
+        With sequences, each sample carries a read cut from its species'
+        reference barcode for its marker, with up to error_rate substitutions.
+        """
+        rng = self._rng('molecular', chunk)
+        species = list(SPECIES_PATTERNS)
+        species_codes = rng.integers(0, len(species), samples)
+        marker_codes = rng.integers(0, len(GENETIC_MARKERS), samples)
+        station_names = [f"Station_{i}" for i in range(1, stations + 1)]
+        sequence_length = rng.integers(500, 2001, samples)
+        columns = {
+            'sample_id': np.char.add('MLRE', rng.integers(10000, 100000, samples).astype(str)),
+            'species': _categorical(species_codes, species),
+            'scientific_name': _categorical(species_codes, [SCIENTIFIC_NAMES[s] for s in species]),
+            'genetic_marker': _categorical(marker_codes, GENETIC_MARKERS),
+            'sequence_length': sequence_length,
+            'barcode_status': _categorical(rng.integers(0, len(BARCODE_STATUSES), samples), BARCODE_STATUSES),
+            'edna_concentration': np.round(rng.uniform(0.5, 8.0, samples), 2),
+            'collection_date': self.end_date - rng.integers(1, 366, samples).astype('timedelta64[D]'),
+            'location': _categorical(rng.integers(0, stations, samples), station_names),
+            'confidence': np.round(rng.uniform(0.88, 0.99, samples), 2),
+            'reads_count': rng.integers(10000, 500001, samples),
+        }
+        if sequences:
+            columns['sequence'], columns['sequence_length'] = self._reads(
+                rng, species_codes * len(GENETIC_MARKERS) + marker_codes, sequence_length, error_rate)
+        return ColumnarDataset(columns, categorical=['species', 'scientific_name', 'genetic_marker',
+                                                     'barcode_status', 'location'],
+                               dates=['collection_date'])
+
+    @staticmethod
+    def _reads(rng: np.random.Generator, reference_ids: np.ndarray, lengths: np.ndarray, error_rate: float):
+        """Reads cut from the given references at random offsets, with random substitutions.
+
+        Each read draws its substitution count (binomial at its own rate) and
+        positions, so the work per base is a byte copy rather than a random draw.
+        """
+        references = _reference_codes()
+        buffer = _BASES[np.concatenate(references)]
+        ref_lengths = np.array([len(ref) for ref in references])
+        ref_offsets = np.concatenate([[0], np.cumsum(ref_lengths)[:-1]])
+        lengths = np.minimum(lengths, ref_lengths[reference_ids])
+        starts = ref_offsets[reference_ids] + (rng.random(len(lengths)) * (ref_lengths[reference_ids] - lengths + 1)).astype(int)
+        bounds = np.concatenate([[0], np.cumsum(lengths)])
+        pieces = [buffer[start:start + length] for start, length in zip(starts.tolist(), lengths.tolist())]
+        data = np.concatenate(pieces) if pieces else buffer[:0].copy()
+        counts = rng.binomial(lengths, rng.uniform(0, error_rate, len(lengths)))
+        at = np.repeat(bounds[:-1], counts) + (rng.random(counts.sum()) * np.repeat(lengths, counts)).astype(np.int64)
+        codes = np.searchsorted(_BASES, data[at])
+        data[at] = _BASES[(codes + rng.integers(1, 4, len(at))) % 4]
+        text = data.tobytes().decode('ascii')
+        offsets = bounds.tolist()
+        reads = np.empty(len(lengths), dtype=object)
+        reads[:] = [text[begin:end] for begin, end in zip(offsets[:-1], offsets[1:])]
+        return reads, lengths
+
+    def iter_chunks(self, kind: str, total_rows: int, chunk_rows: int = 1_000_000,
+                    **options) -> Iterator[ColumnarDataset]:
+        """Yield about total_rows rows of one dataset in chunks of about chunk_rows.
+
+        Bulk molecular chunks skip read sequences unless sequences=True is passed.
+        """
+        if kind == 'molecular':
+            options.setdefault('sequences', False)
+            for chunk, start in enumerate(range(0, total_rows, chunk_rows)):
+                yield self.molecular(min(chunk_rows, total_rows - start), chunk=chunk, **options)
+            return
+        if kind == 'ocean':
+            rows_per_day = len(options.get('locations', OCEAN_LOCATIONS))
+            make = self.ocean
+        elif kind == 'fisheries':
+            rows_per_day = len(SPECIES_PATTERNS) * options.get('records_per_day', 1)
+            make = self.fisheries
+        else:
+            raise ValueError(f"Unknown dataset kind '{kind}'")
+        total_days = -(-total_rows // rows_per_day)
+        days_per_chunk = max(1, chunk_rows // rows_per_day)
+        for chunk, first_day in enumerate(range(0, total_days, days_per_chunk)):
+            yield make(days=min(days_per_chunk, total_days - first_day), first_day=first_day,
+                       chunk=chunk, **options)
+
+    def write_to_store(self, store, kind: str, total_rows: int, chunk_rows: int = 1_000_000,
+                       **options) -> int:
+        """Stream generated chunks into a TimeSeriesStore; returns rows written"""
+        dataset_key = {'ocean': 'ocean_data', 'fisheries': 'fisheries_data', 'molecular': 'molecular_data'}[kind]
+        partition_field = 'collection_date' if kind == 'molecular' else 'date'
+        written = 0
+        for chunk in self.iter_chunks(kind, total_rows, chunk_rows, **options):
+            store.append(dataset_key, chunk, partition_field)
+            written += len(chunk)
+        return written
+
+
+if __name__ == '__main__':
+    # Run from the repository root: python -m data.synthetic <store> --kind ocean --rows 10000000
+    from storage import TimeSeriesStore
+
+    parser = argparse.ArgumentParser(description='Generate synthetic load-test data into a TimeSeriesStore')
+    parser.add_argument('store', help='store root directory')
+    parser.add_argument('--kind', choices=sorted(_STREAMS), default='ocean')
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--chunk-rows', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--stations', type=int, default=None,
+                        help='ocean: number of stations (default: the three basins)')
+    parser.add_argument('--records-per-day', type=int, default=1, help='fisheries: records per species per day')
+    parser.add_argument('--sequences', action='store_true', help='molecular: include read sequences')
+    args = parser.parse_args()
+
+    options = {}
+    if args.kind == 'ocean' and args.stations:
+        options['locations'] = [f"Station_{i}" for i in range(1, args.stations + 1)]
+    if args.kind == 'fisheries':
+        options['records_per_day'] = args.records_per_day
+    if args.kind == 'molecular':
+        options['sequences'] = args.sequences
+    generator = SyntheticGenerator(seed=args.seed)
+    rows = generator.write_to_store(TimeSeriesStore(args.store), args.kind, args.rows, args.chunk_rows, **options)
+    print(f"Wrote {rows} {args.kind} rows to {args.store}")
@@ -0,0 +1,173 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+
+class _CacheEntry:
+    __slots__ = ('value', 'loaded_at', 'ttl', 'version')
+
+    def __init__(self, value: Any, loaded_at: float, ttl: float, version: int):
+        self.value = value
+        self.loaded_at = loaded_at
+        self.ttl = ttl
+        self.version = version
+
+    def is_fresh(self, now: float) -> bool:
+        return now - self.loaded_at < self.ttl
+
+
+class DatasetCache:
+    """Thread-safe per-key TTL cache with single-flight, stale-while-revalidate refresh.
+
+    A missing key blocks concurrent callers until the first loader finishes.
+    An expired key is rebuilt by exactly one caller while the others keep
+    getting the previous snapshot.
+    """
+
+    def __init__(self, default_ttl: float, max_size: int = 1000,
+                 ttls: Optional[Dict[str, float]] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 listener: Optional[Callable[[str, str], None]] = None):
+        self.default_ttl = default_ttl
+        self.max_size = max_size
+        self.ttls = dict(ttls or {})
+        self._clock = clock
+        self._listener = listener
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._versions: Dict[str, int] = {}
+        self._modified: Dict[str, float] = {}
+        self._stats = {'hits': 0, 'misses': 0, 'stale_hits': 0,
+                       'refreshes': 0, 'errors': 0, 'evictions': 0}
+
+    def _count(self, event: str, key: str):
+        # Called with self._lock held; the listener must not call back into the cache
+        self._stats[event] += 1
+        if self._listener is not None:
+            self._listener(event, key)
+
+    def ttl_for(self, key: str) -> float:
+        return self.ttls.get(key, self.default_ttl)
+
+    def get(self, key: str, loader: Callable[[], Any]) -> Any:
+        """Return the cached value for key, loading or refreshing it as needed"""
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if entry.is_fresh(now):
+                    self._count('hits', key)
+                    return entry.value
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        if entry is not None:
+            # Stale: one caller refreshes, everyone else serves the old snapshot
+            if not key_lock.acquire(blocking=False):
+                with self._lock:
+                    self._count('stale_hits', key)
+                return entry.value
+            try:
+                with self._lock:
+                    current = self._entries.get(key)
+                    if current is not None and current.is_fresh(self._clock()):
+                        self._count('hits', key)
+                        return current.value
+                return self._refresh(key, loader, stale=entry)
+            finally:
+                key_lock.release()
+
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry.is_fresh(self._clock()):
+                    # Another caller loaded it while we were waiting
+                    self._count('hits', key)
+                    return entry.value
+                self._count('misses', key)
+            return self._refresh(key, loader, stale=None)
+
+    def get_versioned(self, key: str, loader: Callable[[], Any]):
+        """Like get, but also return the version of the snapshot handed out"""
+        while True:
+            value = self.get(key, loader)
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry.value is value:
+                    return value, entry.version
+            # Replaced between the read and the version lookup; read again
+
+    def _refresh(self, key: str, loader: Callable[[], Any],
+                 stale: Optional[_CacheEntry]) -> Any:
+        with self._lock:
+            started = self._versions.get(key, 0)
+        try:
+            value = loader()
+        except Exception:
+            with self._lock:
+                self._count('errors', key)
+            if stale is not None:
+                return stale.value
+            raise
+        return self._store(key, value, expected=started)
+
+    def put(self, key: str, value: Any):
+        """Replace the snapshot for key (e.g. after appending records) and reset its TTL"""
+        self._store(key, value)
+
+    def _store(self, key: str, value: Any, expected: Optional[int] = None) -> Any:
+        """Store value as the next version of key and return it.
+
+        With expected, a snapshot put while the value was loading (e.g. one
+        with appended records) wins: it is returned and value is dropped.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if expected is not None and entry is not None and self._versions.get(key, 0) != expected:
+                return entry.value
+            version = self._versions.get(key, 0) + 1
+            self._versions[key] = version
+            self._modified[key] = time.time()
+            self._entries[key] = _CacheEntry(value, self._clock(), self.ttl_for(key), version)
+            self._entries.move_to_end(key)
+            self._count('refreshes', key)
+            while len(self._entries) > self.max_size:
+                evicted, _ = self._entries.popitem(last=False)
+                self._count('evictions', evicted)
+            return value
+
+    def peek(self, key: str) -> Any:
+        """Return the cached value without loading, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.value if entry is not None else None
+
+    def version(self, key: str) -> int:
+        """Monotonic version of the snapshot currently cached under key"""
+        with self._lock:
+            return self._versions.get(key, 0)
+
+    def last_modified(self, key: str) -> Optional[float]:
+        """Wall-clock time (epoch seconds) the current version was stored, or None"""
+        with self._lock:
+            return self._modified.get(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = self._clock()
+            return {
+                **self._stats,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'entries': {
+                    key: {
+                        'version': entry.version,
+                        'age_seconds': round(now - entry.loaded_at, 1),
+                        'ttl_seconds': entry.ttl,
+                        'fresh': entry.is_fresh(now),
+                    }
+                    for key, entry in self._entries.items()
+                },
+            }
@@ -1,135 +1,440 @@
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
 import random
-import requests
 from typing import List, Dict, Any
 import json
+import logging
+import time
+import atexit
+from config import Config
+from data_cache import DatasetCache
+from columnar import ColumnarDataset
+from correlation_engine import CorrelationEngine, CorrelationResult, OCEAN_PARAMETERS
+from aggregates import FisheriesAggregates
+from forecasting import SeasonalForecaster
+from query import DatasetIndex
+from series import SeriesRollups
+from anomaly import AnomalyDetector
+from kmer_index import KmerIndex
+from spatial import StationRegistry
+from storage import TimeSeriesStore
+from shared_snapshots import SharedSnapshots
+import metrics
+import threading
+from functools import partial
+from data.synthetic import (SyntheticGenerator, SCIENTIFIC_NAMES, SPECIES_LENGTHS, SPECIES_WEIGHTS,
+                            OCEAN_LOCATIONS, COASTAL_LOCATIONS, reference_barcodes)
+from data.dummy_data import generate_otolith_data
+
+logger = logging.getLogger(__name__)
+
+# Column encodings for each cached dataset
+DATASET_SCHEMAS = {
+    'ocean_data': {'categorical': ['location'], 'dates': ['date']},
+    'fisheries_data': {'categorical': ['species', 'scientific_name', 'location'], 'dates': ['date']},
+    'molecular_data': {'categorical': ['species', 'scientific_name', 'genetic_marker',
+                                       'barcode_status', 'location'],
+                       'dates': ['collection_date']},
+    'sensor_data': {'categorical': ['sensor_id', 'location', 'signal_strength'], 'dates': []},
+    'otolith_data': {'categorical': ['species', 'location'], 'dates': []},
+}
+
+# Field each dataset is partitioned by in the on-disk store
+PARTITION_FIELDS = {
+    'ocean_data': 'date',
+    'fisheries_data': 'date',
+    'molecular_data': 'collection_date',
+    'sensor_data': 'timestamp',
+}
+
+# Secondary indexes built per snapshot for the query API
+DATASET_INDEXES = {
+    'ocean_data': {'keys': ['location'], 'date_field': 'date'},
+    'fisheries_data': {'keys': ['species', 'location'], 'date_field': 'date'},
+    'molecular_data': {'keys': ['species', 'genetic_marker', 'location'], 'date_field': 'collection_date'},
+    'otolith_data': {'keys': ['species', 'location'], 'date_field': None},
+}
+
+# Chart series: one line per group value, multi-resolution rollups per snapshot
+SERIES_DATASETS = {
+    'ocean_data': {'group': 'location', 'time_field': 'date', 'fields': list(OCEAN_PARAMETERS)},
+    'fisheries_data': {'group': 'species', 'time_field': 'date',
+                       'fields': ['abundance', 'length_cm', 'weight_kg', 'depth_m', 'water_temp']},
+}
 
 class RealTimeDataIngestion:
-    def __init__(self):
-        self.last_update = datetime.now()
-        self.cache_duration = timedelta(minutes=5)
-        self.data_cache = {}
+    def __init__(self, config=Config):
+        # Each dataset expires on its own TTL; expired entries are rebuilt by one
+        # caller while concurrent requests keep serving the previous snapshot
+        self.data_cache = DatasetCache(default_ttl=config.DATA_REFRESH_INTERVAL,
+                                       max_size=config.MAX_CACHE_SIZE,
+                                       ttls=getattr(config, 'DATASET_TTLS', None),
+                                       listener=metrics.cache_event)
+        self.correlation_engine = CorrelationEngine(lags=getattr(config, 'CORRELATION_LAGS', (0, 1, 3, 7)),
+                                                    max_station_km=getattr(config, 'CORRELATION_MAX_STATION_KM', None))
+        self.fisheries_aggregates = FisheriesAggregates()
+        self.forecaster = SeasonalForecaster(ridge=getattr(config, 'FORECAST_RIDGE', 10.0))
+        self._last_correlation = None
+        self.anomaly_detector = AnomalyDetector(alpha=getattr(config, 'ANOMALY_ALPHA', 0.05),
+                                                z_threshold=getattr(config, 'ANOMALY_Z_THRESHOLD', 4.0),
+                                                robust_threshold=getattr(config, 'ANOMALY_ROBUST_Z_THRESHOLD', 5.0),
+                                                rate_threshold=getattr(config, 'ANOMALY_RATE_THRESHOLD', 6.0),
+                                                warmup=getattr(config, 'ANOMALY_WARMUP', 20),
+                                                max_alerts=getattr(config, 'ANOMALY_ALERT_LIMIT', 1000))
+        self._append_lock = threading.RLock()  # re-entered when an append loads its dataset
+        # Appended records of datasets the store does not keep, merged into every rebuilt
+        # snapshot; only the newest retained_rows per dataset are kept
+        self._appended: Dict[str, ColumnarDataset] = {}
+        self._retained_rows = getattr(config, 'FEED_RETAINED_ROWS', 100000)
+        self._indexes = {}
+        self._index_lock = threading.Lock()
+        self._series = {}
+        self._barcode_k = getattr(config, 'BARCODE_KMER_SIZE', 15)
+        self._barcode_index = None
+        self._sample_rows = None
+        self._station_grid = getattr(config, 'STATION_GRID_DEGREES', 1.0)
+        self._stations = {}  # dataset key (None: all datasets) -> (snapshots, registry)
+        self._series_lock = threading.Lock()
+        self._builders = {
+            'ocean_data': self._build_oceanographic_data,
+            'fisheries_data': self._build_fisheries_data,
+            'molecular_data': self._build_molecular_data,
+            'otolith_data': self._build_otolith_data,
+        }
+        # Optional shared-memory snapshots: one producer process builds and publishes
+        # each dataset, every other worker maps the published copy read-only
+        shared_namespace = getattr(config, 'SHARED_SNAPSHOTS', None)
+        self.shared = SharedSnapshots(shared_namespace) if shared_namespace else None
+        self._shared_wait = getattr(config, 'SHARED_SNAPSHOT_WAIT', 30)
+        self._shared_poll = getattr(config, 'SHARED_SNAPSHOT_POLL', 5)
+        self._producer_thread = None
+        self._producer_callbacks = []
+        self._producer_lock = threading.Lock()
+        loader = self._load_or_build if self.shared is None else self._load_shared
+        self._loaders = {key: partial(loader, key) for key in self._builders}
+        
+        # Optional on-disk store shared by all workers; data survives restarts
+        store_path = getattr(config, 'DATA_STORE_PATH', None)
+        self.store = (TimeSeriesStore(store_path, compact_parts=getattr(config, 'STORE_COMPACT_PARTS', 64))
+                      if store_path else None)
+        # Live sensor ticks are buffered and persisted in batches rather than one part per tick
+        self._sensor_buffer = []
+        self._sensor_buffer_since = None
+        self._sensor_flush_rows = getattr(config, 'SENSOR_STORE_FLUSH_ROWS', 500)
+        self._sensor_flush_seconds = getattr(config, 'SENSOR_STORE_FLUSH_SECONDS', 300)
+        self._sensor_lock = threading.Lock()
+        if self.store is not None:
+            atexit.register(self.flush_sensor_data)
         
         # Real data simulation parameters
-        self.sensor_locations = ['Arabian Sea', 'Bay of Bengal', 'Indian Ocean', 
-                                'Kerala Coast', 'Tamil Nadu Coast', 'Goa Coast']
+        self.sensor_locations = OCEAN_LOCATIONS + COASTAL_LOCATIONS
         self.species_list = [
             'Yellowfin Tuna', 'Indian Mackerel', 'Oil Sardine', 'Pomfret',
             'Tiger Shark', 'Blue Crab', 'Spiny Lobster'
         ]
+        if self.shared is not None:
+            self._claim_producer()
     
     def get_oceanographic_data(self) -> List[Dict]:
         """Generate realistic oceanographic data with temporal patterns"""
-        if 'ocean_data' in self.data_cache and datetime.now() - self.last_update < self.cache_duration:
-            return self.data_cache['ocean_data']
-        
-        data = []
-        current_date = datetime.now()
-        
-        # Generate data for last 30 days
-        for days_back in range(30):
-            date = current_date - timedelta(days=days_back)
-            
-            for location in self.sensor_locations[:3]:  # Ocean locations only
-                # Seasonal patterns
-                day_of_year = date.timetuple().tm_yday
-                temp_variation = np.sin(day_of_year * 2 * np.pi / 365) * 2
-                
-                record = {
-                    'date': date.strftime('%Y-%m-%d'),
-                    'location': location,
-                    'temperature': round(28.5 + temp_variation + random.uniform(-1, 1), 1),
-                    'salinity': round(35.0 + random.uniform(-0.5, 0.5), 1),
-                    'ph': round(8.1 + random.uniform(-0.1, 0.1), 2),
-                    'dissolved_oxygen': round(6.2 + random.uniform(-0.5, 0.5), 1),
-                    'chlorophyll': round(1.2 + random.uniform(-0.3, 0.3), 2),
-                    'turbidity': round(3.5 + random.uniform(-1, 1), 1),
-                    'wave_height': round(1.5 + random.uniform(-0.5, 0.5), 1),
-                    'current_speed': round(0.8 + random.uniform(-0.3, 0.3), 1)
-                }
-                data.append(record)
-        
-        self.data_cache['ocean_data'] = data
-        self.last_update = datetime.now()
-        return data
+        return self.get_oceanographic_dataset().to_records()
+    
+    def get_oceanographic_dataset(self) -> ColumnarDataset:
+        """Columnar view of the oceanographic data"""
+        return self._get_dataset('ocean_data')
+    
+    def _build_oceanographic_data(self) -> ColumnarDataset:
+        # Last 30 days at the ocean locations, with sin-based seasonal temperature
+        return SyntheticGenerator().ocean(days=30, locations=self.sensor_locations[:3])
     
     def get_fisheries_data(self) -> List[Dict]:
         """Generate realistic fisheries data with abundance patterns"""
-        if 'fisheries_data' in self.data_cache and datetime.now() - self.last_update < self.cache_duration:
-            return self.data_cache['fisheries_data']
-        
-        data = []
-        current_date = datetime.now()
-        
-        # Species-specific patterns
-        species_patterns = {
-            'Yellowfin Tuna': {'base_abundance': 150, 'season_peak': 180, 'month_offset': 2},
-            'Indian Mackerel': {'base_abundance': 200, 'season_peak': 280, 'month_offset': 0},
-            'Oil Sardine': {'base_abundance': 180, 'season_peak': 250, 'month_offset': 1},
-            'Pomfret': {'base_abundance': 80, 'season_peak': 120, 'month_offset': 3},
-            'Tiger Shark': {'base_abundance': 40, 'season_peak': 60, 'month_offset': 6},
-            'Blue Crab': {'base_abundance': 120, 'season_peak': 180, 'month_offset': 4},
-            'Spiny Lobster': {'base_abundance': 90, 'season_peak': 140, 'month_offset': 5}
-        }
-        
-        for days_back in range(90):  # Last 3 months
-            date = current_date - timedelta(days=days_back)
-            month = date.month
-            
-            for species, pattern in species_patterns.items():
-                # Seasonal abundance variation
-                month_diff = abs(month - pattern['month_offset'])
-                seasonal_factor = 1 - (month_diff / 6.0)
-                abundance = int(pattern['base_abundance'] + 
-                              (pattern['season_peak'] - pattern['base_abundance']) * seasonal_factor *
-                              random.uniform(0.8, 1.2))
-                
-                record = {
-                    'species': species,
-                    'scientific_name': self.get_scientific_name(species),
-                    'abundance': max(10, abundance + random.randint(-20, 20)),
-                    'length_cm': round(self.get_species_length(species) * random.uniform(0.8, 1.2), 1),
-                    'weight_kg': round(self.get_species_weight(species) * random.uniform(0.7, 1.3), 1),
-                    'location': random.choice(self.sensor_locations[3:]),  # Coastal locations
-                    'date': date.strftime('%Y-%m-%d'),
-                    'depth_m': random.randint(10, 200),
-                    'water_temp': round(28.5 + random.uniform(-2, 2), 1)
-                }
-                data.append(record)
-        
-        self.data_cache['fisheries_data'] = data
-        return data
+        return self.get_fisheries_dataset().to_records()
+    
+    def get_fisheries_dataset(self) -> ColumnarDataset:
+        """Columnar view of the fisheries data"""
+        return self._get_dataset('fisheries_data')
+    
+    def _build_fisheries_data(self) -> ColumnarDataset:
+        # Last 3 months, one record per species per day with seasonal abundance
+        return SyntheticGenerator().fisheries(days=90, locations=self.sensor_locations[3:])
     
     def get_molecular_data(self) -> List[Dict]:
         """Generate realistic molecular biology data"""
-        if 'molecular_data' in self.data_cache and datetime.now() - self.last_update < self.cache_duration:
-            return self.data_cache['molecular_data']
-        
-        data = []
-        markers = ['COI', '16S rRNA', '12S rRNA', 'cytb', '18S rRNA']
-        statuses = ['Valid', 'Pending', 'Verified', 'Under Review']
-        
-        for i in range(200):
-            species = random.choice(self.species_list)
-            record = {
-                'sample_id': f"MLRE{random.randint(10000, 99999)}",
-                'species': species,
-                'scientific_name': self.get_scientific_name(species),
-                'genetic_marker': random.choice(markers),
-                'sequence_length': random.randint(500, 2000),
-                'barcode_status': random.choice(statuses),
-                'edna_concentration': round(random.uniform(0.5, 8.0), 2),
-                'collection_date': (datetime.now() - timedelta(days=random.randint(1, 365))).strftime('%Y-%m-%d'),
-                'location': f"Station_{random.randint(1, 25)}",
-                'confidence': round(random.uniform(0.88, 0.99), 2),
-                'reads_count': random.randint(10000, 500000)
-            }
-            data.append(record)
+        return self.get_molecular_dataset().to_records()
+    
+    def get_molecular_dataset(self) -> ColumnarDataset:
+        """Columnar view of the molecular data"""
+        return self._get_dataset('molecular_data')
+    
+    def _build_molecular_data(self) -> ColumnarDataset:
+        return SyntheticGenerator().molecular(samples=200)
+    
+    def get_otolith_dataset(self) -> ColumnarDataset:
+        """Columnar view of the otolith morphology data"""
+        return self._get_dataset('otolith_data')
+    
+    def _build_otolith_data(self) -> ColumnarDataset:
+        frame = generate_otolith_data()
+        return ColumnarDataset({name: frame[name].to_numpy() for name in frame.columns},
+                               **DATASET_SCHEMAS['otolith_data'])
+    
+    def _get_dataset(self, key: str) -> ColumnarDataset:
+        with metrics.stage('cache_get', key):
+            self._sync_shared(key)
+            return self.data_cache.get(key, self._loaders[key])
+    
+    def on_producer(self, callback):
+        """Run callback once this process produces the datasets (now, or when it takes the role over).
+
+        Without shared snapshots every process is its own producer.
+        """
+        with self._producer_lock:
+            self._producer_callbacks.append(callback)
+            producing = self.shared is None or self.shared.is_producer
+        if producing:
+            callback()
+    
+    def _claim_producer(self) -> bool:
+        """Take the shared snapshot producer role if it is free, and start publishing"""
+        if not self.shared.try_produce():
+            return False
+        with self._producer_lock:
+            if self._producer_thread is not None and self._producer_thread.is_alive():
+                return True
+            self._producer_thread = threading.Thread(target=self._produce_snapshots,
+                                                     name='snapshot-producer', daemon=True)
+            self._producer_thread.start()
+            callbacks = list(self._producer_callbacks)
+        # Producer-only work (e.g. feed ingestion) follows the role to whichever process holds it
+        for callback in callbacks:
+            callback()
+        return True
+    
+    def _produce_snapshots(self):
+        # Touching every dataset publishes it on first build and again whenever its TTL expires
+        while True:
+            for key in self._builders:
+                try:
+                    self._get_dataset(key)
+                except Exception as e:
+                    logger.warning("Publishing %s failed: %s", key, e)
+            time.sleep(self._shared_poll)
+    
+    def _load_shared(self, key: str) -> ColumnarDataset:
+        """Latest shared snapshot of key: the producer builds and publishes it, readers map it"""
+        deadline = time.monotonic() + self._shared_wait
+        while True:
+            if self._claim_producer():
+                with metrics.stage('publish', key):
+                    return self.shared.publish(key, self._load_or_build(key))[0]
+            current = self.shared.current(key)
+            if current is not None:
+                return current[0]
+            if time.monotonic() >= deadline:
+                # Nothing published in time; a private copy beats failing the request
+                logger.warning("No shared snapshot of %s after %ss, building locally", key, self._shared_wait)
+                return self._load_or_build(key)
+            time.sleep(0.1)
+    
+    def _sync_shared(self, key: str):
+        """Swap in the producer's newer snapshot of key, if it published one since we last looked"""
+        if self.shared is None or self.shared.is_producer or self.data_cache.peek(key) is None:
+            return
+        current = self.shared.current(key)
+        if current is not None and current[0] is not self.data_cache.peek(key):
+            self.data_cache.put(key, current[0])
+    
+    def persists(self, key: str) -> bool:
+        """Whether records appended to key survive a restart (i.e. go to the on-disk store)"""
+        return self.store is not None and key in PARTITION_FIELDS  # undated datasets are not persisted
+    
+    def _load_or_build(self, key: str) -> ColumnarDataset:
+        """Memory-map the persisted dataset, generating and persisting it only if absent"""
+        if not self.persists(key):
+            with metrics.stage('build', key):
+                dataset = self._builders[key]()
+            # Rebuilding must not drop records appended since the process started
+            with self._append_lock:
+                appended = self._appended.get(key)
+            return dataset if appended is None else dataset.concat(appended.select(dataset.columns))
         
-        self.data_cache['molecular_data'] = data
-        return data
+        def build():
+            with metrics.stage('build', key):
+                return self._builders[key]()
+        # Workers starting on an empty store wait for the first one's build instead of duplicating it
+        with metrics.stage('store_load', key):
+            return self.store.load_or_create(key, build, PARTITION_FIELDS[key])
+    
+    def get_fisheries_aggregates(self) -> FisheriesAggregates:
+        """Species/month abundance rollups for the current fisheries snapshot"""
+        dataset = self.get_fisheries_dataset()
+        if self.fisheries_aggregates.covers(dataset):
+            return self.fisheries_aggregates
+        with metrics.stage('aggregate', 'fisheries_data'):
+            self.fisheries_aggregates.sync(dataset)
+        metrics.rows_scanned(len(dataset), 'aggregate', 'fisheries_data')
+        return self.fisheries_aggregates
+    
+    def get_forecaster(self) -> SeasonalForecaster:
+        """Seasonal abundance models fitted to the current fisheries snapshot"""
+        dataset = self.get_fisheries_dataset()
+        if self.forecaster.covers(dataset):
+            return self.forecaster
+        with metrics.stage('forecast_fit', 'fisheries_data'):
+            self.forecaster.sync(dataset)
+        metrics.rows_scanned(len(dataset), 'forecast_fit', 'fisheries_data')
+        return self.forecaster
+    
+    def get_versioned(self, key: str):
+        """Current snapshot of key and its version.
+
+        With shared snapshots the version is the producer's publish version,
+        so every worker reports the same version for the same snapshot.
+        """
+        self._sync_shared(key)
+        dataset, version = self.data_cache.get_versioned(key, self._loaders[key])
+        if self.shared is not None:
+            current = self.shared.current(key)
+            # A private fallback build gets a negative local version no publish can match
+            version = current[1] if current is not None and current[0] is dataset else -version
+        return dataset, version
+    
+    def version(self, key: str) -> int:
+        """Version of key's current snapshot without loading it (see get_versioned)"""
+        if self.shared is not None:
+            return self.shared.version(key)
+        return self.data_cache.version(key)
+    
+    def get_index(self, key: str):
+        """Secondary index for the current snapshot of a dataset, and the snapshot version"""
+        dataset, version = self.get_versioned(key)
+        with self._index_lock:
+            cached = self._indexes.get(key)
+            if cached is not None and cached[0].dataset is dataset:
+                return cached
+            with metrics.stage('index', key):
+                index = DatasetIndex(dataset, **DATASET_INDEXES[key])
+            metrics.rows_scanned(len(dataset), 'index', key)
+            self._indexes[key] = (index, version)
+            return index, version
+    
+    def get_series_rollups(self, key: str) -> SeriesRollups:
+        """Hour/day/week rollups of the current snapshot of a dataset, for chart series"""
+        dataset = self._get_dataset(key)
+        with self._series_lock:
+            cached = self._series.get(key)
+            if cached is not None and cached.dataset is dataset:
+                return cached
+            with metrics.stage('rollup', key):
+                rollups = SeriesRollups(dataset, **SERIES_DATASETS[key])
+            metrics.rows_scanned(len(dataset), 'rollup', key)
+            self._series[key] = rollups
+            return rollups
+    
+    def get_station_registry(self, key: str = None) -> StationRegistry:
+        """Grid-indexed positions of the locations in key's current snapshot, or in every dataset's"""
+        datasets = tuple(self._get_dataset(name) for name in ((key,) if key else DATASET_INDEXES))
+        with self._series_lock:
+            cached = self._stations.get(key)
+            if cached is not None and all(a is b for a, b in zip(cached[0], datasets)):
+                return cached[1]
+            names = sorted(set().union(*(dataset.categories('location') for dataset in datasets)))
+            with metrics.stage('station_index', key or ''):
+                registry = StationRegistry.from_names(names, cell_degrees=self._station_grid)
+            self._stations[key] = (datasets, registry)
+            return registry
+    
+    def locations_by_dataset(self) -> Dict[str, set]:
+        """Location names present in each dataset's current snapshot"""
+        return {key: set(self._get_dataset(key).unique('location')) for key in DATASET_INDEXES}
+    
+    def get_barcode_index(self) -> KmerIndex:
+        """k-mer index over the reference barcodes, built on first use"""
+        with self._series_lock:
+            if self._barcode_index is None:
+                with metrics.stage('barcode_index'):
+                    self._barcode_index = KmerIndex(reference_barcodes(), k=self._barcode_k)
+            return self._barcode_index
+    
+    def match_reads(self, reads: List[str], top: int = 5, marker: str = None) -> List[Dict]:
+        """Top species matches for each read against the reference barcodes"""
+        index = self.get_barcode_index()
+        with metrics.stage('barcode_search'):
+            return index.search(reads, top=top, marker=marker)
+    
+    def match_samples(self, sample_ids: List[str], top: int = 5, marker: str = None) -> List[Dict]:
+        """match_reads for the sequences of molecular records, by sample id"""
+        molecular = self.get_molecular_dataset()
+        if 'sequence' not in molecular.columns:
+            raise ValueError('Molecular records carry no sequences')
+        ids, first_rows = self._sample_lookup(molecular)
+        found = ids.get_indexer(sample_ids)
+        missing = [sample_id for sample_id, position in zip(sample_ids, found) if position < 0]
+        if missing:
+            raise KeyError(f"Unknown sample ids: {', '.join(missing)}")
+        sequences = molecular.column('sequence')
+        results = self.match_reads([str(sequences[row]) for row in first_rows[found]], top=top, marker=marker)
+        for sample_id, result in zip(sample_ids, results):
+            result['sample_id'] = sample_id
+        return results
+    
+    def _sample_lookup(self, molecular: ColumnarDataset):
+        """Distinct sample ids of a molecular snapshot as a hash index, and the first row of each"""
+        with self._series_lock:
+            cached = self._sample_rows
+            if cached is not None and cached[0] is molecular:
+                return cached[1], cached[2]
+            ids = pd.Index(molecular.column('sample_id'))
+            first = ~ids.duplicated()
+            self._sample_rows = (molecular, ids[first], np.flatnonzero(first))
+            return self._sample_rows[1], self._sample_rows[2]
+    
+    def append_records(self, key: str, records: List[Dict]) -> ColumnarDataset:
+        """Append new records to a cached dataset and update its rollups incrementally"""
+        batch = ColumnarDataset.from_records(records, **DATASET_SCHEMAS[key])
+        if self.shared is not None and not self._claim_producer():
+            raise RuntimeError('Appends must go through the shared snapshot producer process')
+        with self._append_lock, metrics.stage('append', key):
+            current = self.data_cache.get(key, self._loaders[key])
+            missing = [name for name in current.columns if name not in batch.columns]
+            if missing:
+                raise ValueError(f"Records for {key} are missing fields: {', '.join(missing)}")
+            batch = batch.select(current.columns)
+            if self.persists(key):
+                self.store.append(key, batch, PARTITION_FIELDS[key])
+            else:
+                appended = self._appended.get(key)
+                appended = batch if appended is None else appended.concat(batch)
+                if len(appended) > self._retained_rows:
+                    appended = appended.take(np.arange(len(appended) - self._retained_rows, len(appended)))
+                self._appended[key] = appended
+            if key == 'fisheries_data':
+                self.fisheries_aggregates.sync(current)
+                self.forecaster.sync(current)
+            updated = current.concat(batch)
+            if self.shared is not None:
+                updated = self.shared.publish(key, updated)[0]
+            if key == 'fisheries_data':
+                self.fisheries_aggregates.append(batch, updated)
+                self.forecaster.append(batch, updated)
+            self.data_cache.put(key, updated)
+        metrics.rows_scanned(len(batch), 'append', key)
+        return updated
+    
+    def snapshot_state(self, keys):
+        """Current snapshot versions of keys (loading them if needed) and when the newest was stored"""
+        versions = tuple(self.get_versioned(key)[1] for key in keys)
+        modified = max(self.data_cache.last_modified(key) or 0 for key in keys)
+        return versions, datetime.fromtimestamp(modified).astimezone()
+    
+    def get_cache_stats(self) -> Dict:
+        """Hit/miss/refresh counters and per-dataset freshness"""
+        stats = self.data_cache.stats()
+        if self.shared is not None:
+            stats['shared'] = self.shared.stats()
+        return stats
     
     def generate_live_sensor_data(self) -> List[Dict]:
         """Generate real-time sensor data simulation"""
@@ -152,65 +457,55 @@ class RealTimeDataIngestion:
                 'signal_strength': random.choice(['Excellent', 'Good', 'Fair'])
             })
         
+        if self.store is not None:
+            with self._sensor_lock:
+                self._sensor_buffer.extend(live_data)
+                self._sensor_buffer_since = self._sensor_buffer_since or time.monotonic()
+                due = (len(self._sensor_buffer) >= self._sensor_flush_rows
+                       or time.monotonic() - self._sensor_buffer_since >= self._sensor_flush_seconds)
+            if due:
+                self.flush_sensor_data()
+        with metrics.stage('anomaly', 'sensor_data'):
+            self.anomaly_detector.observe(live_data)
         return live_data
     
-    def generate_ai_correlations(self) -> List[Dict]:
-        """Generate dynamic AI correlations based on current data"""
-        ocean_data = self.get_oceanographic_data()
-        fisheries_data = self.get_fisheries_data()
-        
-        # Calculate real correlations from data
-        df_ocean = pd.DataFrame(ocean_data)
-        df_fisheries = pd.DataFrame(fisheries_data)
-        
-        # Sample correlations (in real implementation, use statistical analysis)
-        correlations = [
-            self._calculate_correlation('Temperature', 'Tuna Abundance', 0.82, 0.05),
-            self._calculate_correlation('Chlorophyll', 'Sardine Distribution', 0.71, 0.08),
-            self._calculate_correlation('Salinity', 'Crab Diversity', -0.63, 0.12),
-            self._calculate_correlation('Dissolved Oxygen', 'Species Richness', 0.89, 0.03),
-            self._calculate_correlation('pH Level', 'Coral Health', 0.76, 0.06),
-            self._calculate_correlation('Turbidity', 'Fish Abundance', -0.58, 0.15)
-        ]
-        
-        return correlations
+    def flush_sensor_data(self) -> int:
+        """Persist buffered live sensor readings as one append; returns the rows written"""
+        with self._sensor_lock:
+            records, self._sensor_buffer = self._sensor_buffer, []
+            self._sensor_buffer_since = None
+        if records and self.store is not None:
+            with metrics.stage('store_append', 'sensor_data'):
+                self.store.append('sensor_data', ColumnarDataset.from_records(records, **DATASET_SCHEMAS['sensor_data']),
+                                  PARTITION_FIELDS['sensor_data'])
+        return len(records)
+    
+    def get_correlation_result(self) -> CorrelationResult:
+        """Full ocean/fisheries correlation matrices for the current data snapshot"""
+        ocean = self.get_oceanographic_dataset()
+        fisheries = self.get_fisheries_dataset()
+        with metrics.stage('correlation'):
+            result = self.correlation_engine.compute(ocean, fisheries)
+        if result is not self._last_correlation:
+            self._last_correlation = result
+            metrics.rows_scanned(len(ocean) + len(fisheries), 'correlation')
+        return result
+    
+    def generate_ai_correlations(self, limit: int = 10) -> List[Dict]:
+        """Strongest correlations between ocean parameters and species abundance"""
+        result = self.get_correlation_result()
+        last_updated = result.computed_at.strftime('%Y-%m-%d %H:%M')
+        return [self._describe_correlation(pair, last_updated) for pair in result.top_pairs(limit)]
     
     def run_advanced_analysis(self, ocean_data: List[Dict], fisheries_data: List[Dict]) -> Dict:
         """Run advanced AI analysis on current datasets"""
-        
-        # Simulate complex analysis
-        insights = [
-            f"Strong temperature-abundance relationship detected (R²={random.uniform(0.85, 0.95):.3f})",
-            f"Seasonal patterns explain {random.randint(65, 75)}% of species distribution variance",
-            f"{random.randint(2, 5)} new significant correlations identified in latest data",
-            f"Predictive model accuracy: {random.uniform(92, 97):.1f}%",
-            f"Anomaly detection: {random.randint(3, 8)} unusual patterns flagged for review",
-            f"Climate change impact: {random.uniform(0.5, 2.1):.1f}°C temperature rise correlation detected"
-        ]
-        
-        recommendations = [
-            "Increase monitoring during monsoon season for better data coverage",
-            "Focus conservation efforts on temperature-sensitive species",
-            "Expand eDNA sampling in identified biodiversity hotspots",
-            "Implement real-time alert system for abnormal parameter changes",
-            "Enhance sensor network in coastal regions for better resolution",
-            "Correlate with satellite data for comprehensive ecosystem analysis"
-        ]
-        
-        return {
-            'status': 'completed',
-            'analysis_timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'data_points_analyzed': len(ocean_data) + len(fisheries_data),
-            'processing_time': f"{random.uniform(2.1, 5.7):.1f} seconds",
-            'insights': insights,
-            'recommendations': recommendations,
-            'confidence_score': round(random.uniform(0.88, 0.96), 3)
-        }
+        return run_advanced_analysis(len(ocean_data) + len(fisheries_data), self.anomaly_detector.recent_count(),
+                                     self.get_forecaster().mean_r2())
     
-    def _calculate_correlation(self, param1: str, param2: str, base_corr: float, noise: float) -> Dict:
-        """Calculate correlation with realistic noise"""
-        correlation = base_corr + random.uniform(-noise, noise)
-        correlation = max(-1, min(1, correlation))  # Clamp between -1 and 1
+    def _describe_correlation(self, pair: Dict, last_updated: str) -> Dict:
+        """Label a computed correlation with strength, impact and description"""
+        param1, param2 = pair['parameter'], pair['target']
+        correlation = pair['pearson']
         
         strength = "Very Strong Positive" if correlation > 0.8 else \
                   "Strong Positive" if correlation > 0.6 else \
@@ -232,18 +527,22 @@ class RealTimeDataIngestion:
             'strength': strength,
             'impact': impact,
             'description': self._get_correlation_description(param1, param2, correlation),
-            'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M')
+            'spearman': round(pair['spearman'], 3),
+            'p_value': round(pair['p_value'], 4),
+            'best_lag_days': pair['best_lag_days'],
+            'best_lag_correlation': round(pair['best_lag_correlation'], 3),
+            'last_updated': last_updated
         }
     
     def _get_correlation_description(self, param1: str, param2: str, corr: float) -> str:
         """Generate meaningful correlation descriptions"""
         descriptions = {
-            ('Temperature', 'Tuna Abundance'): 'Warmer waters significantly influence tuna migration and feeding patterns',
-            ('Chlorophyll', 'Sardine Distribution'): 'Phytoplankton blooms directly impact sardine school formations',
-            ('Salinity', 'Crab Diversity'): 'Salinity gradients create microhabitats affecting crab species distribution',
-            ('Dissolved Oxygen', 'Species Richness'): 'Oxygen levels are critical for maintaining diverse marine ecosystems',
-            ('pH Level', 'Coral Health'): 'Ocean acidification shows measurable impact on coral reef vitality',
-            ('Turbidity', 'Fish Abundance'): 'Water clarity affects predator-prey interactions and habitat suitability'
+            ('Temperature', 'Yellowfin Tuna Abundance'): 'Warmer waters significantly influence tuna migration and feeding patterns',
+            ('Chlorophyll', 'Oil Sardine Abundance'): 'Phytoplankton blooms directly impact sardine school formations',
+            ('Salinity', 'Blue Crab Abundance'): 'Salinity gradients create microhabitats affecting crab species distribution',
+            ('Dissolved Oxygen', 'All Species Abundance'): 'Oxygen levels are critical for maintaining diverse marine ecosystems',
+            ('pH Level', 'Spiny Lobster Abundance'): 'Ocean acidification affects shell formation in crustaceans',
+            ('Turbidity', 'All Species Abundance'): 'Water clarity affects predator-prey interactions and habitat suitability'
         }
         
         key = (param1, param2)
@@ -256,29 +555,53 @@ class RealTimeDataIngestion:
     
     def get_scientific_name(self, common_name: str) -> str:
         """Get scientific name for common species"""
-        names = {
-            'Yellowfin Tuna': 'Thunnus albacares',
-            'Indian Mackerel': 'Rastrelliger kanagurta',
-            'Oil Sardine': 'Sardinella longiceps',
-            'Pomfret': 'Pampus argenteus',
-            'Tiger Shark': 'Galeocerdo cuvier',
-            'Blue Crab': 'Portunus pelagicus',
-            'Spiny Lobster': 'Panulirus homarus'
-        }
-        return names.get(common_name, 'Unknown')
+        return SCIENTIFIC_NAMES.get(common_name, 'Unknown')
     
     def get_species_length(self, species: str) -> float:
         """Get typical length for species in cm"""
-        lengths = {
-            'Yellowfin Tuna': 150, 'Indian Mackerel': 35, 'Oil Sardine': 20,
-            'Pomfret': 45, 'Tiger Shark': 400, 'Blue Crab': 18, 'Spiny Lobster': 30
-        }
-        return lengths.get(species, 50)
+        return SPECIES_LENGTHS.get(species, 50)
     
     def get_species_weight(self, species: str) -> float:
         """Get typical weight for species in kg"""
-        weights = {
-            'Yellowfin Tuna': 60, 'Indian Mackerel': 0.5, 'Oil Sardine': 0.2,
-            'Pomfret': 1.5, 'Tiger Shark': 500, 'Blue Crab': 0.4, 'Spiny Lobster': 1.2
-        }
-        return weights.get(species, 10)
\ No newline at end of file
+        return SPECIES_WEIGHTS.get(species, 10)
+
+def run_advanced_analysis(data_points: int, anomaly_count: int = 0, model_fit: float = None) -> Dict:
+    """Run advanced AI analysis on current datasets.
+
+    Module-level so it can be pickled into the analysis process pool; it
+    takes only summary numbers, so no dataset snapshot is copied into a job.
+    data_points is the number of ocean and fisheries records analyzed;
+    anomaly_count is the number of live sensor anomalies flagged in the last hour;
+    model_fit is the mean in-sample R² of the seasonal abundance forecasts.
+    """
+    model_insight = ("Predictive model fit: no fisheries history to model yet" if model_fit is None
+                     else f"Predictive model fit: seasonal forecasts explain {model_fit * 100:.1f}% of abundance variance")
+    
+    # Simulate complex analysis
+    insights = [
+        f"Strong temperature-abundance relationship detected (R²={random.uniform(0.85, 0.95):.3f})",
+        f"Seasonal patterns explain {random.randint(65, 75)}% of species distribution variance",
+        f"{random.randint(2, 5)} new significant correlations identified in latest data",
+        model_insight,
+        f"Anomaly detection: {anomaly_count} unusual sensor readings flagged for review in the last hour",
+        f"Climate change impact: {random.uniform(0.5, 2.1):.1f}°C temperature rise correlation detected"
+    ]
+    
+    recommendations = [
+        "Increase monitoring during monsoon season for better data coverage",
+        "Focus conservation efforts on temperature-sensitive species",
+        "Expand eDNA sampling in identified biodiversity hotspots",
+        "Implement real-time alert system for abnormal parameter changes",
+        "Enhance sensor network in coastal regions for better resolution",
+        "Correlate with satellite data for comprehensive ecosystem analysis"
+    ]
+    
+    return {
+        'status': 'completed',
+        'analysis_timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'data_points_analyzed': data_points,
+        'processing_time': f"{random.uniform(2.1, 5.7):.1f} seconds",
+        'insights': insights,
+        'recommendations': recommendations,
+        'confidence_score': round(random.uniform(0.88, 0.96), 3)
+    }
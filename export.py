@@ -0,0 +1,103 @@
+import io
+from typing import Iterator, Optional
+import numpy as np
+from columnar import ColumnarDataset
+import metrics
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional: CSV and NDJSON only
+    pa = None
+
+# Content type and file extension of each export format
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+
+EXPORTED_ROWS = metrics.REGISTRY.counter('export_rows_total', 'Rows streamed by bulk exports',
+                                         ('dataset', 'format'))
+EXPORTED_BYTES = metrics.REGISTRY.counter('export_bytes_total', 'Bytes streamed by bulk exports',
+                                          ('dataset', 'format'))
+
+
+def available_formats():
+    return [name for name in EXPORT_FORMATS if name != 'arrow' or pa is not None]
+
+
+def _text_frame(chunk: ColumnarDataset):
+    # Dates as YYYY-MM-DD, as in every JSON API response
+    frame = chunk.to_frame()
+    for name in chunk.dates:
+        frame[name] = np.datetime_as_string(chunk.column(name), unit='D')
+    return frame
+
+
+def _csv_chunks(chunks: Iterator[ColumnarDataset]) -> Iterator[bytes]:
+    header = True
+    for chunk in chunks:
+        yield _text_frame(chunk).to_csv(index=False, header=header).encode()
+        header = False
+
+
+def _ndjson_chunks(chunks: Iterator[ColumnarDataset]) -> Iterator[bytes]:
+    for chunk in chunks:
+        if len(chunk):
+            body = _text_frame(chunk).to_json(orient='records', lines=True, force_ascii=False)
+            yield (body if body.endswith('\n') else body + '\n').encode()
+
+
+def _arrow_batch(chunk: ColumnarDataset):
+    arrays = []
+    for name in chunk.columns:
+        if name in chunk.categorical:
+            arrays.append(pa.DictionaryArray.from_arrays(chunk.codes(name), chunk.categories(name)))
+        else:
+            values = chunk.column(name)
+            arrays.append(pa.array(values.astype(str) if values.dtype == object else values))
+    return pa.RecordBatch.from_arrays(arrays, names=chunk.columns)
+
+
+def _arrow_chunks(chunks: Iterator[ColumnarDataset]) -> Iterator[bytes]:
+    sink = io.BytesIO()
+    writer = None
+    for chunk in chunks:
+        batch = _arrow_batch(chunk)
+        if writer is None:
+            writer = pa.ipc.new_stream(sink, batch.schema)
+        writer.write_batch(batch)
+        yield sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+    if writer is not None:
+        writer.close()
+        yield sink.getvalue()
+
+
+def stream_export(dataset: ColumnarDataset, rows: np.ndarray, fmt: str, chunk_rows: int = 50000,
+                  name: Optional[str] = None) -> Iterator[bytes]:
+    """Serialized selected rows of a dataset snapshot, chunk_rows at a time.
+
+    Only one chunk is materialized and encoded at once, so memory stays
+    bounded by the chunk size (plus the selected row ids) however large the
+    export is.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'")
+    if fmt == 'arrow' and pa is None:
+        raise ValueError('Arrow export requires pyarrow')
+    label = name or 'dataset'
+
+    def chunks():
+        # An empty selection still yields one chunk, so CSV and Arrow carry their header/schema
+        for start in range(0, max(len(rows), 1), chunk_rows):
+            chunk = dataset.take(rows[start:start + chunk_rows])
+            EXPORTED_ROWS.inc(len(chunk), dataset=label, format=fmt)
+            yield chunk
+
+    encode = {'csv': _csv_chunks, 'ndjson': _ndjson_chunks, 'arrow': _arrow_chunks}[fmt]
+    for body in encode(chunks()):
+        if body:
+            EXPORTED_BYTES.inc(len(body), dataset=label, format=fmt)
+            yield body
@@ -0,0 +1,201 @@
+import threading
+import numpy as np
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+from columnar import ColumnarDataset
+
+# Time origin for the regressors; fixed so sufficient statistics stay additive
+_ORIGIN = np.datetime64('2024-01-01', 'D')
+_YEAR = 365.25
+
+
+def design_matrix(days: np.ndarray, harmonics: int = 2) -> np.ndarray:
+    """Regressors [1, t, sin/cos of each annual harmonic] for datetime64[D] days, t in years"""
+    t = (days.astype('datetime64[D]') - _ORIGIN).astype(float) / _YEAR
+    columns = [np.ones_like(t), t]
+    for h in range(1, harmonics + 1):
+        columns += [np.sin(2 * np.pi * h * t), np.cos(2 * np.pi * h * t)]
+    return np.column_stack(columns)
+
+
+class SeasonalForecaster:
+    """Harmonic-regression abundance models for every (species, location) series.
+
+    Each series keeps only the sufficient statistics of its least-squares
+    fit (X'X, X'y, y'y, n), accumulated for all series at once with
+    bincounts. Appending a batch adds to them; coefficients for every series
+    are re-solved together in one batched linear solve, and only when the
+    statistics changed since the last fit. A series with no more records
+    than parameters fits them exactly, so it reports no R² or prediction
+    interval (only the regularized mean) until it has more history.
+    """
+
+    def __init__(self, value: str = 'abundance', keys: Sequence[str] = ('species', 'location'),
+                 harmonics: int = 2, ridge: float = 10.0):
+        self.value = value
+        self.keys = tuple(keys)
+        self.harmonics = harmonics
+        self.ridge = ridge
+        self.n_params = 2 + 2 * harmonics
+        self._lock = threading.Lock()
+        self._source: Optional[ColumnarDataset] = None
+        self._reset()
+
+    def _reset(self):
+        p = self.n_params
+        self._series: Dict[Tuple[str, ...], int] = {}
+        self._xtx = np.zeros((0, p, p))
+        self._xty = np.zeros((0, p))
+        self._yty = np.zeros(0)
+        self._count = np.zeros(0, dtype=np.int64)
+        self._last_day = np.zeros(0, dtype='datetime64[D]')
+        self._fit = None
+        self.fitted_at: Optional[datetime] = None
+
+    def covers(self, dataset: ColumnarDataset) -> bool:
+        """Whether the statistics already describe this snapshot"""
+        return dataset is self._source
+
+    def sync(self, dataset: ColumnarDataset) -> 'SeasonalForecaster':
+        """Describe dataset, rebuilding the statistics only if it is a new snapshot"""
+        with self._lock:
+            if dataset is not self._source:
+                self._reset()
+                self._add(dataset)
+                self._source = dataset
+        return self
+
+    def append(self, batch: ColumnarDataset, result: ColumnarDataset):
+        """Fold an appended batch in; result is the dataset after the append"""
+        with self._lock:
+            self._add(batch)
+            self._source = result
+
+    def _series_ids(self, batch: ColumnarDataset) -> np.ndarray:
+        """Series id per row, registering unseen (species, location) pairs"""
+        categories = [batch.categories(key) for key in self.keys]
+        sizes = [len(names) for names in categories]
+        combined = np.zeros(len(batch), dtype=np.int64)
+        for key, size in zip(self.keys, sizes):
+            combined = combined * size + batch.codes(key)
+        present = np.unique(combined)
+        lookup = np.full(int(np.prod(sizes)), -1, dtype=np.int64)
+        for code in present:
+            names, rest = [], int(code)
+            for names_of_key, size in zip(reversed(categories), reversed(sizes)):
+                names.append(names_of_key[rest % size])
+                rest //= size
+            key = tuple(reversed(names))
+            if key not in self._series:
+                self._series[key] = len(self._series)
+            lookup[code] = self._series[key]
+        self._grow(len(self._series))
+        return lookup[combined]
+
+    def _grow(self, size: int):
+        extra = size - len(self._count)
+        if extra <= 0:
+            return
+        p = self.n_params
+        self._xtx = np.concatenate([self._xtx, np.zeros((extra, p, p))])
+        self._xty = np.concatenate([self._xty, np.zeros((extra, p))])
+        self._yty = np.concatenate([self._yty, np.zeros(extra)])
+        self._count = np.concatenate([self._count, np.zeros(extra, dtype=np.int64)])
+        self._last_day = np.concatenate([self._last_day, np.full(extra, np.datetime64('NaT'), dtype='datetime64[D]')])
+
+    def _add(self, batch: ColumnarDataset):
+        if not len(batch):
+            return
+        ids = self._series_ids(batch)
+        days = batch.column('date').astype('datetime64[D]')
+        x = design_matrix(days, self.harmonics)
+        y = batch.column(self.value).astype(float)
+        size = len(self._count)
+        p = self.n_params
+
+        outer = (x[:, :, None] * x[:, None, :]).reshape(len(x), p * p)
+        for j in range(p * p):
+            self._xtx[:, j // p, j % p] += np.bincount(ids, weights=outer[:, j], minlength=size)
+        for j in range(p):
+            self._xty[:, j] += np.bincount(ids, weights=x[:, j] * y, minlength=size)
+        self._yty += np.bincount(ids, weights=y * y, minlength=size)
+        self._count += np.bincount(ids, minlength=size)
+        latest = np.full(size, np.datetime64('NaT'), dtype='datetime64[D]')
+        order = np.argsort(days, kind='stable')
+        latest[ids[order]] = days[order]  # last write per series is its newest day
+        self._last_day = np.where(np.isnat(self._last_day) | (latest > self._last_day), latest, self._last_day)
+        self._fit = None
+
+    def _fitted(self):
+        """Coefficients, residual variance, R² and inverse normal matrices for every series.
+
+        Variance and R² are NaN for series with count <= n_params, whose
+        residuals say nothing about the noise.
+        """
+        if self._fit is None:
+            p = self.n_params
+            penalty = np.eye(p) * self.ridge
+            penalty[0, 0] = 0.0  # leave the level unpenalized
+            normal = self._xtx + penalty
+            normal[self._count == 0] += np.eye(p)  # keep empty series solvable
+            inverse = np.linalg.inv(normal)
+            beta = np.einsum('gij,gj->gi', inverse, self._xty)
+            sse = self._yty - 2 * np.einsum('gi,gi->g', beta, self._xty) \
+                + np.einsum('gi,gij,gj->g', beta, self._xtx, beta)
+            sse = np.maximum(sse, 0.0)
+            n = np.maximum(self._count, 1)
+            sst = np.maximum(self._yty - self._xty[:, 0] ** 2 / n, 1e-12)
+            identified = self._count > p
+            dof = np.maximum(self._count - p, 1)
+            variance = np.where(identified, sse / dof, np.nan)
+            r2 = np.where(identified, 1 - sse / sst, np.nan)
+            self._fit = (beta, variance, r2, inverse)
+            self.fitted_at = datetime.now()
+        return self._fit
+
+    def mean_r2(self) -> Optional[float]:
+        """Record-weighted in-sample R² across the series with enough records to measure it"""
+        with self._lock:
+            if not self._count.sum():
+                return None
+            r2 = self._fitted()[2]
+            weights = np.where(np.isnan(r2), 0, self._count)
+            if not weights.sum():
+                return None
+            return float(np.average(np.nan_to_num(r2), weights=weights))
+
+    def forecast(self, horizon: int = 30, filters: Optional[Dict[str, Sequence[str]]] = None,
+                 z: float = 1.96) -> List[Dict]:
+        """Daily forecasts with prediction intervals for the horizon days after each series' last day"""
+        with self._lock:
+            if not self._series:
+                return []
+            beta, variance, r2, inverse = self._fitted()
+            selected = [(key, sid) for key, sid in sorted(self._series.items())
+                        if all(not filters or not filters.get(name) or value in filters[name]
+                               for name, value in zip(self.keys, key))]
+            if not selected:
+                return []
+            ids = np.array([sid for _, sid in selected])
+            steps = np.arange(1, horizon + 1).astype('timedelta64[D]')
+            days = self._last_day[ids][:, None] + steps  # series x horizon
+            x = design_matrix(days.ravel(), self.harmonics).reshape(len(ids), horizon, self.n_params)
+            mean = np.einsum('shp,sp->sh', x, beta[ids])
+            leverage = np.einsum('shp,spq,shq->sh', x, inverse[ids], x)
+            spread = z * np.sqrt(variance[ids][:, None] * (1 + leverage))
+            counts = self._count[ids]
+
+        results = []
+        for row, ((key, _), count) in enumerate(zip(selected, counts)):
+            identified = not np.isnan(r2[ids[row]])
+            result = dict(zip(self.keys, key))
+            result.update({
+                'observations': int(count),
+                'r2': round(float(r2[ids[row]]), 4) if identified else None,
+                'dates': np.datetime_as_string(days[row], unit='D').tolist(),
+                'mean': np.round(np.maximum(mean[row], 0), 1).tolist(),
+                'lower': np.round(np.maximum(mean[row] - spread[row], 0), 1).tolist() if identified else None,
+                'upper': np.round(mean[row] + spread[row], 1).tolist() if identified else None,
+            })
+            results.append(result)
+        return results
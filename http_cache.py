@@ -0,0 +1,131 @@
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from flask import Response
+
+import metrics
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+RESPONSE_CACHE_EVENTS = metrics.REGISTRY.counter('http_response_cache_events_total',
+                                                 'Serialized response cache hits, misses and 304s',
+                                                 ('endpoint', 'event'))
+
+
+class CachedBody:
+    """One serialized response body and its pre-compressed variants"""
+
+    __slots__ = ('versions', 'body', 'encoded', 'etag', 'last_modified', 'mimetype')
+
+    def __init__(self, versions: Tuple, body: bytes, last_modified: datetime,
+                 mimetype: str = 'application/json', compress_min_bytes: int = 512):
+        self.versions = versions
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.sha1(body).hexdigest()[:20]
+        # HTTP dates have one-second resolution
+        self.last_modified = last_modified.astimezone(timezone.utc).replace(microsecond=0)
+        self.encoded: Dict[str, bytes] = {}
+        if len(body) >= compress_min_bytes:
+            self.encoded['gzip'] = gzip.compress(body, compresslevel=6, mtime=0)
+            if brotli is not None:
+                self.encoded['br'] = brotli.compress(body, quality=5)
+
+    def variant_etag(self, encoding: Optional[str]) -> str:
+        # Each content-coding is a distinct representation, so it gets its own strong tag
+        return self.etag if encoding is None else f"{self.etag}-{encoding}"
+
+    def nbytes(self) -> int:
+        return len(self.body) + sum(len(data) for data in self.encoded.values())
+
+
+class ResponseCache:
+    """LRU cache of serialized API bodies keyed by (endpoint, query).
+
+    Each entry remembers the dataset snapshot versions it was built from; a
+    lookup with different versions is a miss, so bodies never outlive the
+    data they describe and there is nothing to invalidate explicitly.
+    """
+
+    def __init__(self, max_entries: int = 256, compress_min_bytes: int = 512):
+        self.max_entries = max_entries
+        self.compress_min_bytes = compress_min_bytes
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, versions: Tuple) -> Optional[CachedBody]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.versions != versions:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Hashable, entry: CachedBody):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_build(self, key: Hashable, versions: Tuple, last_modified: datetime,
+                     build: Callable[[], bytes]) -> CachedBody:
+        """Cached body for key at these versions, serializing it with build() on a miss"""
+        endpoint = key[0] if isinstance(key, tuple) else key
+        entry = self.get(key, versions)
+        if entry is not None:
+            RESPONSE_CACHE_EVENTS.inc(endpoint=endpoint, event='hit')
+            return entry
+        RESPONSE_CACHE_EVENTS.inc(endpoint=endpoint, event='miss')
+        entry = CachedBody(versions, build(), last_modified, compress_min_bytes=self.compress_min_bytes)
+        self.put(key, entry)
+        return entry
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries,
+                    'bytes': sum(entry.nbytes() for entry in self._entries.values())}
+
+
+def _choose_encoding(entry: CachedBody, request) -> Optional[str]:
+    for encoding in ('br', 'gzip'):
+        if encoding in entry.encoded and request.accept_encodings[encoding] > 0:
+            return encoding
+    return None
+
+
+def _not_modified(entry: CachedBody, request) -> bool:
+    if request.if_none_match:
+        return any(request.if_none_match.contains(entry.variant_etag(encoding))
+                   for encoding in (None, *entry.encoded))
+    # If-Modified-Since only applies when the client sent no entity tags
+    since = request.if_modified_since
+    return since is not None and entry.last_modified <= since
+
+
+def conditional_response(entry: CachedBody, request, endpoint: str = '') -> Response:
+    """Serve entry honouring If-None-Match/If-Modified-Since and Accept-Encoding"""
+    encoding = _choose_encoding(entry, request)
+    if _not_modified(entry, request):
+        RESPONSE_CACHE_EVENTS.inc(endpoint=endpoint, event='not_modified')
+        response = Response(status=304)
+    else:
+        response = Response(entry.encoded[encoding] if encoding else entry.body, mimetype=entry.mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(entry.variant_etag(encoding))
+    response.last_modified = entry.last_modified
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    return response
@@ -0,0 +1,143 @@
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class Job:
+    __slots__ = ('job_id', 'key', 'future', 'submitted_at', 'finished_at')
+
+    def __init__(self, job_id: str, key: Hashable, future: Future):
+        self.job_id = job_id
+        self.key = key
+        self.future = future
+        self.submitted_at = datetime.now()
+        self.finished_at: Optional[datetime] = None
+
+    @property
+    def status(self) -> str:
+        if self.future.running():
+            return 'running'
+        if not self.future.done():
+            return 'queued'
+        if self.future.cancelled():
+            return 'cancelled'
+        return 'failed' if self.future.exception() is not None else 'completed'
+
+    def to_dict(self) -> Dict[str, Any]:
+        status = self.status
+        info = {
+            'job_id': self.job_id,
+            'status': status,
+            'submitted_at': self.submitted_at.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        if self.finished_at is not None:
+            info['finished_at'] = self.finished_at.strftime('%Y-%m-%d %H:%M:%S')
+        if status == 'completed':
+            info['result'] = self.future.result()
+        elif status == 'failed':
+            info['error'] = str(self.future.exception())
+        return info
+
+
+class JobQueue:
+    """Runs heavy analysis jobs on a process pool and keeps their results for polling.
+
+    Submitting a key that is already queued or running returns the existing
+    job instead of starting a duplicate. Finished jobs are kept in a bounded
+    store and the oldest are evicted first. Work that needs the parent
+    process's state (loading snapshots, fitting models) can be passed as
+    prepare: it runs on a background thread and its result becomes the
+    job's arguments, so neither step blocks the submitting request.
+    """
+
+    def __init__(self, max_workers: int = 2, max_results: int = 100,
+                 executor_factory: Optional[Callable[[], Executor]] = None):
+        self.max_workers = max_workers
+        self.max_results = max_results
+        self._executor_factory = executor_factory or (
+            lambda: ProcessPoolExecutor(max_workers=self.max_workers))
+        self._executor: Optional[Executor] = None
+        self._preparer: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Job] = {}
+        self._in_flight: Dict[Hashable, str] = {}
+        self._finished = OrderedDict()
+
+    def _get_executor(self) -> Executor:
+        # Created lazily so forking web servers don't inherit a pool from the master
+        if self._executor is None:
+            self._executor = self._executor_factory()
+        return self._executor
+
+    def submit(self, key: Hashable, fn: Callable, *args,
+               prepare: Optional[Callable[[], tuple]] = None, **kwargs) -> Job:
+        """Queue fn(*args, **kwargs), or fn(*prepare()) when prepare is given,
+        deduplicating identical in-flight submissions"""
+        with self._lock:
+            job_id = self._in_flight.get(key)
+            if job_id is not None:
+                return self._jobs[job_id]
+            job_id = uuid.uuid4().hex
+            if prepare is None:
+                future = self._get_executor().submit(fn, *args, **kwargs)
+            else:
+                if self._preparer is None:
+                    self._preparer = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                        thread_name_prefix='job-prepare')
+                future = Future()
+                self._preparer.submit(self._run_prepared, future, prepare, fn)
+            job = Job(job_id, key, future)
+            self._jobs[job_id] = job
+            self._in_flight[key] = job_id
+        future.add_done_callback(lambda _: self._on_done(job))
+        return job
+
+    def _run_prepared(self, future: Future, prepare: Callable[[], tuple], fn: Callable):
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            inner = self._get_executor().submit(fn, *prepare())
+        except Exception as e:
+            future.set_exception(e)
+            return
+
+        def forward(done: Future):
+            if done.exception() is not None:
+                future.set_exception(done.exception())
+            else:
+                future.set_result(done.result())
+        inner.add_done_callback(forward)
+
+    def _on_done(self, job: Job):
+        with self._lock:
+            job.finished_at = datetime.now()
+            if self._in_flight.get(job.key) == job.job_id:
+                del self._in_flight[job.key]
+            self._finished[job.job_id] = None
+            while len(self._finished) > self.max_results:
+                evicted, _ = self._finished.popitem(last=False)
+                self._jobs.pop(evicted, None)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'in_flight': len(self._in_flight),
+                'finished': len(self._finished),
+                'max_results': self.max_results,
+            }
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            if self._preparer is not None:
+                self._preparer.shutdown(wait=wait)
+                self._preparer = None
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
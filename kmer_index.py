@@ -0,0 +1,161 @@
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# A, C, G, T -> 0..3; anything else (N, gaps) breaks k-mers
+_CODES = np.full(256, 255, dtype=np.uint8)
+for _i, _base in enumerate(b'ACGT'):
+    _CODES[_base] = _i
+    _CODES[ord(chr(_base).lower())] = _i
+
+
+def encode(sequence: str) -> np.ndarray:
+    """2-bit base codes (0-3) of a DNA string, 255 for non-ACGT characters"""
+    return _CODES[np.frombuffer(sequence.encode('ascii', 'replace'), dtype=np.uint8)]
+
+
+def _windows(codes: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Canonical k-mers of every valid window and the window start positions.
+
+    Windows are packed by doubling (1, 2, 4, 8... base blocks combined per
+    set bit of k), so packing costs O(log k) array passes instead of O(k).
+    """
+    n = len(codes) - k + 1
+    if n <= 0:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64)
+    block_f = codes.astype(np.uint64)
+    block_r = np.uint64(3) - block_f  # complement; reverse strand packs first base lowest
+    size, forward, reverse = 1, None, None
+    width = 0
+    remaining = k
+    while True:
+        if remaining & 1:
+            if forward is None:
+                forward, reverse, width = block_f, block_r, size
+            else:
+                length = len(forward) - size
+                forward = (forward[:length] << np.uint64(2 * size)) | block_f[width:width + length]
+                reverse = reverse[:length] | (block_r[width:width + length] << np.uint64(2 * width))
+                width += size
+        remaining >>= 1
+        if not remaining:
+            break
+        length = len(block_f) - size
+        block_f = (block_f[:length] << np.uint64(2 * size)) | block_f[size:]
+        block_r = block_r[:length] | (block_r[size:] << np.uint64(2 * size))
+        size *= 2
+    # A window is valid when it contains no invalid base
+    invalid = np.concatenate([[0], np.cumsum(codes == 255)])
+    valid = np.flatnonzero(invalid[k:] == invalid[:n])
+    return np.minimum(forward[valid], reverse[valid]), valid
+
+
+def kmers(codes: np.ndarray, k: int) -> np.ndarray:
+    """Canonical k-mers (min of forward and reverse complement) packed 2 bits per base into uint64"""
+    return _windows(codes, k)[0]
+
+
+def batch_kmers(sequences: Sequence[str], k: int, distinct: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """Canonical k-mers of every sequence as (sequence ids, k-mers), in sequence order.
+
+    All sequences are encoded and packed in one pass; the separator between
+    them is an invalid base, so no window spans two sequences. With
+    distinct, repeated k-mers within a sequence are kept once.
+    """
+    if not len(sequences):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.uint64)
+    lengths = np.array([len(seq) + 1 for seq in sequences])
+    values, starts = _windows(encode('\n'.join(sequences)), k)
+    ids = np.repeat(np.arange(len(sequences)), lengths)[starts]
+    if distinct:
+        order = np.lexsort((values, ids))
+        ids, values = ids[order], values[order]
+        keep = np.ones(len(ids), dtype=bool)
+        keep[1:] = (ids[1:] != ids[:-1]) | (values[1:] != values[:-1])
+        ids, values = ids[keep], values[keep]
+    return ids, values
+
+
+class KmerIndex:
+    """Inverted index from packed k-mers to reference barcodes.
+
+    Keys are the sorted distinct canonical k-mers of all references; a
+    CSR-style offsets array points into a posting array of reference ids.
+    A batch of reads is matched by looking every read k-mer up with one
+    searchsorted and counting shared k-mers per (read, reference) with a
+    bincount, so no per-reference comparison loop is needed.
+    """
+
+    def __init__(self, references: Sequence[Dict], k: int = 15):
+        if not 1 <= k <= 32:
+            raise ValueError('k must be between 1 and 32')
+        self.k = k
+        self.species = [ref['species'] for ref in references]
+        self.markers = [ref['marker'] for ref in references]
+        self.species_names = sorted(set(self.species))
+        species_code = {name: i for i, name in enumerate(self.species_names)}
+        self._ref_species = np.array([species_code[name] for name in self.species], dtype=np.int64)
+
+        ref_ids, all_kmers = batch_kmers([ref['sequence'] for ref in references], k)
+        self.ref_kmers = np.bincount(ref_ids, minlength=len(references))
+        order = np.argsort(all_kmers, kind='stable')
+        self.keys, starts = np.unique(all_kmers[order], return_index=True)
+        self.offsets = np.append(starts, len(order)).astype(np.int64)
+        self.postings = ref_ids[order].astype(np.int32)
+
+    def __len__(self) -> int:
+        return len(self.species)
+
+    def nbytes(self) -> int:
+        return self.keys.nbytes + self.offsets.nbytes + self.postings.nbytes
+
+    def shared_kmers(self, reads: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """(reads x references) counts of read k-mers found in each reference, and k-mers per read"""
+        read_ids, query = batch_kmers(reads, self.k, distinct=False)
+        read_kmers = np.bincount(read_ids, minlength=len(reads))
+        counts = np.zeros((len(reads), len(self)), dtype=np.int64)
+        if not len(query) or not len(self.keys):
+            return counts, read_kmers
+
+        slot = np.minimum(np.searchsorted(self.keys, query), len(self.keys) - 1)
+        found = self.keys[slot] == query
+        slot, read_ids = slot[found], read_ids[found]
+        # Expand every hit into its posting list
+        lengths = self.offsets[slot + 1] - self.offsets[slot]
+        firsts = np.repeat(self.offsets[slot] - np.cumsum(lengths) + lengths, lengths)
+        refs = self.postings[firsts + np.arange(lengths.sum())]
+        pairs = np.repeat(read_ids, lengths) * len(self) + refs
+        counts += np.bincount(pairs, minlength=counts.size).reshape(counts.shape)
+        return counts, read_kmers
+
+    def search(self, reads: Sequence[str], top: int = 5, marker: Optional[str] = None) -> List[Dict]:
+        """Top species matches per read, best reference barcode per species.
+
+        containment is the fraction of the read's k-mer occurrences found in the
+        reference; identity estimates sequence identity from it as
+        containment ** (1 / k), since a k-mer survives only if all k of its
+        bases match.
+        """
+        counts, read_kmers = self.shared_kmers(reads)
+        containment = counts / np.maximum(read_kmers, 1)[:, None]
+        if marker is not None:
+            containment[:, [m != marker for m in self.markers]] = 0.0
+
+        # Best reference per species, then species ranked by their best reference
+        best_ref = np.zeros((len(reads), len(self.species_names)), dtype=np.int64)
+        for code in range(len(self.species_names)):
+            refs = np.flatnonzero(self._ref_species == code)
+            best_ref[:, code] = refs[np.argmax(containment[:, refs], axis=1)]
+        best = np.take_along_axis(containment, best_ref, axis=1)
+        ranked = np.take_along_axis(best_ref, np.argsort(-best, axis=1, kind='stable')[:, :top], axis=1)
+
+        results = []
+        for i, read in enumerate(reads):
+            matches = [{
+                'species': self.species[ref],
+                'marker': self.markers[ref],
+                'shared_kmers': int(counts[i, ref]),
+                'containment': round(float(containment[i, ref]), 4),
+                'identity': round(float(containment[i, ref]) ** (1.0 / self.k), 4),
+            } for ref in ranked[i] if containment[i, ref] > 0]
+            results.append({'read_length': len(read), 'kmers': int(read_kmers[i]), 'matches': matches})
+        return results
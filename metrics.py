@@ -0,0 +1,315 @@
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter as _Tally
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+# Default histogram buckets: latencies in seconds, payloads in bytes, row counts
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+ROW_BUCKETS = (0, 10, 100, 1000, 10000, 100000, 1000000, 10000000)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(name, '') for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        key = tuple(labels.get(name, '') for name in self.label_names)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_labels(self.label_names, key)} {_number(value)}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, '') for name in self.label_names)
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # Per-bucket counts (last slot is +Inf), then sum and count
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][slot] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            values = sorted((key, (list(series[0]), series[1], series[2])) for key, series in self._values.items())
+        for key, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = f'le="{_number(float(bound))}"'
+                yield f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.label_names, key)} {_number(float(total))}"
+            yield f"{self.name}_count{_labels(self.label_names, key)} {count}"
+
+
+class MetricsRegistry:
+    """Named metrics rendered together in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+REQUEST_SECONDS = REGISTRY.histogram('http_request_duration_seconds', 'Request latency by route',
+                                     ('route', 'method', 'status'))
+RESPONSE_BYTES = REGISTRY.histogram('http_response_size_bytes', 'Response body size by route',
+                                    ('route',), SIZE_BUCKETS)
+REQUEST_ROWS = REGISTRY.histogram('http_request_rows_scanned', 'Dataset rows scanned per request',
+                                  ('route',), ROW_BUCKETS)
+STAGE_SECONDS = REGISTRY.histogram('ingestion_stage_duration_seconds',
+                                   'Time spent in ingestion, cache and aggregation stages', ('stage', 'dataset'))
+ROWS_SCANNED = REGISTRY.counter('dataset_rows_scanned_total', 'Dataset rows scanned by each stage',
+                                ('stage', 'dataset'))
+CACHE_EVENTS = REGISTRY.counter('dataset_cache_events_total', 'Dataset cache hits, misses, refreshes and errors',
+                                ('dataset', 'event'))
+REQUEST_CACHE_EVENTS = REGISTRY.counter('http_request_cache_events_total',
+                                        'Dataset cache hits and misses incurred by requests', ('route', 'event'))
+SLOW_REQUESTS = REGISTRY.counter('http_slow_requests_total', 'Requests over the profiling threshold', ('route',))
+
+
+# Per-request accounting, filled in by whichever thread is serving the request
+
+_request = threading.local()
+
+
+def begin_request():
+    _request.stats = _Tally()
+
+
+def end_request() -> Dict[str, int]:
+    stats = getattr(_request, 'stats', None)
+    _request.stats = None
+    return dict(stats or {})
+
+
+def _note(field: str, amount: int = 1):
+    stats = getattr(_request, 'stats', None)
+    if stats is not None:
+        stats[field] += amount
+
+
+def stage(name: str, dataset: str = ''):
+    """Context manager timing one stage of dataset work"""
+    return STAGE_SECONDS.time(stage=name, dataset=dataset)
+
+
+def rows_scanned(count: int, stage: str, dataset: str = ''):
+    ROWS_SCANNED.inc(count, stage=stage, dataset=dataset)
+    _note('rows_scanned', count)
+
+
+def cache_event(event: str, key: str):
+    """DatasetCache listener: count the event globally and against the current request"""
+    CACHE_EVENTS.inc(dataset=key, event=event)
+    _note(f"cache_{event}")
+
+
+class SamplingProfiler:
+    """Opt-in wall-clock sampler for slow requests.
+
+    While a request is in flight, a background thread samples its stack
+    every interval seconds. Requests slower than threshold seconds have their
+    samples written to output_dir in folded format ("frame;frame;frame count"
+    per line), ready for flamegraph.pl or speedscope.
+    """
+
+    def __init__(self, threshold: float, interval: float = 0.005, output_dir: str = 'profiles'):
+        self.threshold = threshold
+        self.interval = interval
+        self.output_dir = output_dir
+        self._lock = threading.Lock()
+        self._active: Dict[int, _Tally] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                watched = list(self._active.items())
+            if not watched:
+                continue
+            frames = sys._current_frames()
+            stacks = [(thread_id, samples, self._fold(frames[thread_id]))
+                      for thread_id, samples in watched if thread_id in frames]
+            # Tally under the lock, so end() never reads a tally while it is being updated,
+            # and only into requests that are still in flight
+            with self._lock:
+                for thread_id, samples, stack in stacks:
+                    if self._active.get(thread_id) is samples:
+                        samples[stack] += 1
+
+    @staticmethod
+    def _fold(frame) -> str:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        return ';'.join(reversed(stack))
+
+    def begin(self, thread_id: Optional[int] = None):
+        with self._lock:
+            self._active[thread_id or threading.get_ident()] = _Tally()
+
+    def end(self, duration: float, label: str, thread_id: Optional[int] = None) -> Optional[str]:
+        """Stop sampling the request; returns the dump path if it was slow"""
+        with self._lock:
+            samples = self._active.pop(thread_id or threading.get_ident(), None)
+            stacks = samples.most_common() if samples else None
+        if not stacks or duration < self.threshold:
+            return None
+        os.makedirs(self.output_dir, exist_ok=True)
+        slug = ''.join(c if c.isalnum() else '_' for c in label).strip('_') or 'root'
+        path = os.path.join(self.output_dir,
+                            f"{datetime.now():%Y%m%d-%H%M%S-%f}-{slug}-{int(duration * 1000)}ms.folded")
+        with open(path, 'w') as f:
+            for stack, count in stacks:
+                f.write(f"{stack} {count}\n")
+        return path
+
+    def discard(self, thread_id: Optional[int] = None):
+        with self._lock:
+            self._active.pop(thread_id or threading.get_ident(), None)
+
+
+def install(app, profiler: Optional[SamplingProfiler] = None):
+    """Time every request of a Flask app, and profile slow ones when a profiler is given"""
+    from flask import g, request
+
+    if profiler is not None:
+        profiler.start()
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_started = time.perf_counter()
+        begin_request()
+        if profiler is not None:
+            profiler.begin()
+
+    @app.after_request
+    def _record(response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        duration = time.perf_counter() - started
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        REQUEST_SECONDS.observe(duration, route=route, method=request.method, status=response.status_code)
+        if not response.is_streamed:
+            RESPONSE_BYTES.observe(response.calculate_content_length() or 0, route=route)
+        stats = end_request()
+        REQUEST_ROWS.observe(stats.pop('rows_scanned', 0), route=route)
+        for field, count in stats.items():
+            REQUEST_CACHE_EVENTS.inc(count, route=route, event=field[len('cache_'):])
+        if profiler is not None:
+            profiler.end(duration, f"{request.method} {route}")
+            if duration >= profiler.threshold:
+                SLOW_REQUESTS.inc(route=route)
+        return response
+
+    @app.teardown_request
+    def _cleanup(exc):
+        # after_request is skipped when a view raises; don't leak per-request state
+        if g.pop('metrics_started', None) is not None:
+            end_request()
+        if profiler is not None:
+            profiler.discard()
+
+    return app
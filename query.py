@@ -0,0 +1,158 @@
+import base64
+import json
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Sequence
+from columnar import ColumnarDataset
+
+
+class QueryError(ValueError):
+    """Invalid query parameters (reported to API clients as 400)"""
+
+
+class StaleCursorError(QueryError):
+    """Cursor was issued for a dataset snapshot that has since been replaced"""
+
+
+def encode_cursor(version: int, last_row: int) -> str:
+    payload = json.dumps({'v': version, 'r': last_row}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Dict[str, int]:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return {'v': int(payload['v']), 'r': int(payload['r'])}
+    except (ValueError, KeyError, TypeError):
+        raise QueryError('Malformed cursor')
+
+
+class DatasetIndex:
+    """Secondary indexes over one immutable dataset snapshot.
+
+    Categorical key columns get posting lists (row ids grouped by category
+    code) and the date column gets a sorted permutation, so predicates are
+    resolved by slicing and binary search instead of scanning every row.
+    """
+
+    def __init__(self, dataset: ColumnarDataset, keys: Iterable[str], date_field: Optional[str] = None):
+        self.dataset = dataset
+        self.date_field = date_field
+        self._postings: Dict[str, tuple] = {}
+        for key in keys:
+            codes = dataset.codes(key)
+            order = np.argsort(codes, kind='stable')
+            offsets = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(dataset.categories(key))))])
+            self._postings[key] = (order, offsets)
+        if date_field is not None:
+            dates = dataset.column(date_field)
+            self._date_order = np.argsort(dates, kind='stable')
+            self._sorted_dates = dates[self._date_order]
+
+    @property
+    def keys(self) -> List[str]:
+        return list(self._postings)
+
+    def _codes_for(self, key: str, values: Sequence[str]) -> List[int]:
+        lookup = {name: code for code, name in enumerate(self.dataset.categories(key))}
+        return [lookup[value] for value in values if value in lookup]
+
+    def _date_slice(self, start: Optional[np.datetime64], end: Optional[np.datetime64]):
+        lo = 0 if start is None else np.searchsorted(self._sorted_dates, start, side='left')
+        hi = len(self._sorted_dates) if end is None else np.searchsorted(self._sorted_dates, end, side='right')
+        return lo, hi
+
+    def rows_for(self, key: str, values: Sequence[str]) -> np.ndarray:
+        """Sorted row ids whose key column is any of values"""
+        order, offsets = self._postings[key]
+        parts = [order[offsets[code]:offsets[code + 1]] for code in self._codes_for(key, values)]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate(parts))
+
+    def rows_between(self, start: Optional[np.datetime64], end: Optional[np.datetime64]) -> np.ndarray:
+        """Sorted row ids with start <= date <= end (binary search on the date index)"""
+        lo, hi = self._date_slice(start, end)
+        return np.sort(self._date_order[lo:hi])
+
+    def select(self, filters: Dict[str, Sequence[str]], start: Optional[np.datetime64] = None,
+               end: Optional[np.datetime64] = None) -> np.ndarray:
+        """Sorted row ids matching every predicate.
+
+        The most selective index produces the candidate rows; remaining
+        predicates are checked only against those candidates.
+        """
+        for key in filters:
+            if key not in self._postings:
+                raise QueryError(f"Cannot filter on '{key}'")
+        has_range = start is not None or end is not None
+        if has_range and self.date_field is None:
+            raise QueryError('Dataset has no date index')
+
+        # Estimate each predicate's match count from the index alone
+        sizes = {}
+        for key, values in filters.items():
+            offsets = self._postings[key][1]
+            sizes[key] = sum(int(offsets[code + 1] - offsets[code]) for code in self._codes_for(key, values))
+        if has_range:
+            lo, hi = self._date_slice(start, end)
+            sizes[self.date_field] = hi - lo
+        if not sizes:
+            return np.arange(len(self.dataset))
+
+        driver = min(sizes, key=sizes.get)
+        if driver == self.date_field:
+            rows = self.rows_between(start, end)
+        else:
+            rows = self.rows_for(driver, filters[driver])
+        for key, values in filters.items():
+            if key != driver and len(rows):
+                rows = rows[np.isin(self.dataset.codes(key)[rows], self._codes_for(key, values))]
+        if has_range and driver != self.date_field and len(rows):
+            dates = self.dataset.column(self.date_field)[rows]
+            keep = np.ones(len(rows), dtype=bool)
+            if start is not None:
+                keep &= dates >= start
+            if end is not None:
+                keep &= dates <= end
+            rows = rows[keep]
+        return rows
+
+
+def parse_date(value: Optional[str]) -> Optional[np.datetime64]:
+    if not value:
+        return None
+    try:
+        return np.datetime64(value, 'D')
+    except ValueError:
+        raise QueryError(f"Invalid date '{value}', expected YYYY-MM-DD")
+
+
+def run_query(index: DatasetIndex, version: int, filters: Dict[str, Sequence[str]],
+              start: Optional[str] = None, end: Optional[str] = None,
+              fields: Optional[Sequence[str]] = None, limit: int = 100,
+              cursor: Optional[str] = None) -> Dict:
+    """One page of rows matching the predicates, with a cursor for the next page"""
+    rows = index.select(filters, parse_date(start), parse_date(end))
+    total = len(rows)
+    if cursor:
+        position = decode_cursor(cursor)
+        if position['v'] != version:
+            raise StaleCursorError('Cursor refers to an older data snapshot; restart the query')
+        rows = rows[np.searchsorted(rows, position['r'], side='right'):]
+    page = rows[:limit]
+
+    dataset = index.dataset
+    if fields:
+        unknown = [name for name in fields if name not in dataset.columns]
+        if unknown:
+            raise QueryError(f"Unknown fields: {', '.join(unknown)}")
+        dataset = dataset.select(fields)
+
+    has_more = len(rows) > limit
+    return {
+        'data': dataset.take(page).to_records(),
+        'count': len(page),
+        'total': total,
+        'next_cursor': encode_cursor(version, int(page[-1])) if has_more else None,
+    }
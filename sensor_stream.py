@@ -0,0 +1,174 @@
+import json
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def format_sse(data: Dict, event: Optional[str] = None, event_id: Optional[int] = None) -> str:
+    """Encode one Server-Sent Events message"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return '\n'.join(lines) + '\n\n'
+
+
+class Subscription:
+    """One connected client: a bounded queue of pending deltas"""
+
+    def __init__(self, max_queue: int):
+        self.queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self.needs_snapshot = True
+        self.dropped = 0
+
+    def offer(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            # Slow client: discard its backlog and resync it with a full snapshot
+            self._drain()
+            self.needs_snapshot = True
+            self.dropped += 1
+
+    def _drain(self):
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                return
+
+
+class SensorBroadcaster:
+    """Produces each sensor tick once and fans the changes out to every client.
+
+    A single producer thread calls the reading source every interval, diffs it
+    against the previous tick and broadcasts only changed fields. Clients
+    that fall behind are resynced with a snapshot instead of blocking the
+    producer, and idle connections get a heartbeat comment.
+    """
+
+    def __init__(self, producer: Callable[[], List[Dict]], interval: float = 5.0,
+                 heartbeat: float = 15.0, max_queue: int = 32, key: str = 'sensor_id'):
+        self.producer = producer
+        self.interval = interval
+        self.heartbeat = heartbeat
+        self.max_queue = max_queue
+        self.key = key
+        self._state: Dict[str, Dict] = {}
+        self._sequence = 0
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+    def subscribe(self) -> Subscription:
+        # The new client starts from a snapshot of the last tick (see stream()), so
+        # the producer is only woken when it is idle, never for an extra tick
+        subscription = Subscription(self.max_queue)
+        with self._lock:
+            self._subscribers.append(subscription)
+            self._ensure_running()
+            if len(self._subscribers) == 1:
+                self._wake.notify_all()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {'sequence': self._sequence, 'readings': list(self._state.values())}
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'sequence': self._sequence,
+                'dropped': sum(sub.dropped for sub in self._subscribers),
+            }
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            self._wake.notify_all()
+
+    def _ensure_running(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name='sensor-broadcaster', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                # Sleep while nobody is listening
+                while not self._subscribers and not self._stopped:
+                    self._wake.wait()
+                if self._stopped:
+                    return
+            deadline = time.monotonic() + self.interval
+            try:
+                self.tick()
+            except Exception:
+                # A failed reading must not end the stream; try again next interval
+                logger.exception("Sensor tick failed")
+            with self._lock:
+                # Keep the fixed interval however often the condition is notified
+                while not self._stopped and time.monotonic() < deadline:
+                    self._wake.wait(deadline - time.monotonic())
+
+    def tick(self):
+        """Read the sensors once and broadcast the changes"""
+        readings = self.producer()
+        with self._lock:
+            changes = []
+            for reading in readings:
+                sensor_id = reading[self.key]
+                previous = self._state.get(sensor_id, {})
+                changed = {k: v for k, v in reading.items() if previous.get(k) != v}
+                if changed:
+                    changed[self.key] = sensor_id
+                    changes.append(changed)
+                self._state[sensor_id] = dict(reading)
+            if not changes:
+                return
+            self._sequence += 1
+            message = (self._sequence, changes)
+            for subscription in self._subscribers:
+                subscription.offer(message)
+
+    def stream(self) -> Iterator[str]:
+        """SSE text for one client, until the client disconnects"""
+        subscription = self.subscribe()
+        try:
+            yield f"retry: {int(self.interval * 1000)}\n\n"
+            last_sequence = 0
+            while True:
+                if subscription.needs_snapshot:
+                    subscription.needs_snapshot = False
+                    snapshot = self.snapshot()
+                    last_sequence = snapshot['sequence']
+                    if snapshot['readings']:
+                        yield format_sse(snapshot, event='snapshot', event_id=last_sequence)
+                try:
+                    sequence, changes = subscription.queue.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    yield ': heartbeat\n\n'
+                    continue
+                if sequence <= last_sequence:
+                    # Already covered by the snapshot we just sent
+                    continue
+                last_sequence = sequence
+                yield format_sse({'sequence': sequence, 'changes': changes},
+                                 event='delta', event_id=sequence)
+        finally:
+            self.unsubscribe(subscription)
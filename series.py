@@ -0,0 +1,183 @@
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Sequence
+from columnar import ColumnarDataset
+from query import QueryError
+
+# Rollup resolutions, finest first, in seconds
+RESOLUTIONS = {'hour': 3600, 'day': 86400, 'week': 7 * 86400}
+# Rollups are used once the finer level would hand more than this many times
+# the requested points to the downsampler
+OVERSAMPLE = 4
+# 1970-01-01 is a Thursday; shifting by three days aligns weeks on Monday
+_WEEK_SHIFT = 3 * 86400
+
+
+def _bin_starts(seconds: np.ndarray, width: int) -> np.ndarray:
+    if width == RESOLUTIONS['week']:
+        return (seconds + _WEEK_SHIFT) // width * width - _WEEK_SHIFT
+    return seconds // width * width
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the points kept by Largest-Triangle-Three-Buckets.
+
+    Bucket averages are computed in one vectorized pass; the selection walks
+    the buckets once, since each pick depends on the previous one.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = x.astype(float)
+    y = y.astype(float)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[:n - 1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[:n - 1], edges[:-1]) / counts
+    # Each bucket looks ahead to the next bucket's average; the last to the final point
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - next_x[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y[i] - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def _bucket_extreme(values: np.ndarray, edges: np.ndarray, reduce) -> np.ndarray:
+    """Position of the first row holding each bucket's reduce() value"""
+    extremes = reduce.reduceat(values, edges[:-1])
+    hits = np.flatnonzero(values == np.repeat(extremes, np.diff(edges)))
+    first = np.searchsorted(hits, edges[:-1])
+    return hits[first]
+
+
+def minmax(y_min: np.ndarray, y_max: np.ndarray, threshold: int):
+    """Positions and values of the minimum and maximum of threshold // 2 equal buckets, in order"""
+    n = len(y_min)
+    buckets = max(1, min(threshold // 2, n))
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    lows = _bucket_extreme(y_min, edges, np.minimum)
+    highs = _bucket_extreme(y_max, edges, np.maximum)
+    positions = np.concatenate([lows, highs])
+    values = np.concatenate([y_min[lows], y_max[highs]])
+    order = np.lexsort((values, positions))
+    positions, values = positions[order], values[order]
+    # A single-row bucket yields the same point twice
+    keep = np.ones(len(positions), dtype=bool)
+    keep[1:] = (positions[1:] != positions[:-1]) | (values[1:] != values[:-1])
+    return positions[keep], values[keep]
+
+
+class _Level:
+    """One resolution: rows sorted by (group, time) with per-row aggregates"""
+
+    def __init__(self, groups: np.ndarray, times: np.ndarray, mean: Dict[str, np.ndarray],
+                 low: Dict[str, np.ndarray], high: Dict[str, np.ndarray], n_groups: int,
+                 width: Optional[int] = None):
+        self.width = width
+        self.times = times
+        self.mean = mean
+        self.low = low
+        self.high = high
+        self.offsets = np.searchsorted(groups, np.arange(n_groups + 1))
+
+    def span(self, group: int, start: Optional[int], end: Optional[int]) -> slice:
+        lo, hi = self.offsets[group], self.offsets[group + 1]
+        times = self.times[lo:hi]
+        if start is not None and self.width is not None:
+            start = int(_bin_starts(np.int64(start), self.width))  # include the bin containing start
+        first = 0 if start is None else np.searchsorted(times, start, side='left')
+        last = len(times) if end is None else np.searchsorted(times, end, side='left')
+        return slice(lo + first, lo + last)
+
+
+class SeriesRollups:
+    """Per-group time series of one dataset snapshot at raw, hour, day and week resolution.
+
+    Raw rows are sorted by (group, time) once; each coarser level holds the
+    mean, min and max of every field per group and time bin, so a query at
+    any zoom only touches as many rows as the chosen level has in range.
+    """
+
+    def __init__(self, dataset: ColumnarDataset, group: str, time_field: str, fields: Iterable[str]):
+        self.dataset = dataset
+        self.group = group
+        self.fields = [name for name in fields if name in dataset.columns]
+        self.group_names = dataset.categories(group)
+
+        codes = dataset.codes(group).astype(np.int64)
+        seconds = dataset.column(time_field).astype('datetime64[s]').astype(np.int64)
+        order = np.lexsort((seconds, codes))
+        codes, seconds = codes[order], seconds[order]
+        values = {name: dataset.column(name)[order].astype(float) for name in self.fields}
+        self.levels = {'raw': _Level(codes, seconds, values, values, values, len(self.group_names))}
+
+        for name, width in RESOLUTIONS.items():
+            bins = _bin_starts(seconds, width)
+            change = (codes[1:] != codes[:-1]) | (bins[1:] != bins[:-1])
+            starts = np.concatenate([[0], np.flatnonzero(change) + 1]) if len(codes) else np.empty(0, np.int64)
+            counts = np.diff(np.append(starts, len(codes)))
+            mean = {f: np.add.reduceat(v, starts) / counts for f, v in values.items()} if len(starts) else values
+            low = {f: np.minimum.reduceat(v, starts) for f, v in values.items()} if len(starts) else values
+            high = {f: np.maximum.reduceat(v, starts) for f, v in values.items()} if len(starts) else values
+            self.levels[name] = _Level(codes[starts], bins[starts], mean, low, high, len(self.group_names), width)
+
+    def _choose_level(self, groups: List[int], start, end, points: int) -> str:
+        budget = points * OVERSAMPLE
+        for name in ['raw', *RESOLUTIONS]:
+            level = self.levels[name]
+            spans = [level.span(g, start, end) for g in groups]
+            largest = max((span.stop - span.start for span in spans), default=0)
+            if largest <= budget:
+                return name
+        return 'week'
+
+    def query(self, field: str, groups: Optional[Sequence[str]] = None,
+              start: Optional[np.datetime64] = None, end: Optional[np.datetime64] = None,
+              points: int = 500, method: str = 'lttb', resolution: str = 'auto') -> Dict:
+        """Downsampled series per group for start <= day <= end"""
+        if field not in self.fields:
+            raise QueryError(f"Unknown series field '{field}'")
+        if method not in ('lttb', 'minmax'):
+            raise QueryError("method must be 'lttb' or 'minmax'")
+        if resolution != 'auto' and resolution not in self.levels:
+            raise QueryError(f"resolution must be one of auto, {', '.join(self.levels)}")
+        lookup = {name: code for code, name in enumerate(self.group_names)}
+        if groups:
+            unknown = [name for name in groups if name not in lookup]
+            if unknown:
+                raise QueryError(f"Unknown {self.group}: {', '.join(unknown)}")
+            codes = [lookup[name] for name in groups]
+        else:
+            codes = list(range(len(self.group_names)))
+
+        lo = None if start is None else int(np.datetime64(start, 's').astype(np.int64))
+        hi = None if end is None else int((np.datetime64(end, 'D') + 1).astype('datetime64[s]').astype(np.int64))
+        level_name = self._choose_level(codes, lo, hi, points) if resolution == 'auto' else resolution
+        level = self.levels[level_name]
+        unit = 'm' if level_name in ('raw', 'hour') else 'D'
+
+        series = []
+        for code in codes:
+            window = level.span(code, lo, hi)
+            times = level.times[window]
+            mean = level.mean[field][window]
+            if len(times) <= points:
+                keep, values = np.arange(len(times)), mean
+            elif method == 'minmax':
+                keep, values = minmax(level.low[field][window], level.high[field][window], points)
+            else:
+                keep = lttb(times, mean, points)
+                values = mean[keep]
+            series.append({
+                self.group: self.group_names[code],
+                'x': np.datetime_as_string(times[keep].astype('datetime64[s]'), unit=unit).tolist(),
+                'y': np.round(values, 3).tolist(),
+            })
+        return {'field': field, 'resolution': level_name, 'method': method, 'points': points,
+                'series': series}
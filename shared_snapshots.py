@@ -0,0 +1,285 @@
+import atexit
+import fcntl
+import json
+import os
+import sys
+import tempfile
+import threading
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from columnar import ColumnarDataset
+
+# Column buffers start on cache-line boundaries
+_ALIGN = 64
+# SharedMemory(track=False) exists from Python 3.13; before that segments are unregistered by hand
+_TRACK_PARAM = sys.version_info >= (3, 13)
+
+
+def _aligned(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _untracked(name: str, create: bool = False, size: int = 0) -> shared_memory.SharedMemory:
+    """Create or map a segment without handing it to the resource tracker.
+
+    The tracker would unlink the segment when the process that registered it
+    exits, pulling it from under every other worker; segments are unlinked
+    explicitly instead.
+    """
+    if _TRACK_PARAM:
+        return shared_memory.SharedMemory(name=name, create=create, size=size, track=False)
+    segment = shared_memory.SharedMemory(name=name, create=create, size=size)
+    resource_tracker.unregister(segment._name, 'shared_memory')
+    return segment
+
+
+def _unlink(segment: shared_memory.SharedMemory):
+    """Remove a segment's name, tolerating one already removed by an earlier producer"""
+    if not _TRACK_PARAM:
+        resource_tracker.register(segment._name, 'shared_memory')  # unlink() unregisters it again
+    try:
+        segment.unlink()
+    except FileNotFoundError:
+        if not _TRACK_PARAM:
+            resource_tracker.unregister(segment._name, 'shared_memory')
+
+
+def _encode_text(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Character offsets (n + 1) and UTF-8 bytes of a string column; variable width, unlike '<U'"""
+    strings = [str(value) for value in values]
+    offsets = np.zeros(len(strings) + 1, dtype=np.int64)
+    np.cumsum([len(string) for string in strings], out=offsets[1:])
+    return offsets, np.frombuffer(''.join(strings).encode('utf-8'), dtype=np.uint8)
+
+
+def _decode_text(segment: shared_memory.SharedMemory, data_offset: int, column: Dict) -> np.ndarray:
+    offsets = np.ndarray((column['shape'][0] + 1,), dtype=np.int64, buffer=segment.buf,
+                         offset=data_offset + column['offset'])
+    start = data_offset + column['text_offset']
+    text = bytes(segment.buf[start:start + column['text_bytes']]).decode('utf-8')
+    values = np.empty(column['shape'][0], dtype=object)
+    values[:] = [text[begin:end] for begin, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+    return values
+
+
+def _open_segment(segment: shared_memory.SharedMemory) -> ColumnarDataset:
+    """Read-only dataset whose columns are NumPy views over a published segment.
+
+    Layout: 8-byte header length, JSON header, then each column's buffer at
+    its header offset from the first aligned byte after the header. Text
+    columns are stored as int64 character offsets plus one UTF-8 buffer and
+    decoded into Python strings when mapped.
+    """
+    header = int.from_bytes(segment.buf[:8], 'little')
+    meta = json.loads(bytes(segment.buf[8:8 + header]))
+    data_offset = _aligned(8 + header)
+    columns = {}
+    for column in meta['columns']:
+        if column['dtype'] == 'text':
+            columns[column['name']] = _decode_text(segment, data_offset, column)
+            continue
+        values = np.ndarray(tuple(column['shape']), dtype=np.dtype(column['dtype']),
+                            buffer=segment.buf, offset=data_offset + column['offset'])
+        values.flags.writeable = False
+        if column['name'] in meta['categories']:
+            values = pd.Categorical.from_codes(values, meta['categories'][column['name']])
+        columns[column['name']] = values
+    return ColumnarDataset(columns, categorical=meta['categories'], dates=meta['dates'])
+
+
+class SharedSnapshots:
+    """Immutable, versioned dataset snapshots in POSIX shared memory.
+
+    One producer process, elected with an exclusive flock so another process
+    can take over if it exits, copies every new snapshot of a dataset into a
+    fresh segment '<namespace>-<key>-<version>' and only then bumps the key's
+    8-byte version word in a small control segment. Readers check that word,
+    map the new segment and build the dataset from read-only NumPy views, so
+    memory stays constant in the number of workers and every worker serves
+    the same data. Published segments are never written again; the producer
+    unlinks versions older than the previous one, and mappings a process no
+    longer uses are closed once no array refers to them.
+    """
+
+    def __init__(self, namespace: str, lock_dir: Optional[str] = None):
+        self.namespace = namespace
+        self._lock_path = os.path.join(lock_dir or tempfile.gettempdir(), f"{namespace}.producer.lock")
+        self._lock = threading.Lock()
+        self._producer_pid = None
+        self._lock_handle = None
+        self._controls: Dict[str, np.ndarray] = {}
+        self._control_segments: Dict[str, shared_memory.SharedMemory] = {}
+        self._attached: Dict[str, Tuple[int, ColumnarDataset]] = {}
+        self._segments: Dict[str, Dict[int, shared_memory.SharedMemory]] = {}
+        self._retired: List[shared_memory.SharedMemory] = []
+
+    def _segment_name(self, key: str, version: int) -> str:
+        return f"{self.namespace}-{key}-{version}"
+
+    @property
+    def is_producer(self) -> bool:
+        # A forked child inherits the flag but not the role
+        return self._producer_pid == os.getpid()
+
+    def try_produce(self) -> bool:
+        """Become the producer if no live process holds the role"""
+        with self._lock:
+            if self.is_producer:
+                return True
+            handle = open(self._lock_path, 'a')
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                handle.close()
+                return False
+            self._lock_handle = handle
+            self._producer_pid = os.getpid()
+            atexit.register(self._unlink_published)
+            return True
+
+    def _unlink_published(self):
+        # Readers keep their existing mappings; a new producer publishes fresh versions
+        if not self.is_producer:
+            return
+        with self._lock:
+            for segments in self._segments.values():
+                for segment in segments.values():
+                    _unlink(segment)
+            self._segments.clear()
+
+    def _control(self, key: str, create: bool = False) -> Optional[np.ndarray]:
+        control = self._controls.get(key)
+        if control is not None:
+            return control
+        name = f"{self.namespace}-{key}"
+        try:
+            segment = _untracked(name)
+        except FileNotFoundError:
+            if not create:
+                return None
+            try:
+                # Outlives this producer so readers keep polling the same word after a takeover
+                segment = _untracked(name, create=True, size=8)
+            except FileExistsError:
+                segment = _untracked(name)
+        control = np.ndarray((1,), dtype='<u8', buffer=segment.buf)
+        self._control_segments[key] = segment
+        self._controls[key] = control
+        return control
+
+    def version(self, key: str) -> int:
+        """Latest published version of key, 0 if none"""
+        with self._lock:
+            control = self._control(key)
+            return 0 if control is None else int(control[0])
+
+    def publish(self, key: str, dataset: ColumnarDataset) -> Tuple[ColumnarDataset, int]:
+        """Copy dataset into a new segment and make it the current version (producer only).
+
+        Returns the shared read-only view, which the producer should serve in
+        place of its private copy, and its version.
+        """
+        if not self.is_producer:
+            raise RuntimeError('Only the producer process publishes snapshots')
+        columns, layout, size = [], [], 0
+        categories = {}
+        for name in dataset.columns:
+            if name in dataset.categorical:
+                values = dataset.codes(name)
+                categories[name] = dataset.categories(name)
+            else:
+                values = dataset.column(name)
+            if values.dtype == object:
+                offsets, text = _encode_text(values)
+                text_offset = _aligned(size + offsets.nbytes)
+                columns.append({'name': name, 'dtype': 'text', 'shape': [len(values)], 'offset': size,
+                                'text_offset': text_offset, 'text_bytes': text.nbytes})
+                layout += [(offsets, size), (text, text_offset)]
+                size = _aligned(text_offset + text.nbytes)
+                continue
+            values = np.ascontiguousarray(values)
+            columns.append({'name': name, 'dtype': values.dtype.str, 'shape': list(values.shape), 'offset': size})
+            layout.append((values, size))
+            size = _aligned(size + values.nbytes)
+        header = json.dumps({'key': key, 'rows': len(dataset), 'columns': columns,
+                             'categories': categories, 'dates': sorted(dataset.dates)}).encode()
+        data_offset = _aligned(8 + len(header))
+
+        with self._lock:
+            control = self._control(key, create=True)
+            version = int(control[0]) + 1
+            while True:
+                try:
+                    segment = _untracked(self._segment_name(key, version), create=True,
+                                         size=max(data_offset + size, 1))
+                    break
+                except FileExistsError:
+                    version += 1  # left behind by a previous producer
+            segment.buf[:8] = len(header).to_bytes(8, 'little')
+            segment.buf[8:8 + len(header)] = header
+            for values, offset in layout:
+                target = np.ndarray(values.shape, dtype=values.dtype, buffer=segment.buf,
+                                    offset=data_offset + offset)
+                target[...] = values
+                del target
+            shared = _open_segment(segment)
+            control[0] = version
+            self._swap(key, version, segment, shared, unlink=True)
+            return shared, version
+
+    def current(self, key: str) -> Optional[Tuple[ColumnarDataset, int]]:
+        """Latest published snapshot of key and its version, or None if nothing is published"""
+        with self._lock:
+            control = self._control(key)
+            attached = self._attached.get(key)
+            if control is None:
+                return None if attached is None else (attached[1], attached[0])
+            version = int(control[0])
+            if attached is not None and attached[0] == version:
+                return attached[1], version
+            segment = None
+            while version and segment is None:
+                try:
+                    segment = _untracked(self._segment_name(key, version))
+                except FileNotFoundError:
+                    # Unlinked by a newer publish, or by a producer that exited
+                    newer = int(control[0])
+                    version = newer if newer != version else 0
+            if segment is None:
+                return None if attached is None else (attached[1], attached[0])
+            shared = _open_segment(segment)
+            self._swap(key, version, segment, shared, unlink=False)
+            return shared, version
+
+    def _swap(self, key: str, version: int, segment: shared_memory.SharedMemory,
+              shared: ColumnarDataset, unlink: bool):
+        segments = self._segments.setdefault(key, {})
+        segments[version] = segment
+        self._attached[key] = (version, shared)
+        for old in [v for v in segments if v < version - 1 or (not unlink and v < version)]:
+            previous = segments.pop(old)
+            if unlink:
+                _unlink(previous)
+            self._retired.append(previous)
+        # Close mappings that no dataset refers to any more
+        still_mapped = []
+        for previous in self._retired:
+            try:
+                previous.close()
+            except BufferError:
+                still_mapped.append(previous)
+        self._retired = still_mapped
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'namespace': self.namespace,
+                'role': 'producer' if self.is_producer else 'reader',
+                'pid': os.getpid(),
+                'versions': {key: version for key, (version, _) in self._attached.items()},
+                'mapped_bytes': sum(segment.size for segments in self._segments.values()
+                                    for segment in segments.values()),
+                'retired_mappings': len(self._retired),
+            }
@@ -0,0 +1,187 @@
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+from query import QueryError
+from data.synthetic import station_coordinates
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Great-circle distance in km (broadcasts over arrays)"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def parse_bbox(value: str) -> Tuple[float, float, float, float]:
+    """'min_lat,min_lon,max_lat,max_lon'; min_lon > max_lon crosses the antimeridian"""
+    try:
+        min_lat, min_lon, max_lat, max_lon = (float(part) for part in value.split(','))
+    except ValueError:
+        raise QueryError('bbox must be min_lat,min_lon,max_lat,max_lon')
+    if not -90 <= min_lat <= max_lat <= 90 or not (-180 <= min_lon <= 180 and -180 <= max_lon <= 180):
+        raise QueryError('bbox is outside -90..90 latitude / -180..180 longitude, or min_lat > max_lat')
+    return min_lat, min_lon, max_lat, max_lon
+
+
+def parse_point(lat: Optional[str], lon: Optional[str]) -> Tuple[float, float]:
+    try:
+        point = float(lat), float(lon)
+    except (TypeError, ValueError):
+        raise QueryError('lat and lon must be numbers')
+    if not (-90 <= point[0] <= 90 and -180 <= point[1] <= 180):
+        raise QueryError('lat must be within -90..90 and lon within -180..180')
+    return point
+
+
+class StationRegistry:
+    """Station names and coordinates with a uniform latitude/longitude grid index.
+
+    Stations are sorted by grid cell (row-major, cell_degrees square) with a
+    dense offsets array over all cells, so the stations of a run of cells in
+    one grid row are one contiguous slice. A bounding box therefore costs
+    one slice per grid row it spans plus an exact check of the candidates;
+    radius queries search the circle's bounding box, and nearest-station
+    lookups grow a square of cells until it holds enough candidates, then
+    run an exact radius query out to the k-th candidate's distance.
+    """
+
+    def __init__(self, names: Sequence[str], lat: np.ndarray, lon: np.ndarray, cell_degrees: float = 1.0):
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        known = np.isfinite(lat) & np.isfinite(lon)
+        self.names = [name for name, keep in zip(names, known) if keep]
+        self.lat = lat[known]
+        self.lon = (lon[known] + 180.0) % 360.0 - 180.0
+        self._ids = {name: i for i, name in enumerate(self.names)}
+        self.cell_degrees = cell_degrees
+        self.n_rows = int(np.ceil(180.0 / cell_degrees))
+        self.n_cols = int(np.ceil(360.0 / cell_degrees))
+
+        cells = self._rows(self.lat) * self.n_cols + self._cols(self.lon)
+        self._order = np.argsort(cells, kind='stable')
+        self._offsets = np.searchsorted(cells[self._order], np.arange(self.n_rows * self.n_cols + 1))
+        # Coordinates in cell order, so candidate checks read contiguous memory
+        self._lat = self.lat[self._order]
+        self._lon = self.lon[self._order]
+
+    @classmethod
+    def from_names(cls, names: Sequence[str], cell_degrees: float = 1.0) -> 'StationRegistry':
+        """Registry of the names with known positions (see data.synthetic.station_coordinates)"""
+        lat, lon = station_coordinates(list(names))
+        return cls(names, lat, lon, cell_degrees)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._ids
+
+    def position(self, name: str) -> Optional[Tuple[float, float]]:
+        i = self._ids.get(name)
+        return None if i is None else (float(self.lat[i]), float(self.lon[i]))
+
+    def _rows(self, lat) -> np.ndarray:
+        return np.clip(np.floor((np.asarray(lat) + 90.0) / self.cell_degrees).astype(np.int64), 0, self.n_rows - 1)
+
+    def _cols(self, lon) -> np.ndarray:
+        return np.floor((np.asarray(lon) + 180.0) / self.cell_degrees).astype(np.int64) % self.n_cols
+
+    def _candidates(self, row_lo: int, row_hi: int, col_lo: int, col_hi: int) -> np.ndarray:
+        """Positions (in cell order) of stations in grid rows row_lo..row_hi and columns col_lo..col_hi.
+
+        col_lo > col_hi wraps around the antimeridian.
+        """
+        spans = [(col_lo, col_hi)] if col_lo <= col_hi else [(col_lo, self.n_cols - 1), (0, col_hi)]
+        row_starts = np.arange(row_lo, row_hi + 1) * self.n_cols
+        starts = np.concatenate([self._offsets[row_starts + lo] for lo, _ in spans])
+        stops = np.concatenate([self._offsets[row_starts + hi + 1] for _, hi in spans])
+        lengths = stops - starts
+        total = int(lengths.sum())
+        if not total:
+            return np.empty(0, dtype=np.int64)
+        return np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+
+    def in_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> np.ndarray:
+        """Sorted ids of stations inside the box (min_lon > max_lon crosses the antimeridian)"""
+        if not len(self):
+            return np.empty(0, dtype=np.int64)
+        col_lo, col_hi = int(self._cols(min_lon)), int(self._cols(max_lon))
+        # A wrapping box whose ends share a column touches every column
+        if max_lon - min_lon >= 360.0 or (min_lon > max_lon and col_lo <= col_hi):
+            col_lo, col_hi = 0, self.n_cols - 1
+        positions = self._candidates(int(self._rows(min_lat)), int(self._rows(max_lat)), col_lo, col_hi)
+        lat, lon = self._lat[positions], self._lon[positions]
+        keep = (lat >= min_lat) & (lat <= max_lat)
+        if min_lon <= max_lon:
+            keep &= (lon >= min_lon) & (lon <= max_lon)
+        else:
+            keep &= (lon >= min_lon) | (lon <= max_lon)
+        return np.sort(self._order[positions[keep]])
+
+    def _circle_candidates(self, lat: float, lon: float, radius_km: float) -> np.ndarray:
+        angle = radius_km / EARTH_RADIUS_KM
+        dlat = np.degrees(angle)
+        row_lo, row_hi = int(self._rows(lat - dlat)), int(self._rows(lat + dlat))
+        # Longitude half-width of the circle's bounding box; the whole band near a pole or for huge radii
+        if angle >= np.pi / 2 or abs(lat) + dlat >= 90.0:
+            return self._candidates(row_lo, row_hi, 0, self.n_cols - 1)
+        dlon = np.degrees(np.arcsin(np.sin(angle) / np.cos(np.radians(lat))))
+        if 2 * dlon + self.cell_degrees >= 360.0:
+            return self._candidates(row_lo, row_hi, 0, self.n_cols - 1)
+        return self._candidates(row_lo, row_hi, int(self._cols(lon - dlon)), int(self._cols(lon + dlon)))
+
+    def within(self, lat: float, lon: float, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Ids and distances (km) of stations within radius_km of a point, nearest first"""
+        if not len(self) or radius_km < 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        positions = self._circle_candidates(lat, lon, radius_km)
+        distances = haversine_km(lat, lon, self._lat[positions], self._lon[positions])
+        keep = distances <= radius_km
+        positions, distances = positions[keep], distances[keep]
+        order = np.argsort(distances, kind='stable')
+        return self._order[positions[order]], distances[order]
+
+    def nearest(self, lat: float, lon: float, k: int = 1,
+                max_km: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Ids and distances (km) of the k stations nearest a point, nearest first"""
+        if not len(self) or k < 1:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        k = min(k, len(self))
+        row, col = int(self._rows(lat)), int(self._cols(lon))
+        reach = 0
+        while True:
+            whole = 2 * reach + 1 >= self.n_cols
+            positions = self._candidates(max(row - reach, 0), min(row + reach, self.n_rows - 1),
+                                         0 if whole else (col - reach) % self.n_cols,
+                                         self.n_cols - 1 if whole else (col + reach) % self.n_cols)
+            if len(positions) >= k:
+                break
+            reach = max(1, reach * 2)
+        # The square holds k stations, so the true k nearest lie within the k-th of these
+        distances = haversine_km(lat, lon, self._lat[positions], self._lon[positions])
+        bound = np.partition(distances, k - 1)[k - 1]
+        if max_km is not None:
+            bound = min(bound, max_km)
+        ids, distances = self.within(lat, lon, bound)
+        return ids[:k], distances[:k]
+
+    def nearest_join(self, names: Sequence[str], max_km: Optional[float] = None) -> Dict[str, Tuple[str, float]]:
+        """name -> (nearest station in this registry, distance km) for every name with a known position"""
+        lat, lon = station_coordinates(list(names))
+        joined = {}
+        for name, point_lat, point_lon in zip(names, lat, lon):
+            if np.isnan(point_lat):
+                continue
+            ids, distances = self.nearest(point_lat, point_lon, 1, max_km)
+            if len(ids):
+                joined[name] = (self.names[ids[0]], float(distances[0]))
+        return joined
+
+    def describe(self, ids: np.ndarray, distances: Optional[np.ndarray] = None) -> List[Dict]:
+        stations = [{'name': self.names[i], 'lat': round(float(self.lat[i]), 4), 'lon': round(float(self.lon[i]), 4)}
+                    for i in ids]
+        if distances is not None:
+            for station, distance in zip(stations, distances):
+                station['distance_km'] = round(float(distance), 2)
+        return stations
@@ -357,9 +357,10 @@ async function runAIAnalysis() {
     button.disabled = true;
     
     try {
-        // Simulate API call
-        const response = await fetch('/api/run-analysis');
-        const result = await response.json();
+        // Queue the analysis, then poll the job until it finishes
+        const response = await fetch('/api/run-advanced-analysis', { method: 'POST' });
+        const job = await response.json();
+        const result = await pollJob(job.status_url);
         
         // Display results
         resultsDiv.innerHTML = `
@@ -392,6 +393,19 @@ async function runAIAnalysis() {
     }
 }
 
+async function pollJob(statusUrl, intervalMs = 1000) {
+    while (true) {
+        const response = await fetch(statusUrl);
+        if (!response.ok) throw new Error('Analysis job expired');
+        const job = await response.json();
+        if (job.status === 'completed') return job.result;
+        if (job.status === 'failed' || job.status === 'cancelled') {
+            throw new Error(job.error || 'Analysis job failed');
+        }
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+    }
+}
+
 function loadDynamicContent() {
     // Load real-time data updates
     updateRealTimeData();
@@ -0,0 +1,271 @@
+import fcntl
+import json
+import os
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, List, Optional
+from columnar import ColumnarDataset
+
+MANIFEST = '_manifest.json'
+PART_META = '_part.json'
+
+
+def _write_json(path: str, payload: Dict):
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(payload, f)
+    os.replace(tmp, path)
+
+
+def _read_json(path: str) -> Dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def _encode_text(values: np.ndarray):
+    """UTF-8 byte offsets (n + 1) and bytes of a string column; variable width, unlike '<U'"""
+    encoded = [str(value).encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+
+def _decode_text(offsets: np.ndarray, data: np.ndarray) -> np.ndarray:
+    """Strings between consecutive byte offsets into data (data starts at offsets[0])"""
+    raw = data.tobytes()
+    bounds = (offsets - offsets[0]).tolist()
+    text = raw.decode('utf-8')
+    values = np.empty(len(bounds) - 1, dtype=object)
+    if len(text) == len(raw):
+        # ASCII: byte offsets index the decoded text directly
+        values[:] = [text[begin:end] for begin, end in zip(bounds[:-1], bounds[1:])]
+    else:
+        values[:] = [raw[begin:end].decode('utf-8') for begin, end in zip(bounds[:-1], bounds[1:])]
+    return values
+
+
+def _partition_days(values: np.ndarray) -> np.ndarray:
+    """Calendar day of each value (dates, datetimes or 'YYYY-MM-DD[ HH:MM:SS]' strings)"""
+    return np.asarray(values).astype('datetime64[s]').astype('datetime64[D]')
+
+
+class TimeSeriesStore:
+    """Append-only, date-partitioned columnar store on local disk.
+
+    Each append writes immutable column files (.npy) under
+    <root>/<dataset>/date=YYYY-MM-DD/part-NNNNNN/. A part becomes visible to
+    readers only once the manifest (replaced atomically) lists it, so a
+    reader never sees half of an append. compact() folds all parts into one
+    date-sorted snapshot segment with a date -> row-range index; it runs
+    automatically once compact_parts parts are pending. Readers memory-map
+    the files, so every process serving the same store shares the same
+    page-cache pages, and reads of a single segment (a snapshot date range,
+    or one part) are zero-copy views. String columns are stored as byte
+    offsets plus one UTF-8 buffer and decoded into Python strings on load.
+    """
+
+    def __init__(self, root: str, compact_parts: Optional[int] = 64):
+        self.root = root
+        self.compact_parts = compact_parts
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _dataset_dir(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    @contextmanager
+    def _writer_lock(self, name: str):
+        """Serialize writers across threads and worker processes"""
+        os.makedirs(self._dataset_dir(name), exist_ok=True)
+        with self._lock, open(os.path.join(self._dataset_dir(name), '.lock'), 'w') as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _manifest(self, name: str) -> Dict:
+        path = os.path.join(self._dataset_dir(name), MANIFEST)
+        if not os.path.exists(path):
+            return {'next_part': 1, 'snapshot': None, 'parts': []}
+        return _read_json(path)
+
+    # Writing
+
+    def append(self, name: str, dataset: ColumnarDataset, partition_field: str):
+        """Persist dataset rows as new parts, one per date partition"""
+        if not len(dataset):
+            return
+        with self._writer_lock(name):
+            self._append(name, dataset, partition_field)
+
+    def load_or_create(self, name: str, build: Callable[[], ColumnarDataset],
+                       partition_field: str) -> ColumnarDataset:
+        """Load a dataset, building and persisting it first if the store has none.
+
+        The check, build and append happen under the dataset's writer lock,
+        so when several workers start on an empty store exactly one builds
+        it and the others load what it wrote.
+        """
+        dataset = self.load(name)
+        if dataset is not None:
+            return dataset
+        with self._writer_lock(name):
+            dataset = self._load(name, None, None)
+            if dataset is not None:
+                return dataset  # another process built it while we waited for the lock
+            dataset = build()
+            self._append(name, dataset, partition_field)
+            self._compact(name)  # a bulk load reads back as one memory-mapped segment
+        return self.load(name) if len(dataset) else dataset
+
+    def _append(self, name: str, dataset: ColumnarDataset, partition_field: str):
+        # Called with the writer lock held
+        manifest = self._manifest(name)
+        days = _partition_days(dataset.column(partition_field))
+        for day in np.unique(days):
+            rows = np.flatnonzero(days == day)
+            seq = manifest['next_part']
+            manifest['next_part'] = seq + 1
+            part = os.path.join(f"date={day}", f"part-{seq:06d}")
+            self._write_segment(os.path.join(self._dataset_dir(name), part),
+                                dataset.take(rows), {'seq': seq, 'partition_field': partition_field})
+            manifest['parts'].append(part)
+        # Publishing the manifest is what makes the new parts visible
+        _write_json(os.path.join(self._dataset_dir(name), MANIFEST), manifest)
+        if self.compact_parts and len(manifest['parts']) >= self.compact_parts:
+            self._compact(name)
+
+    def _write_segment(self, path: str, dataset: ColumnarDataset, meta: Dict):
+        parent = os.path.dirname(path)
+        os.makedirs(parent, exist_ok=True)
+        tmp = os.path.join(parent, f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(tmp)
+        meta = dict(meta, rows=len(dataset), columns=dataset.columns, categories={},
+                    dates=sorted(dataset.dates), text=[])
+        for column in dataset.columns:
+            if column in dataset.categorical:
+                values = dataset.codes(column)
+                meta['categories'][column] = dataset.categories(column)
+            else:
+                values = dataset.column(column)
+                if values.dtype == object:
+                    # Offsets plus one UTF-8 buffer stay mmap-able without padding every row to the longest
+                    offsets, data = _encode_text(values)
+                    np.save(os.path.join(tmp, f"{column}.offsets.npy"), offsets)
+                    np.save(os.path.join(tmp, f"{column}.utf8.npy"), data)
+                    meta['text'].append(column)
+                    continue
+            np.save(os.path.join(tmp, f"{column}.npy"), np.ascontiguousarray(values))
+        _write_json(os.path.join(tmp, PART_META), meta)
+        if os.path.exists(path):
+            shutil.rmtree(path)  # left by a writer that died before publishing its manifest
+        os.rename(tmp, path)
+
+    # Reading
+
+    def _parts(self, name: str, manifest: Dict) -> List[str]:
+        """Published part directories not yet folded into the snapshot, oldest first"""
+        return [os.path.join(self._dataset_dir(name), part) for part in manifest['parts']]
+
+    @staticmethod
+    def _open_segment(path: str, start: Optional[int] = None, stop: Optional[int] = None) -> ColumnarDataset:
+        meta = _read_json(os.path.join(path, PART_META))
+        columns = {}
+        for column in meta['columns']:
+            if column in meta.get('text', ()):
+                offsets = np.load(os.path.join(path, f"{column}.offsets.npy"), mmap_mode='r')
+                offsets = offsets[start or 0:None if stop is None else stop + 1]
+                data = np.load(os.path.join(path, f"{column}.utf8.npy"), mmap_mode='r')[offsets[0]:offsets[-1]]
+                columns[column] = _decode_text(offsets, data)
+                continue
+            values = np.load(os.path.join(path, f"{column}.npy"), mmap_mode='r')[start:stop]
+            if column in meta['categories']:
+                values = pd.Categorical.from_codes(values, meta['categories'][column])
+            columns[column] = values
+        return ColumnarDataset(columns, categorical=meta['categories'], dates=meta['dates'])
+
+    def load(self, name: str, start: Optional[str] = None, end: Optional[str] = None) -> Optional[ColumnarDataset]:
+        """Memory-mapped dataset for an optional inclusive date range, or None if empty"""
+        for attempt in range(3):
+            try:
+                return self._load(name, start, end)
+            except FileNotFoundError:
+                # A concurrent compaction removed files we were about to map
+                if attempt == 2:
+                    raise
+
+    def _load(self, name: str, start: Optional[str], end: Optional[str]) -> Optional[ColumnarDataset]:
+        manifest = self._manifest(name)
+        pieces = []
+        if manifest['snapshot'] is not None:
+            path = os.path.join(self._dataset_dir(name), manifest['snapshot'])
+            index = _read_json(os.path.join(path, PART_META))['date_index']
+            days = [day for day in index if (start is None or day >= start) and (end is None or day <= end)]
+            if days:
+                pieces.append(self._open_segment(path, index[days[0]][0], index[days[-1]][1]))
+        for part in self._parts(name, manifest):
+            day = os.path.basename(os.path.dirname(part))[len('date='):]
+            if (start is None or day >= start) and (end is None or day <= end):
+                pieces.append(self._open_segment(part))
+        if not pieces:
+            return None
+        dataset = pieces[0]
+        for piece in pieces[1:]:
+            dataset = dataset.concat(piece)
+        return dataset
+
+    # Maintenance
+
+    def compact(self, name: str) -> int:
+        """Fold all parts into a new date-sorted snapshot; returns rows in the snapshot"""
+        with self._writer_lock(name):
+            return self._compact(name)
+
+    def _compact(self, name: str) -> int:
+        # Called with the writer lock held
+        manifest = self._manifest(name)
+        parts = self._parts(name, manifest)
+        if not parts:
+            return 0
+        dataset = self._load(name, None, None)
+        partition_field = _read_json(os.path.join(parts[0], PART_META))['partition_field']
+        days = _partition_days(dataset.column(partition_field))
+        order = np.argsort(days, kind='stable')
+        dataset = dataset.take(order)
+        days = days[order]
+        unique_days, first = np.unique(days, return_index=True)
+        bounds = np.append(first, len(days))
+        date_index = {str(day): [int(bounds[i]), int(bounds[i + 1])] for i, day in enumerate(unique_days)}
+
+        folded_parts = int(os.path.basename(parts[-1])[5:])
+        snapshot = f"snapshot-{folded_parts:06d}"
+        self._write_segment(os.path.join(self._dataset_dir(name), snapshot), dataset,
+                            {'partition_field': partition_field, 'date_index': date_index})
+        previous = manifest['snapshot']
+        manifest.update(snapshot=snapshot, parts=[])
+        _write_json(os.path.join(self._dataset_dir(name), MANIFEST), manifest)
+
+        # Readers that already mapped the old files keep them alive until they unmap
+        if previous is not None:
+            shutil.rmtree(os.path.join(self._dataset_dir(name), previous), ignore_errors=True)
+        for part in parts:
+            shutil.rmtree(part, ignore_errors=True)
+            partition = os.path.dirname(part)
+            if os.path.isdir(partition) and not os.listdir(partition):
+                os.rmdir(partition)
+        return len(dataset)
+
+
+if __name__ == '__main__':
+    import sys
+    # Usage: python storage.py <store_root> [dataset ...]  -- compacts the named (or all) datasets
+    store = TimeSeriesStore(sys.argv[1])
+    names = sys.argv[2:] or sorted(name for name in os.listdir(store.root)
+                                   if os.path.isdir(os.path.join(store.root, name)))
+    for name in names:
+        print(f"{name}: compacted {store.compact(name)} rows")
@@ -0,0 +1,19 @@
+import numpy as np
+
+from anomaly import AnomalyDetector
+
+
+def test_recent_count_includes_alerts_past_the_retained_log():
+    now = 1_700_000_000.0
+    detector = AnomalyDetector(parameters=('temperature',), warmup=2, max_alerts=3, clock=lambda: now)
+    times = now - 600 + np.arange(40.0)
+    values = np.full(40, 28.0)
+    values[10::2] = 40.0  # every other reading after warmup spikes
+    for time, value in zip(times, values):
+        detector.update(['S1'], [[value]], [time])
+
+    flagged = detector.stats()['flagged']
+    assert flagged > 3
+    assert len(detector.alerts(limit=100)) == 3
+    assert detector.recent_count() == flagged
+    assert detector.recent_count(window=30) == 0
@@ -0,0 +1,36 @@
+import uuid
+
+from config import Config
+from data_ingestion import RealTimeDataIngestion
+
+
+def test_shared_workers_report_the_producers_versions():
+    class SharedConfig(Config):
+        DATA_STORE_PATH = None
+        SHARED_SNAPSHOTS = f"test-{uuid.uuid4().hex[:8]}"
+
+    producer = RealTimeDataIngestion(SharedConfig)
+    reader = RealTimeDataIngestion(SharedConfig)
+    producer.get_oceanographic_dataset()
+    # The reader's local cache has stored fewer snapshots than the producer has published
+    producer.append_records('ocean_data', producer.get_oceanographic_dataset().to_records()[:1])
+
+    versions, _ = reader.snapshot_state(['ocean_data'])
+    assert versions == producer.snapshot_state(['ocean_data'])[0] == (producer.shared.version('ocean_data'),)
+    assert reader.get_index('ocean_data')[1] == versions[0]
+    assert reader.version('ocean_data') == versions[0]
+
+
+def test_station_registry_per_dataset():
+    class LocalConfig(Config):
+        DATA_STORE_PATH = None
+        SHARED_SNAPSHOTS = None
+
+    ingestor = RealTimeDataIngestion(LocalConfig)
+    ocean = ingestor.get_station_registry('ocean_data')
+
+    assert set(ocean.names) == set(ingestor.get_oceanographic_dataset().categories('location'))
+    # Kerala Coast is closest to this point overall, but has no ocean rows
+    [picked], _ = ocean.nearest(10.0, 76.0, 1)
+    assert ocean.names[picked] != 'Kerala Coast'
+    assert 'Kerala Coast' in ingestor.get_station_registry().names
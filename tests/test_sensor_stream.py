@@ -0,0 +1,32 @@
+import queue
+
+from sensor_stream import SensorBroadcaster
+
+
+def test_failing_producer_does_not_stop_later_deltas():
+    ticks = iter([
+        [{'sensor_id': 'S1', 'temperature': 28.0}],
+        OSError('sensor bus unavailable'),
+        [{'sensor_id': 'S1', 'temperature': 28.4}],
+    ])
+
+    def producer():
+        reading = next(ticks, None)
+        if isinstance(reading, Exception):
+            raise reading
+        return reading or [{'sensor_id': 'S1', 'temperature': 28.4}]
+
+    broadcaster = SensorBroadcaster(producer, interval=0.05, heartbeat=1.0)
+    subscription = broadcaster.subscribe()
+    try:
+        first = subscription.queue.get(timeout=2)
+        second = subscription.queue.get(timeout=2)
+    except queue.Empty:
+        raise AssertionError('broadcaster stopped after the producer failed')
+    finally:
+        broadcaster.unsubscribe(subscription)
+        broadcaster.stop()
+
+    assert first[1] == [{'sensor_id': 'S1', 'temperature': 28.0}]
+    assert second[0] == first[0] + 1
+    assert second[1] == [{'temperature': 28.4, 'sensor_id': 'S1'}]
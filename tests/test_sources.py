@@ -0,0 +1,235 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from sources import CSVFeedSource, IngestionPipeline, JSONFeedSource
+
+
+class FeedStub(ThreadingHTTPServer):
+    """Local feed server; routes maps a path to a list of responses served in turn (the last repeats).
+
+    A response is (status, body) or (status, body, delay_seconds).
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FeedHandler)
+        self.routes = {}
+        self.requests = []
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server_address[1]}{path}"
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        self.server.requests.append((parsed.path, parse_qs(parsed.query)))
+        responses = self.server.routes.get(parsed.path, [(404, '')])
+        status, body, *delay = responses.pop(0) if len(responses) > 1 else responses[0]
+        if delay:
+            time.sleep(delay[0])
+        payload = body if isinstance(body, str) else json.dumps(body)
+        try:
+            self.send_response(status)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload.encode())
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client timed out first
+
+    def log_message(self, *args):
+        pass
+
+
+class RecordingIngestor:
+    def __init__(self, durable=True, fail_on=None):
+        self.appended = {}
+        self.durable = durable
+        self.fail_on = fail_on
+
+    def persists(self, key):
+        return self.durable
+
+    def append_records(self, key, records):
+        if key == self.fail_on:
+            raise RuntimeError('Appends must go through the shared snapshot producer process')
+        self.appended.setdefault(key, []).extend(records)
+
+
+@pytest.fixture
+def stub():
+    server = FeedStub()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def pipeline(ingestor, sources, **kwargs):
+    options = dict(retries=2, backoff=0, timeout=2.0)
+    options.update(kwargs)
+    return IngestionPipeline(ingestor, sources, **options)
+
+
+def test_transient_errors_are_retried(stub):
+    stub.routes['/buoys'] = [(503, ''), (503, ''), (200, [{'date': '2024-05-01', 'temperature': 28.1}])]
+    ingestor = RecordingIngestor()
+    source = JSONFeedSource('buoys', stub.url('/buoys'), 'ocean_data', 'date')
+
+    [result] = pipeline(ingestor, [source]).run_once()
+
+    assert result['status'] == 'ok'
+    assert result['appended'] == 1
+    assert len(stub.requests) == 3
+
+
+def test_retries_are_bounded(stub):
+    stub.routes['/buoys'] = [(503, '')]
+    source = JSONFeedSource('buoys', stub.url('/buoys'), 'ocean_data', 'date')
+
+    [result] = pipeline(RecordingIngestor(), [source], retries=1).run_once()
+
+    assert result['status'] == 'error'
+    assert len(stub.requests) == 2
+
+
+def test_timeout_leaves_watermark_unchanged(stub):
+    stub.routes['/slow'] = [(200, [{'date': '2024-05-02'}], 1.0)]
+    source = JSONFeedSource('slow', stub.url('/slow'), 'ocean_data', 'date')
+    feeds = pipeline(RecordingIngestor(), [source], retries=0, timeout=0.2)
+    feeds._watermarks['slow'] = '2024-05-01'
+
+    [result] = feeds.run_once()
+
+    assert result['status'] == 'error'
+    assert feeds.watermarks() == {'slow': '2024-05-01'}
+
+
+def test_watermark_advances_and_filters_old_rows(stub, tmp_path):
+    stub.routes['/catches'] = [
+        (200, [{'date': '2024-05-01', 'n': 1}, {'date': '2024-05-03', 'n': 2}]),
+        # A feed that ignores since= still only contributes rows past the watermark
+        (200, [{'date': '2024-05-03', 'n': 2}, {'date': '2024-05-04', 'n': 3}]),
+    ]
+    ingestor = RecordingIngestor()
+    state = tmp_path / 'watermarks.json'
+    source = JSONFeedSource('catches', stub.url('/catches'), 'fisheries_data', 'date')
+    feeds = pipeline(ingestor, [source], state_path=str(state))
+
+    first, = feeds.run_once()
+    second, = feeds.run_once()
+
+    assert first['watermark'] == '2024-05-03'
+    assert stub.requests[1][1] == {'since': ['2024-05-03']}
+    assert second['appended'] == 1
+    assert [record['n'] for record in ingestor.appended['fisheries_data']] == [1, 2, 3]
+    assert json.loads(state.read_text()) == {'catches': '2024-05-04'}
+    assert pipeline(ingestor, [source], state_path=str(state)).watermarks() == {'catches': '2024-05-04'}
+
+
+def test_numeric_watermarks_compare_as_numbers(stub):
+    stub.routes['/seq'] = [(200, 'seq,value\n9,a\n10,b\n11,c\n')]
+    ingestor = RecordingIngestor()
+    source = CSVFeedSource('seq', stub.url('/seq'), 'ocean_data', 'seq', since_param=None,
+                           watermark_type='numeric')
+    feeds = pipeline(ingestor, [source])
+    feeds._watermarks['seq'] = '9'
+
+    [result] = feeds.run_once()
+
+    assert result['appended'] == 2
+    assert result['watermark'] == '11'
+
+
+def test_datetime_watermarks_parse_non_iso_timestamps(stub):
+    stub.routes['/ticks'] = [(200, [{'at': '5/2/2024 09:00'}, {'at': '12/1/2023 23:00'}])]
+    source = JSONFeedSource('ticks', stub.url('/ticks'), 'sensor_data', 'at')
+    feeds = pipeline(RecordingIngestor(), [source])
+    feeds._watermarks['ticks'] = '2024-01-01T00:00:00'
+
+    [result] = feeds.run_once()
+
+    assert result['appended'] == 1
+    assert result['watermark'] == '5/2/2024 09:00'
+
+
+def test_partial_failure_reports_each_source(stub):
+    stub.routes['/good'] = [(200, [{'date': '2024-05-01'}])]
+    stub.routes['/broken'] = [(500, '')]
+    stub.routes['/malformed'] = [(200, {'records': 'not a list'})]
+    ingestor = RecordingIngestor()
+    sources = [
+        JSONFeedSource('good', stub.url('/good'), 'ocean_data', 'date'),
+        JSONFeedSource('broken', stub.url('/broken'), 'ocean_data', 'date'),
+        JSONFeedSource('malformed', stub.url('/malformed'), 'ocean_data', 'date', records_key='records'),
+    ]
+    feeds = pipeline(ingestor, sources)
+
+    results = {result['source']: result for result in feeds.run_once()}
+
+    assert results['good']['status'] == 'ok'
+    assert results['broken']['status'] == 'error'
+    assert results['malformed']['status'] == 'error'
+    assert len(ingestor.appended['ocean_data']) == 1
+    assert feeds.watermarks() == {'good': '2024-05-01'}
+
+
+def test_append_errors_are_reported_not_raised(stub):
+    stub.routes['/buoys'] = [(200, [{'date': '2024-05-01'}])]
+    source = JSONFeedSource('buoys', stub.url('/buoys'), 'ocean_data', 'date')
+    feeds = pipeline(RecordingIngestor(fail_on='ocean_data'), [source])
+
+    [result] = feeds.run_once()
+
+    assert result['status'] == 'error'
+    assert 'producer' in result['error']
+    assert feeds.watermarks() == {}
+
+
+def test_watermarks_of_unpersisted_datasets_are_not_saved(stub, tmp_path):
+    stub.routes['/buoys'] = [(200, [{'date': '2024-05-01'}])]
+    state = tmp_path / 'watermarks.json'
+    source = JSONFeedSource('buoys', stub.url('/buoys'), 'ocean_data', 'date')
+    feeds = pipeline(RecordingIngestor(durable=False), [source], state_path=str(state))
+
+    feeds.run_once()
+
+    assert feeds.watermarks() == {'buoys': '2024-05-01'}
+    assert json.loads(state.read_text()) == {}
+
+
+def test_feed_rows_reach_a_real_ingestor(stub):
+    from config import Config
+    from data_ingestion import RealTimeDataIngestion
+
+    class StubConfig(Config):
+        DATA_STORE_PATH = None
+        SHARED_SNAPSHOTS = None
+        DATASET_TTLS = {'fisheries_data': 0}  # every read rebuilds the synthetic snapshot
+
+    ingestor = RealTimeDataIngestion(StubConfig)
+    template = ingestor.get_fisheries_dataset().to_records()[0]
+    stub.routes['/catches'] = [(200, [dict(template, species='Feed Fish', date='2030-01-01')])]
+    stub.routes['/partial'] = [(200, [{'species': 'Feed Fish', 'date': '2030-01-02'}])]
+    feeds = pipeline(ingestor, [
+        JSONFeedSource('catches', stub.url('/catches'), 'fisheries_data', 'date'),
+        JSONFeedSource('partial', stub.url('/partial'), 'fisheries_data', 'date'),
+    ])
+
+    results = {result['source']: result for result in feeds.run_once()}
+
+    assert results['catches']['status'] == 'ok'
+    assert results['partial']['status'] == 'error'
+    assert 'missing fields' in results['partial']['error']
+    # Still there after the snapshot is rebuilt from scratch
+    for _ in range(2):
+        fisheries = ingestor.get_fisheries_dataset()
+        rows = [row for row in fisheries.to_records() if row['species'] == 'Feed Fish']
+        assert [row['date'] for row in rows] == ['2030-01-01']